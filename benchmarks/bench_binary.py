@@ -0,0 +1,72 @@
+"""
+Compare size and speed of the binary encoding (Expr.to_bytes / Expr.from_bytes) with json and pickle.
+
+    python benchmarks/bench_binary.py --count 5000
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr  # noqa: E402
+
+
+FILTERS = {
+    'small': {'tenant_id': 42, 'version': {'__gte__': 1}},
+    'mixed': {
+        'tenant_id': 42,
+        'rule_id': [6666, 7777, 8888],
+        'act_type': {'__nin__': ['logging', 'eval']},
+        'rule_name': '/logging_.*/',
+        '__or__': [
+            {
+                'create_ts': {'__lte__': datetime(2015, 12, 31, 12, 5), '__gt__': datetime(2014, 1, 1)},
+                'version': {'__lt__': 3, '__gte__': 1},
+            },
+            {'__not__': {'version': 4}},
+        ],
+    },
+    'wide_in': {'user_id': list(range(5000)), 'country': ['country_{}'.format(i) for i in range(200)]},
+}
+
+
+def json_dumps(expr):
+    return json.dumps(expr.to_query_json(), default=datetime.isoformat).encode()
+
+
+CODECS = [
+    ('json', json_dumps, Expr.from_json_bytes),
+    ('pickle', lambda e: pickle.dumps(e, pickle.HIGHEST_PROTOCOL), pickle.loads),
+    ('binary', Expr.to_bytes, Expr.from_bytes),
+]
+
+
+def timeit(fn, arg, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn(arg)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=5000, help='number of repetitions per measurement')
+    args = parser.parse_args()
+
+    print('{:<10} {:<8} {:>10} {:>14} {:>14}'.format('filter', 'codec', 'bytes', 'encode us', 'decode us'))
+    for name, filter_json in FILTERS.items():
+        expr = Expr.from_json(filter_json)
+        count = max(1, args.count // (len(filter_json.get('user_id', ())) // 100 + 1))
+        for codec, encode, decode in CODECS:
+            data = encode(expr)
+            print('{:<10} {:<8} {:>10} {:>14.2f} {:>14.2f}'.format(
+                name, codec, len(data), timeit(encode, expr, count), timeit(decode, data, count)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Replay a query log against an in-memory SQLite database, with and without querify.cache.ResultCache in front of it.
+
+    python benchmarks/bench_cache.py --rows 100000 --queries 5000
+    python benchmarks/bench_cache.py --log queries.jsonl
+
+A log has one json object per line, {"columns": [...], "where": {...}}, with the filters of the rows generated by this
+script (see generate_rows). Without a log, one is generated the way dashboards issue queries: a few popular filters
+repeated with their predicates in varying order, and narrower versions of them. Every result of the cached replay is
+checked against the uncached one.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr, Select  # noqa: E402
+from querify.cache import ResultCache  # noqa: E402
+
+
+COLUMNS = ['id', 'tenant_id', 'country', 'version', 'latency']
+
+
+def generate_rows(count, seed=0):
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield i, rnd.randint(0, 99), 'c{}'.format(rnd.randint(0, 49)), rnd.randint(0, 5), rnd.randint(0, 1000)
+
+
+def load(rows):
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, tenant_id INTEGER, country TEXT, version INTEGER, '
+                       'latency INTEGER)')
+    connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?)', generate_rows(rows))
+    connection.execute('CREATE INDEX idx_tenant ON events (tenant_id)')
+    return connection
+
+
+def generate_log(count, seed=0):
+    rnd = random.Random(seed)
+    popular = [{'tenant_id': rnd.randint(0, 99), 'version': {'__gte__': rnd.randint(0, 3)}} for _ in range(20)]
+    for _ in range(count):
+        predicates = [{k: v} for k, v in rnd.choice(popular[:rnd.randint(1, len(popular))]).items()]
+        if rnd.random() < 0.4:
+            predicates.append(rnd.choice([
+                {'latency': {'__gt__': rnd.randrange(0, 1000, 100)}},
+                {'country': ['c{}'.format(rnd.randint(0, 49)) for _ in range(3)]},
+                {'__not__': {'version': 5}},
+            ]))
+        rnd.shuffle(predicates)
+        yield {'columns': COLUMNS, 'where': {'__and__': predicates}}
+
+
+def read_log(path):
+    with open(path) as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='number of rows in the table')
+    parser.add_argument('--queries', type=int, default=5000, help='number of queries of the generated log')
+    parser.add_argument('--log', help='a query log to replay instead of a generated one')
+    parser.add_argument('--max-entries', type=int, default=256, help='entries of the cache')
+    parser.add_argument('--max-bytes', type=int, default=64 << 20, help='memory budget of the cache')
+    args = parser.parse_args()
+
+    connection = load(args.rows)
+    log = list(read_log(args.log) if args.log else generate_log(args.queries))
+    selects = [Select(table='events', columns=q.get('columns'), where=Expr.from_json(q['where'])) for q in log]
+
+    def execute(select):
+        sql, params = select.to_query('sqlite')
+        return connection.execute(sql, params).fetchall()
+
+    start = time.perf_counter()
+    expected = [execute(select) for select in selects]
+    uncached_s = time.perf_counter() - start
+
+    cache = ResultCache(max_entries=args.max_entries, max_bytes=args.max_bytes)
+    start = time.perf_counter()
+    results = [cache.get_or_execute(select, execute) for select in selects]
+    cached_s = time.perf_counter() - start
+    for select, result, rows in zip(selects, results, expected):
+        assert sorted(result) == sorted(rows), select.to_query('sqlite')
+
+    stats = cache.stats()
+    print('{} rows, {} queries'.format(args.rows, len(selects)))
+    print('uncached: {:.1f} ms, cached: {:.1f} ms'.format(uncached_s * 1e3, cached_s * 1e3))
+    print('hits: {hits}, superset hits: {superset_hits}, misses: {misses}, evictions: {evictions}'.format(**stats))
+    print('hit rate: {:.1%}, mean lookup: {:.1f} us, cached: {} entries, {} bytes'.format(
+        stats['hit_rate'], stats['mean_lookup_time'] * 1e6, stats['entries'], stats['bytes']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measure garbage collector activity while parsing filters with Expr.from_json.
+
+    python benchmarks/bench_gc.py --count 1000000
+
+Reports the number of collections per generation, the total and maximum gc pause time, and the number of objects the
+cyclic gc had to free. Parsed trees should be freed by reference counting alone, so "collected" is expected to be 0.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr  # noqa: E402
+
+
+FILTER = {
+    'tenant_id': 42,
+    'rule_id': [6666, '7777', 8888],
+    'act_type': {'__nin__': ['logging', 'eval']},
+    'rule_name': '/logging_.*/',
+    '__or__': [
+        {
+            'create_ts': {'__lte__': datetime(2015, 12, 31, 12, 5), '__gt__': datetime(2014, 1, 1)},
+            'version': {'__lt__': 3, '__gte__': 1},
+        },
+        {'__not__': {'version': 4}},
+    ],
+}
+
+
+class GcMonitor:
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.collected = 0
+        self.pause_total = 0.
+        self.pause_max = 0.
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._start
+            self.collections[info['generation']] += 1
+            self.collected += info['collected']
+            self.pause_total += pause
+            self.pause_max = max(self.pause_max, pause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000, help='number of filters to parse')
+    args = parser.parse_args()
+
+    gc.collect()
+    monitor = GcMonitor()
+    gc.callbacks.append(monitor)
+    try:
+        start = time.perf_counter()
+        for _ in range(args.count):
+            Expr.from_json(FILTER)
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.callbacks.remove(monitor)
+
+    print('parsed {} filters in {:.2f}s ({:.0f} filters/s)'.format(args.count, elapsed, args.count / elapsed))
+    print('gc collections (gen0/gen1/gen2): {}/{}/{}'.format(*monitor.collections))
+    print('gc pause: total {:.2f}ms, max {:.3f}ms'.format(monitor.pause_total * 1000, monitor.pause_max * 1000))
+    print('objects freed by cyclic gc: {}'.format(monitor.collected))
+
+
+if __name__ == '__main__':
+    main()
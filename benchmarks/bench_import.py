@@ -0,0 +1,45 @@
+"""
+Measure the time to import querify in fresh interpreters, and list the slowest modules imported along the way.
+
+    python benchmarks/bench_import.py --runs 10
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(statement):
+    """Run statement in a fresh interpreter with -X importtime and return {module: cumulative microseconds}."""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                            stderr=subprocess.PIPE, check=True).stderr.decode()
+    times = {}
+    for line in output.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters to measure')
+    parser.add_argument('--statement', default='import querify', help='statement to measure')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest modules to list')
+    args = parser.parse_args()
+
+    runs = [import_times(args.statement) for _ in range(args.runs)]
+    totals = [times.get('querify', 0) / 1000 for times in runs]
+    print('{}: median {:.1f}ms, min {:.1f}ms, max {:.1f}ms over {} runs'.format(
+        args.statement, statistics.median(totals), min(totals), max(totals), args.runs))
+    slowest = sorted(runs[-1].items(), key=lambda item: -item[1])[:args.top]
+    for module, micros in slowest:
+        print('  {:<40} {:>8.1f}ms'.format(module, micros / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare ingesting json encoded filters with json.loads + Expr.from_json against Expr.from_json_bytes.
+
+    python benchmarks/bench_ingest.py --count 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr, ingest  # noqa: E402
+
+
+FILTER = {
+    'tenant_id': 42,
+    'rule_id': list(range(100)),
+    'act_type': {'__nin__': ['logging', 'eval']},
+    'rule_name': '/logging_.*/',
+    '__or__': [
+        {
+            'create_ts': {'__lte__': '2015-12-31T12:05:00Z', '__gt__': '2014-01-01T00:00:00Z'},
+            'version': {'__lt__': 3, '__gte__': 1},
+        },
+        {'__not__': {'version': 4}},
+    ],
+}
+
+
+def bench(name, fn, data, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn(data)
+    elapsed = time.perf_counter() - start
+    print('{:<40} {:>8.2f}us/filter {:>10.0f} filters/s'.format(name, elapsed / count * 1e6, count / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000, help='number of filters to parse')
+    args = parser.parse_args()
+
+    data = json.dumps(FILTER).encode()
+    print('json backend: {}'.format('orjson' if ingest.orjson is not None else 'json'))
+    bench('json.loads', json.loads, data, args.count)
+    bench('ingest.loads', lambda d: ingest.loads(d, parse_datetimes=False), data, args.count)
+    bench('ingest.loads (datetimes)', lambda d: ingest.loads(d, parse_datetimes=True), data, args.count)
+    bench('json.loads + Expr.from_json', lambda d: Expr.from_json(json.loads(d)), data, args.count)
+    bench('Expr.from_json_bytes', lambda d: Expr.from_json_bytes(d, parse_datetimes=False), data, args.count)
+    bench('Expr.from_json_bytes (datetimes)', lambda d: Expr.from_json_bytes(d, parse_datetimes=True), data,
+          args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure the benefit of pushing filters down to the database, end to end, without any external service.
+
+    python benchmarks/bench_pushdown.py --rows 200000
+
+A generated table is loaded into an in-memory SQLite database. Every filter is then run as a Select rendered by the
+sqlite dialect, both before and after creating indexes, and compared with fetching all rows and filtering them in
+Python. The number of matched rows is checked to be the same for all three.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr, Select, StringLiteral, DateTimeLiteral  # noqa: E402
+from querify.dialects.sqlite import register_functions  # noqa: E402
+
+
+COLUMNS = ['id', 'tenant_id', 'country', 'version', 'create_ts', 'rule_name', 'comment']
+INDEXES = ['tenant_id', 'country', 'create_ts', 'tenant_id, create_ts']
+
+FILTERS = {
+    'equal': {'tenant_id': 42},
+    'time_range': {'create_ts': {'__gte__': datetime(2015, 3, 1), '__lt__': datetime(2015, 3, 8)}},
+    'tenant_time_range': {'tenant_id': 7, 'create_ts': {'__gte__': datetime(2015, 3, 1), '__lt__': datetime(2015, 6, 1)}},
+    'in_list': {'country': ['c{}'.format(i) for i in range(0, 200, 40)], 'version': {'__gte__': 3}},
+    'regex': {'rule_name': '/^logging_1[0-9]$/'},
+    'or': {'__or__': [{'tenant_id': 3}, {'country': 'c17', 'comment': {'__null__': False}}]},
+}
+
+
+def generate_rows(count, seed=0):
+    rnd = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    for i in range(count):
+        yield (
+            i,
+            rnd.randint(0, 999),
+            'c{}'.format(rnd.randint(0, 199)),
+            rnd.randint(0, 5),
+            (start + timedelta(seconds=rnd.randint(0, 365 * 24 * 3600))).isoformat(' '),
+            '{}_{}'.format(rnd.choice(['logging', 'eval', 'block']), rnd.randint(0, 99)),
+            rnd.choice([None, 'comment']),
+        )
+
+
+def load(rows):
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+    connection.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, tenant_id INTEGER, country TEXT, '
+                       'version INTEGER, create_ts TEXT, rule_name TEXT, comment TEXT)')
+    connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)', generate_rows(rows))
+    return connection
+
+
+def create_indexes(connection):
+    for i, columns in enumerate(INDEXES):
+        connection.execute('CREATE INDEX idx_{} ON events ({})'.format(i, columns))
+    connection.execute('ANALYZE')
+
+
+def predicate(expr):
+    """Compile expr into a function of a row. Datetimes are compared in the text form they are stored in."""
+    expr = expr.transform(lambda e: StringLiteral(e.literal.isoformat(' ')) if isinstance(e, DateTimeLiteral) else e)
+    return expr.to_query('python', columns=COLUMNS)
+
+
+def timeit(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='number of rows in the table')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per measurement, the best is reported')
+    args = parser.parse_args()
+
+    connection = load(args.rows)
+    select_all = 'SELECT ' + ', '.join(COLUMNS) + ' FROM events'
+    exprs = {name: Expr.from_json(filter_json) for name, filter_json in FILTERS.items()}
+
+    def in_python(expr):
+        p = predicate(expr)
+        return len([row for row in connection.execute(select_all) if p(row)])
+
+    def in_sqlite(expr):
+        sql, params = Select(table='events', columns=COLUMNS, where=expr).to_query('sqlite')
+        return len(connection.execute(sql, params).fetchall())
+
+    results = {name: [timeit(lambda: in_python(expr), args.repeat), timeit(lambda: in_sqlite(expr), args.repeat)]
+               for name, expr in exprs.items()}
+    create_indexes(connection)
+    for name, expr in exprs.items():
+        results[name].append(timeit(lambda: in_sqlite(expr), args.repeat))
+
+    print('{} rows'.format(args.rows))
+    print('{:<20} {:>8} {:>12} {:>12} {:>14}'.format('filter', 'matched', 'python ms', 'sqlite ms', 'indexed ms'))
+    for name, ((python_ms, matched), (sqlite_ms, sqlite_matched), (indexed_ms, indexed_matched)) in results.items():
+        assert matched == sqlite_matched == indexed_matched, name
+        print('{:<20} {:>8} {:>12.1f} {:>12.1f} {:>14.1f}'.format(name, matched, python_ms, sqlite_ms, indexed_ms))
+
+
+if __name__ == '__main__':
+    main()
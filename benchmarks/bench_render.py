@@ -0,0 +1,104 @@
+"""
+Time rendering through the to_query_<dialect> methods, and optionally compare with another checkout of querify, e.g. a
+revision from before the dialect registry:
+
+    python benchmarks/bench_render.py
+    git worktree add /tmp/querify-old <revision>
+    python benchmarks/bench_render.py --compare /tmp/querify-old
+
+Both trees are measured in alternating rounds of separate processes, and the fastest round of each is reported, which
+keeps the comparison stable on noisy machines.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILTERS = {
+    'plain': {
+        'rule_id': [6666, 7777, 8888],
+        'act_type': {'__nin__': ['logging', 'eval']},
+        'rule_name': '/logging_.*/',
+        'version': {'__lt__': 3, '__gte__': 1},
+        '__or__': [{'a': 1, 'b': {'__gt__': 2}}, {'c': 'x', 'd': {'__lte__': 5.5}}, {'e': {'__in__': [1, 2, 3]}}],
+        'f': 'y',
+        'g': {'__neq__': 3},
+    },
+    'negations': {
+        'a': 1,
+        '__not__': {'c': {'__gt__': 2}},
+        '__or__': [{'__not__': {'d': 1, 'e': {'__lt__': 4}}}, {'__not__': {'f': [1, 2]}}],
+    },
+    'wide_in': {'user_id': list(range(1000)), 'country': ['country_{}'.format(i) for i in range(100)]},
+}
+DIALECTS = ['json', 'mysql', 'mongo', 'influx']
+
+
+def measure(root, count):
+    """
+    The mean time in microseconds of every rendering that the querify at root supports, by "<filter>.<dialect>".
+    """
+    sys.path.insert(0, root)
+    from querify import Expr
+    results = {}
+    for name, filter_json in FILTERS.items():
+        expr = Expr.from_json(filter_json)
+        for dialect in DIALECTS:
+            render = getattr(expr, 'to_query_' + dialect)
+            try:
+                render()
+            except NotImplementedError:
+                continue
+            start = time.perf_counter()
+            for _ in range(count):
+                render()
+            results[name + '.' + dialect] = (time.perf_counter() - start) / count * 1e6
+    return results
+
+
+def run(root, count):
+    output = subprocess.run([sys.executable, __file__, '--root', root, '--count', str(count), '--json'],
+                            stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2000, help='number of renderings per measurement')
+    parser.add_argument('--rounds', type=int, default=5, help='number of rounds per tree')
+    parser.add_argument('--compare', help='the root of another checkout of querify to compare with')
+    parser.add_argument('--root', default=ROOT, help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(measure(args.root, args.count)))
+        return
+
+    roots = [args.root] + ([args.compare] if args.compare else [])
+    best = [{} for _ in roots]
+    for _ in range(args.rounds):
+        for root, times in zip(roots, best):
+            for key, value in run(root, args.count).items():
+                times[key] = min(value, times.get(key, value))
+
+    if not args.compare:
+        for key, value in sorted(best[0].items()):
+            print('{:<20} {:>9.1f} us'.format(key, value))
+        return
+    print('{:<20} {:>12} {:>12} {:>7}'.format('', 'this tree', 'compared', 'ratio'))
+    for key in sorted(set(best[0]) | set(best[1])):
+        this, other = best[0].get(key), best[1].get(key)
+        if this is None or other is None:
+            print('{:<20} {:>12} {:>12}'.format(key, '-' if this is None else '{:.1f} us'.format(this),
+                                                '-' if other is None else '{:.1f} us'.format(other)))
+        else:
+            print('{:<20} {:>9.1f} us {:>9.1f} us {:>6.2f}x'.format(key, this, other, this / other))
+
+
+if __name__ == '__main__':
+    main()
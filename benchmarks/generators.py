@@ -0,0 +1,87 @@
+"""
+Synthetic filter generators for benchmarks. Every generator is deterministic for a given size and seed.
+"""
+import random
+from datetime import datetime, timedelta
+
+
+def wide_and(size, seed=0):
+    """A flat conjunction of `size` predicates over `size // 4 + 1` fields."""
+    rnd = random.Random(seed)
+    operators = ['__eq__', '__neq__', '__gt__', '__gte__', '__lt__', '__lte__']
+    return {'__and__': [{'f{}'.format(i % (size // 4 + 1)): {rnd.choice(operators): rnd.randint(0, 1000)}}
+                        for i in range(size)]}
+
+
+def deep_nesting(size, seed=0):
+    """Alternating __and__ / __or__ / __not__ nested `size` levels deep, two leaves per level."""
+    rnd = random.Random(seed)
+    filter_json = {'leaf': rnd.randint(0, 1000)}
+    for depth in range(size):
+        if depth % 3 == 2:
+            filter_json = {'__not__': filter_json}
+        else:
+            op = '__and__' if depth % 3 == 0 else '__or__'
+            filter_json = {op: [filter_json, {'f{}'.format(depth): {'__gt__': rnd.randint(0, 1000)}}]}
+    return filter_json
+
+
+def huge_in(size, seed=0):
+    """An __in__ over `size` integers, a __nin__ over `size // 10` strings and a small equality."""
+    rnd = random.Random(seed)
+    return {
+        'user_id': rnd.sample(range(size * 10), size),
+        'country': {'__nin__': ['c{}'.format(i) for i in range(size // 10)]},
+        'tenant_id': 42,
+    }
+
+
+def regex_heavy(size, seed=0):
+    """`size` regex predicates, anchored, unanchored and inverse."""
+    rnd = random.Random(seed)
+    exprs = []
+    for i in range(size):
+        word = ''.join(rnd.choice('abcdefghij') for _ in range(6))
+        kind = i % 3
+        if kind == 0:
+            exprs.append({'name{}'.format(i % 7): '/^{}-.*/'.format(word)})
+        elif kind == 1:
+            exprs.append({'name{}'.format(i % 7): '/{}[0-9]+$/'.format(word)})
+        else:
+            exprs.append({'name{}'.format(i % 7): {'__iregex__': '{}_(a|b)'.format(word)}})
+    return {'__or__': exprs}
+
+
+def mixed_datetime(size, seed=0):
+    """`size` disjuncts of time windows combined with value, list and null predicates."""
+    rnd = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    exprs = []
+    for i in range(size):
+        lower = start + timedelta(hours=rnd.randint(0, 24 * 365))
+        exprs.append({
+            'time': {'__gte__': lower, '__lt__': lower + timedelta(hours=rnd.randint(1, 72))},
+            'host': ['host{}'.format(rnd.randint(0, 100)) for _ in range(3)],
+            'value': {'__gt__': rnd.random() * 100},
+            'comment': {'__null__': bool(i % 2)},
+        })
+    return {'__or__': exprs, 'region': 'us-east'}
+
+
+GENERATORS = {
+    'wide_and': wide_and,
+    'deep_nesting': deep_nesting,
+    'huge_in': huge_in,
+    'regex_heavy': regex_heavy,
+    'mixed_datetime': mixed_datetime,
+}
+
+# (generator, size) pairs used by the suite. Sizes are chosen so that a single operation takes roughly 0.1-10ms.
+CASES = [
+    ('wide_and', 100),
+    ('wide_and', 1000),
+    ('deep_nesting', 60),
+    ('huge_in', 10000),
+    ('regex_heavy', 200),
+    ('mixed_datetime', 100),
+]
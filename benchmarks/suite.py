@@ -0,0 +1,147 @@
+"""
+Benchmark suite for parsing, traversal and rendering.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --output new.json --compare results.json
+
+For every synthetic filter in generators.CASES, the suite measures Expr.from_json, Expr.transform, Expr.iter_expr,
+to_query for every dialect, and the Select / ShowTagKeys statements built on top of the filter. Throughput is
+measured by repeating each operation for at least --min-time seconds, and peak memory is the tracemalloc peak of a
+single run. Results are printed and optionally saved as json so runs can be compared over time.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from querify import Expr, Select, ShowTagKeys  # noqa: E402
+from generators import GENERATORS, CASES  # noqa: E402
+
+
+DIALECTS = ['json', 'mysql', 'postgres', 'sqlite', 'mongo', 'elasticsearch', 'influx', 'pandas', 'pluto']
+STATEMENT_DIALECTS = {
+    'select': ['influx', 'mysql', 'postgres', 'sqlite'],
+    'show_tag_keys': ['influx'],
+}
+
+
+def operations(filter_json):
+    expr = Expr.from_json(filter_json)
+    select = Select(table='m', retention_policy='rp', db='db', columns=['a', 'b'], where=expr)
+    show_tag_keys = ShowTagKeys(measurement='m', retention_policy='rp', db='db', where=expr)
+    yield 'from_json', lambda: Expr.from_json(filter_json)
+    yield 'transform', lambda: expr.transform()
+    yield 'iter_expr', lambda: list(expr.iter_expr())
+    for dialect in DIALECTS:
+        yield 'to_query.' + dialect, lambda dialect=dialect: expr.to_query(dialect)
+    for dialect in STATEMENT_DIALECTS['select']:
+        yield 'select.' + dialect, lambda dialect=dialect: select.to_query(dialect)
+    for dialect in STATEMENT_DIALECTS['show_tag_keys']:
+        yield 'show_tag_keys.' + dialect, lambda dialect=dialect: show_tag_keys.to_query(dialect)
+
+
+def measure(fn, min_time):
+    try:
+        fn()
+    except NotImplementedError:
+        return {'status': 'unsupported'}
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    runs = 0
+    elapsed = 0.
+    batch = 1
+    while elapsed < min_time:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        elapsed += time.perf_counter() - start
+        runs += batch
+        batch *= 2
+    return {
+        'status': 'ok',
+        'runs': runs,
+        'ops_per_sec': runs / elapsed,
+        'mean_us': elapsed / runs * 1e6,
+        'peak_kib': peak / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, min_time, only=None):
+    results = []
+    for generator, size in cases:
+        filter_json = GENERATORS[generator](size)
+        case = '{}[{}]'.format(generator, size)
+        for op, fn in operations(filter_json):
+            if only and not any(o in op for o in only):
+                continue
+            result = measure(fn, min_time)
+            result.update(case=case, op=op)
+            results.append(result)
+            print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result, baseline=None):
+    if result['status'] != 'ok':
+        return '{:<22} {:<24} {:>12}'.format(result['case'], result['op'], result['status'])
+    line = '{:<22} {:<24} {:>12.1f} us {:>12.0f} ops/s {:>10.1f} KiB'.format(
+        result['case'], result['op'], result['mean_us'], result['ops_per_sec'], result['peak_kib'])
+    if baseline is not None and baseline.get('status') == 'ok':
+        line += ' {:>7.2f}x'.format(result['ops_per_sec'] / baseline['ops_per_sec'])
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='save results as json to this file')
+    parser.add_argument('--compare', help='compare throughput against results saved by a previous run')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds spent per measurement')
+    parser.add_argument('--only', nargs='*', help='only run operations whose name contains one of these strings')
+    args = parser.parse_args()
+
+    results = run(CASES, args.min_time, args.only)
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        baseline_results = {(r['case'], r['op']): r for r in baseline['results']}
+        print('\ncompared with {} ({}):'.format(args.compare, baseline['meta'].get('revision')))
+        for result in results:
+            print(format_result(result, baseline_results.get((result['case'], result['op']))))
+
+
+if __name__ == '__main__':
+    main()
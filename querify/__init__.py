@@ -1,3 +1,11 @@
 VERSION = '0.1.0'
 
+import sys
+
 from .querify import *
+from .visitor import Visitor, SKIP, STOP
+from .instrumentation import stats, reset_stats
+
+from .querify import _LazyReferencesModule
+
+sys.modules[__name__].__class__ = _LazyReferencesModule
@@ -0,0 +1,120 @@
+"""
+Batching of Selects with different filters on the same table into one statement, so that they cost one round trip
+instead of one each, and splitting the rows of the batch back into the rows of every Select.
+
+A BatchSelect selects the rows matching any of the filters. Rendered by a dialect, it labels every row with whether
+each filter matches it: SQL dialects add a boolean column "(filter) AS _f<i>" per filter, and the mongo dialect renders
+an aggregation pipeline with one $facet per filter. Where labels are not supported (e.g. InfluxQL), BatchSelect.select
+is a plain Select of the same rows, which also returns the columns of the filters, so that the rows can be split by
+evaluating the filters in memory.
+The rows of every Select are projected to its own columns, except for rows of values if any Select of the batch selects
+all columns, which are split as they are.
+"""
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from .errors import InvalidQuery
+from .projection import residual_columns
+from .querify import Stmt, Select, SchemaLiteral, And, Or
+
+
+class BatchSelect(Stmt):
+    def __init__(self, selects: Sequence[Select]):
+        super().__init__()
+        if not selects:
+            raise InvalidQuery('A batch needs at least one Select.')
+        self.selects = list(selects)
+        first = self.selects[0]
+        for select in self.selects:
+            if _source(select) != _source(first):
+                raise InvalidQuery('The Selects of a batch must be on the same table, got {} and {}.'
+                                   .format(_source(first), _source(select)))
+            if select.order_by or select.limit is not None:
+                raise InvalidQuery('The Selects of a batch cannot be ordered or limited.')
+        self.table = first.table
+        self.retention_policy = first.retention_policy
+        self.db = first.db
+        self.filters = [s.where if s.where else And([]) for s in self.selects]
+        self.labels = ['_f{}'.format(i) for i in range(len(self.selects))]
+        # the union of the columns of the Selects, or None if any of them selects all columns
+        if all(s.columns for s in self.selects):
+            self.columns = [SchemaLiteral(c) for c in _unique(c.literal for s in self.selects for c in s.columns)]
+        else:
+            self.columns = None
+        if any(isinstance(f, And) and not f.exprs for f in self.filters):
+            self.where = None
+        else:
+            self.where = Or([f.transform() for f in self.filters]) if len(self.filters) > 1 else self.filters[0]
+
+    @property
+    def select(self) -> Select:
+        """
+        The Select of the rows of the batch without labels, to be split by BatchSelect.demultiplex.
+        """
+        columns = self.columns
+        if columns is not None:
+            columns = _unique([c.literal for c in columns] + [c for f in self.filters for c in residual_columns(f)])
+        return Select(self.table, self.retention_policy, self.db, columns, self.where and self.where.transform())
+
+    def demultiplex(self, rows: list) -> List[list]:
+        """
+        Split the rows of BatchSelect.select into the rows of every Select, by evaluating the filters in memory with the
+        "python" dialect, i.e. with the semantics of SQL for NULL.
+        """
+        columns = self.select.columns
+        names = None if columns is None else [c.literal for c in columns]
+        mappings = not rows or isinstance(rows[0], dict)
+        if names is None and not mappings:
+            raise InvalidQuery('Rows of all columns can only be split if they are mappings from column names.')
+        results = []
+        for select, where in zip(self.selects, self.filters):
+            predicate = where.to_query('python', columns=None if mappings else names)
+            results.append(_project([row for row in rows if predicate(row)], names, select))
+        return results
+
+    def demultiplex_labeled(self, rows: list) -> List[list]:
+        """
+        Split the rows of a BatchSelect rendered by a SQL dialect, which end with the labels, into the rows of every
+        Select. Rows may also be mappings, from which the labels are removed.
+        """
+        count = len(self.labels)
+        results = [[] for _ in self.selects]
+        for row in rows:
+            if isinstance(row, dict):
+                labels = [row[label] for label in self.labels]
+                row = {k: v for k, v in row.items() if k not in self.labels}
+            else:
+                labels = row[-count:]
+                row = tuple(row[:-count])
+            for result, label in zip(results, labels):
+                if label:
+                    result.append(row)
+        names = None if self.columns is None else [c.literal for c in self.columns]
+        return [_project(result, names, select) for result, select in zip(results, self.selects)]
+
+    def demultiplex_facets(self, document: dict) -> List[list]:
+        """
+        Split the result of the aggregation pipeline rendered by the mongo dialect (its only document) into the rows of
+        every Select.
+        """
+        return [list(document[label]) for label in self.labels]
+
+
+def _source(select):
+    return tuple(None if e is None else e.literal for e in (select.db, select.retention_policy, select.table))
+
+
+def _unique(items):
+    return list(OrderedDict.fromkeys(items))
+
+
+def _project(rows: list, names: Optional[List[str]], select: Select) -> list:
+    if not select.columns or not rows:
+        return rows
+    columns = [c.literal for c in select.columns]
+    if isinstance(rows[0], dict):
+        return [{c: row.get(c) for c in columns} for row in rows]
+    if names is None or names == columns:
+        return rows
+    indexes = [names.index(c) for c in columns]
+    return [tuple(row[i] for i in indexes) for row in rows]
@@ -0,0 +1,303 @@
+"""
+Compact binary encoding of expr trees.
+
+Layout (version 1):
+
+    magic "QFY" | version byte | string table | root node
+
+The string table is a varint count followed by the varint length prefixed utf-8 bytes of each distinct string (field
+names, string and regex literals). A node starts with a tag byte. Operators are tagged with their position in
+OPERATOR_KEYS (plus one), logical operators are followed by the varint number of sub exprs, Not by its operand, and
+field predicates by the string index of the field and the right hand side, which is a literal node for comparisons
+and a packed array for list operators. Integers are zigzag varints, floats are 8 bytes little endian and datetimes are
+zigzag varint microseconds since the unix epoch.
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+
+from .errors import InvalidQuery, InvalidEncoding
+from .querify import Expr, OperatorExpr, LogicalExpr, UnaryBooleanExpr, BinaryBooleanExpr, FieldCompareListExpr, \
+    StringLiteral, BooleanLiteral, IntLiteral, FloatLiteral, DateTimeLiteral, RegexLiteral, SchemaLiteral
+
+
+MAGIC = b'QFY'
+VERSION = 1
+
+# Append only: the position of an operator key is its code in the encoding.
+OPERATOR_KEYS = (
+    '__not__', '__and__', '__all__', '__or__', '__any__',
+    '__eq__', '__eqf__', '__neq__', '__neqf__',
+    '__gt__', '__gtf__', '__gte__', '__gtef__',
+    '__lt__', '__ltf__', '__lte__', '__ltef__',
+    '__regex__', '__iregex__', '__null__', '__missing__',
+    '__in__', '__nin__',
+)
+
+TAG_STR = 0x40
+TAG_INT = 0x41
+TAG_FLOAT = 0x42
+TAG_TRUE = 0x43
+TAG_FALSE = 0x44
+TAG_DATETIME = 0x45
+TAG_DATETIME_TZ = 0x46
+TAG_REGEX = 0x47
+TAG_SCHEMA = 0x48
+
+LIST_INT = 0x50
+LIST_STR = 0x51
+LIST_MIXED = 0x52
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_TZ = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+FLOAT = struct.Struct('<d')
+
+OPERATOR_CODES = None
+OPERATOR_CLASSES = None
+
+
+def _operator_tables():
+    global OPERATOR_CODES, OPERATOR_CLASSES
+    if OPERATOR_CODES is None:
+        classes = [OperatorExpr[key] for key in OPERATOR_KEYS]
+        OPERATOR_CODES = {cls: code for code, cls in enumerate(classes, 1)}
+        OPERATOR_CLASSES = [None] + classes
+    return OPERATOR_CODES, OPERATOR_CLASSES
+
+
+def _zigzag(n):
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _write_varint(buf, n):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+class Encoder:
+    def __init__(self):
+        self.operator_codes, _ = _operator_tables()
+        # the string table in order of first use, and the index of each string in it
+        self.strings = []
+        self.string_indexes = {}
+        self.body = bytearray()
+
+    def string_index(self, s):
+        index = self.string_indexes.get(s)
+        if index is None:
+            index = self.string_indexes[s] = len(self.strings)
+            self.strings.append(s)
+        return index
+
+    def encode(self, expr: Expr) -> bytes:
+        self.write_node(expr)
+        head = bytearray(MAGIC)
+        head.append(VERSION)
+        _write_varint(head, len(self.strings))
+        for s in self.strings:
+            encoded = s.encode('utf-8')
+            _write_varint(head, len(encoded))
+            head += encoded
+        return bytes(head + self.body)
+
+    def write_node(self, expr):
+        buf = self.body
+        code = self.operator_codes.get(type(expr))
+        if code is None:
+            self.write_literal(expr)
+        elif isinstance(expr, LogicalExpr):
+            buf.append(code)
+            _write_varint(buf, len(expr.exprs))
+            for sub_expr in expr.exprs:
+                self.write_node(sub_expr)
+        elif isinstance(expr, UnaryBooleanExpr):
+            buf.append(code)
+            self.write_node(expr.operand)
+        elif isinstance(expr, FieldCompareListExpr):
+            buf.append(code)
+            _write_varint(buf, self.string_index(expr.left.literal))
+            self.write_list(expr.right)
+        else:
+            buf.append(code)
+            _write_varint(buf, self.string_index(expr.left.literal))
+            self.write_literal(expr.right)
+
+    def write_list(self, literals):
+        buf = self.body
+        literal_types = set(map(type, literals))
+        if literal_types == {IntLiteral}:
+            buf.append(LIST_INT)
+            _write_varint(buf, len(literals))
+            for literal in literals:
+                _write_varint(buf, _zigzag(literal.literal))
+        elif literal_types == {StringLiteral}:
+            buf.append(LIST_STR)
+            _write_varint(buf, len(literals))
+            for literal in literals:
+                _write_varint(buf, self.string_index(literal.literal))
+        else:
+            buf.append(LIST_MIXED)
+            _write_varint(buf, len(literals))
+            for literal in literals:
+                self.write_literal(literal)
+
+    def write_literal(self, expr):
+        buf = self.body
+        literal_type = type(expr)
+        if literal_type is StringLiteral:
+            buf.append(TAG_STR)
+            _write_varint(buf, self.string_index(expr.literal))
+        elif literal_type is SchemaLiteral:
+            buf.append(TAG_SCHEMA)
+            _write_varint(buf, self.string_index(expr.literal))
+        elif literal_type is IntLiteral:
+            buf.append(TAG_INT)
+            _write_varint(buf, _zigzag(expr.literal))
+        elif literal_type is FloatLiteral:
+            buf.append(TAG_FLOAT)
+            buf += FLOAT.pack(expr.literal)
+        elif literal_type is BooleanLiteral:
+            buf.append(TAG_TRUE if expr.literal else TAG_FALSE)
+        elif literal_type is DateTimeLiteral:
+            value = expr.literal
+            offset = value.utcoffset()
+            if offset is None:
+                buf.append(TAG_DATETIME)
+                _write_varint(buf, _zigzag((value - EPOCH) // MICROSECOND))
+            else:
+                buf.append(TAG_DATETIME_TZ)
+                _write_varint(buf, _zigzag((value - EPOCH_TZ) // MICROSECOND))
+                _write_varint(buf, _zigzag(offset // timedelta(seconds=1)))
+        elif literal_type is RegexLiteral:
+            buf.append(TAG_REGEX)
+            _write_varint(buf, self.string_index(expr.literal))
+        else:
+            raise InvalidEncoding('{!r} cannot be encoded in binary format'.format(expr))
+
+
+def _literal(cls, literal):
+    # values read from the encoding are already validated, so the constructor is bypassed
+    expr = cls.__new__(cls)
+    expr.literal = literal
+    return expr
+
+
+class Decoder:
+    def __init__(self, data: bytes):
+        _, self.operator_classes = _operator_tables()
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def read_varint(self):
+        data = self.data
+        pos = self.pos
+        result = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        self.pos = pos
+        return result
+
+    def decode(self) -> Expr:
+        data = self.data
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+            raise InvalidEncoding('data is not a binary encoded expr')
+        version = data[len(MAGIC)]
+        if version != VERSION:
+            raise InvalidEncoding('unsupported binary format version {}'.format(version))
+        self.pos = len(MAGIC) + 1
+        try:
+            for _ in range(self.read_varint()):
+                length = self.read_varint()
+                if self.pos + length > len(data):
+                    raise IndexError('string table out of range')
+                self.strings.append(data[self.pos:self.pos + length].decode('utf-8'))
+                self.pos += length
+            expr = self.read_node()
+        except (IndexError, KeyError, UnicodeDecodeError, struct.error, ValueError, OverflowError, InvalidQuery) as err:
+            # truncated data, or operands that the constructors of the exprs reject
+            raise InvalidEncoding('truncated or corrupted binary encoded expr: {}'.format(err))
+        if self.pos != len(data):
+            raise InvalidEncoding('unexpected trailing bytes in binary encoded expr')
+        return expr
+
+    def read_node(self):
+        tag = self.data[self.pos]
+        if tag >= len(self.operator_classes):
+            return self.read_literal()
+        self.pos += 1
+        cls = self.operator_classes[tag]
+        if cls is None:
+            raise InvalidEncoding('unknown tag {:#x}'.format(tag))
+        if issubclass(cls, LogicalExpr):
+            return cls([self.read_node() for _ in range(self.read_varint())])
+        if issubclass(cls, UnaryBooleanExpr):
+            return cls(self.read_node())
+        left = _literal(SchemaLiteral, self.strings[self.read_varint()])
+        if issubclass(cls, FieldCompareListExpr):
+            expr = cls.__new__(cls)
+            expr.left = left
+            expr.right = self.read_list()
+            return expr
+        if issubclass(cls, BinaryBooleanExpr):
+            return cls(left, self.read_literal())
+        raise InvalidEncoding('unknown tag {:#x}'.format(tag))
+
+    def read_list(self):
+        kind = self.data[self.pos]
+        self.pos += 1
+        n = self.read_varint()
+        if kind == LIST_INT:
+            return [_literal(IntLiteral, _unzigzag(self.read_varint())) for _ in range(n)]
+        if kind == LIST_STR:
+            strings = self.strings
+            return [_literal(StringLiteral, strings[self.read_varint()]) for _ in range(n)]
+        if kind == LIST_MIXED:
+            return [self.read_literal() for _ in range(n)]
+        raise InvalidEncoding('unknown list encoding {:#x}'.format(kind))
+
+    def read_literal(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == TAG_STR:
+            return _literal(StringLiteral, self.strings[self.read_varint()])
+        if tag == TAG_SCHEMA:
+            return _literal(SchemaLiteral, self.strings[self.read_varint()])
+        if tag == TAG_INT:
+            return _literal(IntLiteral, _unzigzag(self.read_varint()))
+        if tag == TAG_FLOAT:
+            value, = FLOAT.unpack_from(self.data, self.pos)
+            self.pos += FLOAT.size
+            return _literal(FloatLiteral, value)
+        if tag == TAG_TRUE or tag == TAG_FALSE:
+            return _literal(BooleanLiteral, tag == TAG_TRUE)
+        if tag == TAG_DATETIME:
+            return _literal(DateTimeLiteral, EPOCH + _unzigzag(self.read_varint()) * MICROSECOND)
+        if tag == TAG_DATETIME_TZ:
+            value = EPOCH_TZ + _unzigzag(self.read_varint()) * MICROSECOND
+            offset = timezone(timedelta(seconds=_unzigzag(self.read_varint())))
+            return _literal(DateTimeLiteral, value.astimezone(offset))
+        if tag == TAG_REGEX:
+            return _literal(RegexLiteral, self.strings[self.read_varint()])
+        raise InvalidEncoding('unknown tag {:#x}'.format(tag))
+
+
+def dumps(expr: Expr) -> bytes:
+    return Encoder().encode(expr)
+
+
+def loads(data: bytes) -> Expr:
+    return Decoder(bytes(data)).decode()
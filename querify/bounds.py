@@ -0,0 +1,221 @@
+"""
+Bounds of the values of a field for which a filter can hold, e.g. the time range of a Select.
+"""
+from typing import Optional, List
+
+from .querify import Expr, Not, And_, Or_, FieldCompareValueExpr, EqualValue, NotEqualValue, GreaterThanValue, \
+    GreaterThanOrEqualValue, LessThanValue, LessThanOrEqualValue, In
+
+
+class Interval:
+    """
+    An interval of comparable values, where a lower or upper bound of None means unbounded on that side.
+    """
+
+    def __init__(self, lower=None, upper=None, lower_closed: bool = True, upper_closed: bool = True):
+        self.lower = lower
+        self.upper = upper
+        self.lower_closed = lower_closed if lower is not None else False
+        self.upper_closed = upper_closed if upper is not None else False
+
+    def __eq__(self, other):
+        return isinstance(other, Interval) and \
+            (self.empty and other.empty or
+             (self.lower, self.upper, self.lower_closed, self.upper_closed) ==
+             (other.lower, other.upper, other.lower_closed, other.upper_closed))
+
+    def __hash__(self):
+        return hash(None if self.empty else (self.lower, self.upper, self.lower_closed, self.upper_closed))
+
+    def __repr__(self):
+        return '{}{}, {}{}'.format('[' if self.lower_closed else '(',
+                                   '-inf' if self.lower is None else repr(self.lower),
+                                   '+inf' if self.upper is None else repr(self.upper),
+                                   ']' if self.upper_closed else ')')
+
+    @property
+    def bounded(self) -> bool:
+        return self.lower is not None and self.upper is not None
+
+    @property
+    def empty(self) -> bool:
+        if self.lower is None or self.upper is None:
+            return False
+        return self.lower > self.upper or self.lower == self.upper and not (self.lower_closed and self.upper_closed)
+
+    def __contains__(self, value) -> bool:
+        if self.lower is not None and (value < self.lower or value == self.lower and not self.lower_closed):
+            return False
+        if self.upper is not None and (value > self.upper or value == self.upper and not self.upper_closed):
+            return False
+        return True
+
+    def intersection(self, other: 'Interval') -> 'Interval':
+        lower, lower_closed = _tighter(self.lower, self.lower_closed, other.lower, other.lower_closed, max)
+        upper, upper_closed = _tighter(self.upper, self.upper_closed, other.upper, other.upper_closed, min)
+        return Interval(lower, upper, lower_closed, upper_closed)
+
+    def hull(self, other: 'Interval') -> 'Interval':
+        """
+        The smallest interval containing both intervals.
+        """
+        if self.empty:
+            return other
+        if other.empty:
+            return self
+        lower, lower_closed = _looser(self.lower, self.lower_closed, other.lower, other.lower_closed, min)
+        upper, upper_closed = _looser(self.upper, self.upper_closed, other.upper, other.upper_closed, max)
+        return Interval(lower, upper, lower_closed, upper_closed)
+
+
+def _tighter(a, a_closed, b, b_closed, pick):
+    if a is None:
+        return b, b_closed
+    if b is None:
+        return a, a_closed
+    if a == b:
+        return a, a_closed and b_closed
+    return (a, a_closed) if pick(a, b) == a else (b, b_closed)
+
+
+def _looser(a, a_closed, b, b_closed, pick):
+    if a is None or b is None:
+        return None, False
+    if a == b:
+        return a, a_closed or b_closed
+    return (a, a_closed) if pick(a, b) == a else (b, b_closed)
+
+
+UNBOUNDED = Interval()
+
+COMPARISON_BOUNDS = {
+    GreaterThanValue: lambda v: Interval(lower=v, lower_closed=False),
+    GreaterThanOrEqualValue: lambda v: Interval(lower=v),
+    LessThanValue: lambda v: Interval(upper=v, upper_closed=False),
+    LessThanOrEqualValue: lambda v: Interval(upper=v),
+    EqualValue: lambda v: Interval(v, v),
+}
+
+
+def field_bounds(expr: Optional[Expr], field: str) -> Interval:
+    """
+    Return an interval that contains every value of field for which expr can hold. The interval may be wider than
+    necessary but never narrower: predicates on other fields, negations that cannot be pushed down to a complement and
+    values of incomparable types leave the field unbounded.
+    """
+    if expr is None:
+        return UNBOUNDED
+    if any(isinstance(e, Not) for e in expr.iter_expr()):
+        from .rewrite import push_negations
+        expr = push_negations(expr)
+    try:
+        return _bounds(expr, field)
+    except TypeError:
+        return UNBOUNDED
+
+
+def _bounds(expr, field):
+    if isinstance(expr, And_):
+        interval = UNBOUNDED
+        for e in expr.exprs:
+            interval = interval.intersection(_bounds(e, field))
+            if interval.empty:
+                break
+        return interval
+    if isinstance(expr, Or_):
+        if not expr.exprs:
+            return UNBOUNDED
+        interval = None
+        for e in expr.exprs:
+            bounds = _bounds(e, field)
+            interval = bounds if interval is None else interval.hull(bounds)
+        return interval
+    if isinstance(expr, FieldCompareValueExpr) and expr.left.literal == field:
+        bounds = COMPARISON_BOUNDS.get(type(expr))
+        if bounds is not None:
+            return bounds(expr.right.literal)
+    if isinstance(expr, In) and expr.left.literal == field and expr.right:
+        values = [e.literal for e in expr.right]
+        return Interval(min(values), max(values))
+    return UNBOUNDED
+
+
+def field_intervals(expr: Optional[Expr], field: str) -> List[Interval]:
+    """
+    Like field_bounds, but return a union of sorted, disjoint intervals instead of a single one, so that e.g. the values
+    of an In or the branches of an Or are not widened to the interval between them.
+    """
+    if expr is None:
+        return [UNBOUNDED]
+    if any(isinstance(e, Not) for e in expr.iter_expr()):
+        from .rewrite import push_negations
+        expr = push_negations(expr)
+    try:
+        return _intervals(expr, field)
+    except TypeError:
+        return [UNBOUNDED]
+
+
+def _intervals(expr, field):
+    if isinstance(expr, And_):
+        intervals = [UNBOUNDED]
+        for e in expr.exprs:
+            intervals = _intersect(intervals, _intervals(e, field))
+            if not intervals:
+                break
+        return intervals
+    if isinstance(expr, Or_):
+        if not expr.exprs:
+            return [UNBOUNDED]
+        return _normalize([i for e in expr.exprs for i in _intervals(e, field)])
+    if isinstance(expr, FieldCompareValueExpr) and expr.left.literal == field:
+        if isinstance(expr, NotEqualValue):
+            value = expr.right.literal
+            return [Interval(upper=value, upper_closed=False), Interval(lower=value, lower_closed=False)]
+        bounds = COMPARISON_BOUNDS.get(type(expr))
+        if bounds is not None:
+            return _normalize([bounds(expr.right.literal)])
+    if isinstance(expr, In) and expr.left.literal == field and expr.right:
+        return _normalize([Interval(e.literal, e.literal) for e in expr.right])
+    return [UNBOUNDED]
+
+
+def _normalize(intervals):
+    intervals = sorted((i for i in intervals if not i.empty),
+                       key=lambda i: (i.lower is not None, i.lower, not i.lower_closed))
+    merged = []
+    for interval in intervals:
+        if merged and _overlaps_or_touches(merged[-1], interval):
+            merged[-1] = merged[-1].hull(interval)
+        else:
+            merged.append(interval)
+    return merged
+
+
+def _overlaps_or_touches(a, b):
+    # b does not start before a.
+    if a.upper is None or b.lower is None:
+        return True
+    return b.lower < a.upper or b.lower == a.upper and (a.upper_closed or b.lower_closed)
+
+
+def _ends_before(a, b):
+    if a.upper is None:
+        return False
+    if b.upper is None:
+        return True
+    return a.upper < b.upper or a.upper == b.upper and not a.upper_closed and b.upper_closed
+
+
+def _intersect(a, b):
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        interval = a[i].intersection(b[j])
+        if not interval.empty:
+            result.append(interval)
+        if _ends_before(a[i], b[j]):
+            i += 1
+        else:
+            j += 1
+    return result
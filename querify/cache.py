@@ -0,0 +1,218 @@
+"""
+A local cache of query results keyed by normalized Select statements.
+
+Statements are normalized (see rewrite.normalize) and hashed through their binary encoding, so that filters that only
+differ in the order or nesting of their predicates share an entry. Entries are evicted in least recently used order once
+the cache holds more than max_entries results or more than max_bytes (as estimated by size_of), and expire ttl seconds
+after they were stored.
+A statement without order_by and limit can also be answered from the cached result of a wider statement on the same
+table without limit: if its where clause implies the cached one (see Expr.implies), the cached rows are filtered in
+memory with the "python" dialect, which follows the semantics of SQL for NULL. Rows returned by databases with other
+semantics for null and missing fields (e.g. MongoDB, where {"$ne": 5} matches documents without the field) are stored
+with their semantics and only answer the same statement with the same semantics.
+"""
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from . import instrumentation
+from .projection import residual_columns
+from .querify import Select, And
+from .rewrite import normalize
+
+# The semantics of the "python" dialect, which filters the cached rows of wider statements.
+SQL_SEMANTICS = 'sql'
+
+
+class CacheEntry:
+    def __init__(self, where, rows: list, size: int, expires: Optional[float], semantics: str = SQL_SEMANTICS):
+        self.where = where
+        self.rows = rows
+        self.size = size
+        self.expires = expires
+        self.semantics = semantics
+
+
+def estimate_size(rows: list) -> int:
+    """
+    A rough estimate of the memory held by a list of rows of scalar values, in bytes.
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        values = row.values() if isinstance(row, dict) else row
+        size += sum(sys.getsizeof(v) for v in values)
+    return size
+
+
+class ResultCache:
+    """
+    Results are lists of rows, either mappings from column names to values or sequences of values in the order of the
+    columns of the statement. Answering a statement from a wider one requires the column names of the cached rows, i.e.
+    mappings or a statement with explicit columns, which have to include the columns of the where clause.
+    semantics names how the database that returns the rows treats null and missing fields: SQL_SEMANTICS ("sql", the
+    default) or e.g. "mongo". Only rows of SQL semantics are filtered in memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 supersets: bool = True, size_of: Callable[[list], int] = estimate_size,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.supersets = supersets
+        self.size_of = size_of
+        self.clock = clock
+        self.entries = OrderedDict()  # type: Dict[tuple, CacheEntry]
+        self.sources = {}  # type: Dict[tuple, OrderedDict]
+        self.bytes = 0
+        self.metrics = dict.fromkeys(['hits', 'superset_hits', 'misses', 'evictions', 'expirations'], 0)
+        self.metrics['lookup_time'] = 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def source(select: Select) -> tuple:
+        return tuple(None if e is None else e.literal for e in (select.db, select.retention_policy, select.table))
+
+    def key(self, select: Select, where=None, semantics: str = SQL_SEMANTICS):
+        """
+        The hash of the normalized statement. where is the normalized where clause, if already known.
+        """
+        if where is None:
+            where = normalize(select.where) if select.where is not None else And([])
+        digest = hashlib.sha1(where.to_bytes()).hexdigest()
+        columns = None if not select.columns else tuple(c.literal for c in select.columns)
+        order_by = None if not select.order_by else tuple((o.field.literal, o.descending) for o in select.order_by)
+        return self.source(select), columns, digest, order_by, select.limit, semantics
+
+    def get(self, select: Select, semantics: str = SQL_SEMANTICS) -> Optional[list]:
+        """
+        Return the rows of select from the cache, or None if they are not cached.
+        """
+        start = time.perf_counter()
+        where = normalize(select.where) if select.where is not None else And([])
+        key = self.key(select, where, semantics)
+        entry = self._entry(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self._record('hits', start)
+            return list(entry.rows)
+        if self.supersets and not select.order_by and select.limit is None and semantics == SQL_SEMANTICS:
+            rows = self._from_superset(select, where)
+            if rows is not None:
+                self._record('superset_hits', start)
+                return rows
+        self._record('misses', start)
+        return None
+
+    def put(self, select: Select, rows: List, semantics: str = SQL_SEMANTICS):
+        """
+        Store the rows of select, evicting the least recently used entries as needed.
+        """
+        where = normalize(select.where) if select.where is not None else And([])
+        key = self.key(select, where, semantics)
+        self._remove(key)
+        size = self.size_of(rows)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        self.entries[key] = CacheEntry(where, list(rows), size, expires, semantics)
+        self.sources.setdefault(key[0], OrderedDict())[key] = None
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.max_bytes is not None and self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.metrics['evictions'] += 1
+
+    def get_or_execute(self, select: Select, execute: Callable[[Select], List], semantics: str = SQL_SEMANTICS) -> list:
+        """
+        Return the rows of select from the cache, or execute it and cache the rows.
+        """
+        rows = self.get(select, semantics)
+        if rows is None:
+            rows = execute(select)
+            self.put(select, rows, semantics)
+        return rows
+
+    def clear(self):
+        self.entries.clear()
+        self.sources.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        The counts of hits (exact and from supersets), misses, evictions and expirations, the hit rate and the mean
+        latency of lookups in seconds.
+        """
+        stats = dict(self.metrics)
+        lookups = stats['hits'] + stats['superset_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['superset_hits']) / lookups if lookups else 0.0
+        stats['mean_lookup_time'] = stats['lookup_time'] / lookups if lookups else 0.0
+        stats['entries'] = len(self.entries)
+        stats['bytes'] = self.bytes
+        return stats
+
+    def _entry(self, key) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires is not None and entry.expires <= self.clock():
+            self._remove(key)
+            self.metrics['expirations'] += 1
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        keys = self.sources[key[0]]
+        del keys[key]
+        if not keys:
+            del self.sources[key[0]]
+
+    def _from_superset(self, select: Select, where) -> Optional[list]:
+        columns = None if not select.columns else [c.literal for c in select.columns]
+        fields = residual_columns(where)
+        for key in list(self.sources.get(self.source(select), ())):
+            entry = self._entry(key)
+            # the rows of a limited statement are not all the rows matching its filter, and rows of other semantics than
+            # those of the "python" dialect cannot be filtered in memory
+            if entry is None or key[4] is not None or entry.semantics != SQL_SEMANTICS:
+                continue
+            cached_columns = key[1]
+            mappings = not entry.rows or isinstance(entry.rows[0], dict)
+            if cached_columns is None:
+                # the column names of the rows of "SELECT *" are only known from mappings
+                if not mappings:
+                    continue
+            elif columns is None or not set(columns).issubset(cached_columns) or \
+                    not set(fields).issubset(cached_columns):
+                continue
+            if not where.implies(entry.where):
+                continue
+            self.entries.move_to_end(key)
+            predicate = where.to_query('python', columns=None if mappings else cached_columns)
+            rows = [row for row in entry.rows if predicate(row)]
+            if columns is not None and list(cached_columns or ()) != columns:
+                rows = _project(rows, cached_columns, columns)
+            return rows
+        return None
+
+    def _record(self, name, start):
+        elapsed = time.perf_counter() - start
+        self.metrics[name] += 1
+        self.metrics['lookup_time'] += elapsed
+        if instrumentation.enabled:
+            instrumentation.record_cache('result', name != 'misses')
+
+
+def _project(rows, columns, projected):
+    if not rows:
+        return rows
+    if isinstance(rows[0], dict):
+        return [{c: row.get(c) for c in projected} for row in rows]
+    indexes = [columns.index(c) for c in projected]
+    return [tuple(row[i] for i in indexes) for row in rows]
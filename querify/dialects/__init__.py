@@ -0,0 +1,111 @@
+"""
+Dialect compilers.
+
+Each dialect is a subclass of Dialect registered under a name, e.g. "mysql". Rendering a query in a dialect is done by
+Dialect.compile, which looks up the emitter "emit_<ClassName>" of the node class along its MRO once per node class and
+caches it in the emitter table of the dialect class, so adding a dialect or optimizing one never touches the Expr
+classes. Emitters of composite nodes render their literals inline rather than through Dialect.compile, and dispatch
+their sub exprs through the emitter table, self.emitters[type(node)](self, node). Built-in dialects are registered by
+module path and only imported when they are first used.
+"""
+import importlib
+from typing import Union, Optional
+
+from .. import instrumentation
+
+from ..visitor import DispatchMeta
+
+
+class OperatorTable(dict):
+    """
+    The operators of a dialect per expr class (None if unsupported), resolved along the MRO of the expr class on its
+    first lookup.
+    """
+
+    def __init__(self, dialect):
+        super().__init__()
+        self.dialect = dialect
+
+    def __missing__(self, expr_cls):
+        operators = self.dialect.operators
+        operator = self[expr_cls] = next((operators[klass] for klass in expr_cls.__mro__ if klass in operators), None)
+        return operator
+
+
+class DialectMeta(DispatchMeta):
+    def __init__(cls, what, bases=None, dict=None):
+        super().__init__(what, bases, dict)
+        cls.operator_table = OperatorTable(cls)
+        cls.emitters = cls.dispatch_table
+
+
+class Dialect(metaclass=DialectMeta):
+    """
+    A Dialect instance renders one query. Options passed to Query.to_query are passed to the constructor, and
+    subclasses may keep per-rendering state (e.g. bound parameters) on the instance.
+    Operator tables map expr classes (or the marker classes they inherit, e.g. Equal) to operators of the dialect and
+    are resolved along the MRO of the expr class as well.
+    """
+
+    dispatch_prefix = 'emit_'
+    dispatch_fallback = 'emit_unsupported'
+    dispatch_stats_name = 'dialect.dispatch'
+
+    name = None
+    title = None
+    operators = {}
+
+    def __init__(self, **options):
+        if options:
+            raise TypeError('unexpected options for dialect "{}": {}'.format(self.name, ', '.join(sorted(options))))
+        if instrumentation.enabled:
+            self.compile = self.compile_instrumented
+
+    def render(self, query):
+        return self.compile(query)
+
+    def compile(self, node):
+        return self.emitters[type(node)](self, node)
+
+    def compile_instrumented(self, node):
+        return type(self).dispatch(type(node))(self, node)
+
+    def emit_unsupported(self, node):
+        raise NotImplementedError('generating {} from {!r} is not implemented'.format(self.title, node))
+
+    def operator(self, expr) -> str:
+        operator = self.operator_table[type(expr)]
+        if operator is None:
+            raise NotImplementedError('generating {} from operator "{}" is not implemented'
+                                      .format(self.title, expr.key))
+        return operator
+
+
+DIALECTS = {
+    'json': 'querify.dialects.json:JsonDialect',
+    'influx': 'querify.dialects.influx:InfluxDialect',
+    'mysql': 'querify.dialects.mysql:MySQLDialect',
+    'postgres': 'querify.dialects.postgres:PostgresDialect',
+    'sqlite': 'querify.dialects.sqlite:SQLiteDialect',
+    'mongo': 'querify.dialects.mongo:MongoDialect',
+    'elasticsearch': 'querify.dialects.elasticsearch:ElasticsearchDialect',
+    'pandas': 'querify.dialects.pandas:PandasDialect',
+    'arrow': 'querify.dialects.arrow:ArrowDialect',
+    'python': 'querify.dialects.python:PythonDialect',
+    'pluto': 'querify.dialects.pluto:PlutoDialect',
+}
+
+
+def register_dialect(name: str, dialect: Union[type, str]):
+    """
+    Register a dialect class under name, either directly or as a "module:ClassName" path to be imported on first use.
+    """
+    DIALECTS[name] = dialect
+
+
+def get_dialect(name: str) -> Optional[type]:
+    dialect = DIALECTS.get(name)
+    if isinstance(dialect, str):
+        module_name, cls_name = dialect.split(':')
+        dialect = DIALECTS[name] = getattr(importlib.import_module(module_name), cls_name)
+    return dialect
@@ -0,0 +1,77 @@
+import operator
+from functools import reduce
+
+try:
+    import pyarrow.compute as pc
+except ImportError:
+    pc = None
+
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, Not, And_, Or_
+
+
+class ArrowDialect(Dialect):
+    """
+    pyarrow.compute.Expression, e.g. for pyarrow.dataset.Dataset.to_table(filter=...), so that filters are pushed
+    down into dataset scans (partition and row group statistics pruning) instead of being applied after loading.
+    Regexes are matched by match_substring_regex, i.e. unanchored like re.search.
+    Requires pyarrow.
+    """
+
+    name = 'arrow'
+    title = 'pyarrow compute expression'
+    operators = {
+        Equal: operator.eq,
+        NotEqual: operator.ne,
+        GreaterThan: operator.gt,
+        GreaterThanOrEqual: operator.ge,
+        LessThan: operator.lt,
+        LessThanOrEqual: operator.le,
+        And_: operator.and_,
+        Or_: operator.or_,
+    }
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        if pc is None:
+            raise ImportError('generating {} requires pyarrow to be installed'.format(self.title))
+
+    def emit_LiteralExpr(self, expr):
+        return expr.literal
+
+    def emit_SchemaLiteral(self, expr):
+        return pc.field(expr.literal)
+
+    def emit_Not(self, expr):
+        # Comparisons are null for null values like in SQL, so negations are complemented like in SQL as well, which
+        # keeps NOT (a IN (...)) from holding for a null a.
+        negated = expr.negation()
+        if isinstance(negated, Not):
+            return ~self.compile(negated.operand)
+        return self.compile(negated)
+
+    def emit_BinaryComparisonExpr(self, expr):
+        return self.operator(expr)(self.compile(expr.left), self.compile(expr.right))
+
+    def emit_MatchRegex(self, expr):
+        return pc.match_substring_regex(self.compile(expr.left), pattern=expr.right.literal)
+
+    def emit_InverseMatchRegex(self, expr):
+        return ~pc.match_substring_regex(self.compile(expr.left), pattern=expr.right.literal)
+
+    def emit_FieldAssertionExpr(self, expr):
+        is_null = self.compile(expr.left).is_null()
+        return is_null if expr.right.literal else ~is_null
+
+    def emit_In(self, expr):
+        return self.compile(expr.left).isin([e.literal for e in expr.right])
+
+    def emit_NotIn(self, expr):
+        # isin is false rather than null for null values, so they have to be excluded explicitly as in SQL
+        field = self.compile(expr.left)
+        return ~field.isin([e.literal for e in expr.right]) & field.is_valid()
+
+    def emit_LogicalExpr(self, expr):
+        if not expr.exprs:
+            return pc.scalar(isinstance(expr, And_))
+        return reduce(self.operator(expr), (self.compile(e) for e in expr.exprs))
@@ -0,0 +1,208 @@
+from . import Dialect
+from ..querify import GreaterThanValue, GreaterThanOrEqualValue, LessThanValue, LessThanOrEqualValue
+
+
+LOWER_BOUNDS = {'gt', 'gte'}
+UPPER_BOUNDS = {'lt', 'lte'}
+# characters that are only special in Lucene regular expressions (with all optional operators, the default of the
+# regexp query), and that have to be escaped where they stand for themselves
+LUCENE_SPECIAL = set('#@&<>~"')
+QUANTIFIERS = set('*+?}')
+
+
+class ElasticsearchDialect(Dialect):
+    """
+    Elasticsearch query DSL. The whole query is rendered in filter context (bool.filter / must_not), so no scores are
+    computed and Elasticsearch can cache the clauses. Comparisons on the same field in a conjunction are merged into a
+    single range clause.
+    Regular expressions are translated to the Lucene syntax used by the regexp query, which always matches the whole
+    term, by turning missing ^ / $ anchors of every top level alternative into ".*". Patterns using constructs
+    that Lucene lacks (anchors within the pattern, character class escapes such as \\d, flags and lookarounds) raise
+    NotImplementedError. Null and Missing are both rendered as exists, since Elasticsearch
+    does not index nulls.
+    """
+
+    name = 'elasticsearch'
+    title = 'Elasticsearch query'
+    operators = {
+        GreaterThanValue: 'gt',
+        GreaterThanOrEqualValue: 'gte',
+        LessThanValue: 'lt',
+        LessThanOrEqualValue: 'lte',
+    }
+
+    def render(self, query):
+        clause = self.compile(query)
+        if self.is_filter(clause):
+            return clause
+        return {'bool': {'filter': [clause]}}
+
+    @staticmethod
+    def is_filter(clause) -> bool:
+        bool_ = clause.get('bool')
+        return bool_ is not None and bool_.keys() <= {'filter', 'must_not'}
+
+    def emit_LiteralExpr(self, expr):
+        return expr.literal
+
+    def emit_DateTimeLiteral(self, expr):
+        return expr.literal.isoformat()
+
+    def emit_SchemaLiteral(self, expr):
+        return expr.literal
+
+    def emit_Not(self, expr):
+        return {'bool': {'must_not': [self.compile(expr.operand)]}}
+
+    def emit_EqualValue(self, expr):
+        return {'term': {self.compile(expr.left): self.compile(expr.right)}}
+
+    def emit_NotEqualValue(self, expr):
+        return {'bool': {'must_not': [{'term': {self.compile(expr.left): self.compile(expr.right)}}]}}
+
+    def emit_FieldCompareValueExpr(self, expr):
+        return {'range': {self.compile(expr.left): {self.operator(expr): self.compile(expr.right)}}}
+
+    def emit_MatchRegex(self, expr):
+        return {'regexp': {self.compile(expr.left): self.regexp(expr.right.literal)}}
+
+    def emit_InverseMatchRegex(self, expr):
+        return {'bool': {'must_not': [{'regexp': {self.compile(expr.left): self.regexp(expr.right.literal)}}]}}
+
+    def emit_FieldAssertionExpr(self, expr):
+        exists = {'exists': {'field': self.compile(expr.left)}}
+        if expr.right.literal:
+            return {'bool': {'must_not': [exists]}}
+        return exists
+
+    def emit_In(self, expr):
+        return {'terms': {self.compile(expr.left): [self.compile(e) for e in expr.right]}}
+
+    def emit_NotIn(self, expr):
+        return {'bool': {'must_not': [{'terms': {self.compile(expr.left): [self.compile(e) for e in expr.right]}}]}}
+
+    def emit_And_(self, expr):
+        if not expr.exprs:
+            return {'match_all': {}}
+        filter_ = []
+        must_not = []
+        ranges = {}
+        for e in expr.exprs:
+            clause = self.compile(e)
+            if self.is_filter(clause):
+                filter_.extend(clause['bool'].get('filter', ()))
+                must_not.extend(clause['bool'].get('must_not', ()))
+                continue
+            if 'range' in clause:
+                (field, bounds), = clause['range'].items()
+                merged = ranges.get(field)
+                if merged is not None and self.can_merge(merged, bounds):
+                    merged.update(bounds)
+                    continue
+                ranges[field] = bounds
+            filter_.append(clause)
+        bool_ = {}
+        if filter_:
+            bool_['filter'] = filter_
+        if must_not:
+            bool_['must_not'] = must_not
+        return {'bool': bool_}
+
+    def emit_Or_(self, expr):
+        if not expr.exprs:
+            return {'match_none': {}}
+        return {'bool': {'should': [self.compile(e) for e in expr.exprs], 'minimum_should_match': 1}}
+
+    @staticmethod
+    def can_merge(bounds, other) -> bool:
+        keys = bounds.keys() | other.keys()
+        return len(keys & LOWER_BOUNDS) <= 1 and len(keys & UPPER_BOUNDS) <= 1
+
+    @classmethod
+    def regexp(cls, pattern: str) -> str:
+        tokens = cls.regex_tokens(pattern)
+        alternatives = [[]]
+        depth = 0
+        for token in tokens:
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                depth -= 1
+            elif token == '|' and depth == 0:
+                alternatives.append([])
+                continue
+            alternatives[-1].append(token)
+        alternatives = [cls.regexp_alternative(pattern, tokens) for tokens in alternatives]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '|'.join('(' + alternative + ')' for alternative in alternatives)
+
+    @classmethod
+    def regexp_alternative(cls, pattern: str, tokens: list) -> str:
+        head = tail = '.*'
+        if tokens and tokens[0] == '^':
+            head = ''
+            tokens = tokens[1:]
+        if tokens and tokens[-1] == '$':
+            tail = ''
+            tokens = tokens[:-1]
+        body = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in ('^', '$') or len(token) == 2 and token[1].isalnum():
+                cls.unsupported_regex(pattern)
+            if token == '(' and i + 1 < len(tokens) and tokens[i + 1] == '?':
+                # only non capturing groups, which are plain groups in Lucene
+                if i + 2 >= len(tokens) or tokens[i + 2] != ':':
+                    cls.unsupported_regex(pattern)
+                i += 2
+            elif token == '?' and i > 0 and tokens[i - 1] in QUANTIFIERS and \
+                    (i < 2 or tokens[i - 2] not in QUANTIFIERS):
+                # a lazy quantifier matches the same strings as the greedy one
+                i += 1
+                continue
+            body.append('\\' + token if token in LUCENE_SPECIAL else token)
+            i += 1
+        body = ''.join(body)
+        if not body and head and tail:
+            return '.*'
+        return head + body + tail
+
+    @classmethod
+    def regex_tokens(cls, pattern: str) -> list:
+        """
+        Split a regular expression into characters, escapes and character classes.
+        """
+        tokens = []
+        i = 0
+        while i < len(pattern):
+            if pattern[i] == '\\':
+                token = pattern[i:i + 2]
+            elif pattern[i] == '[':
+                end = i + 1
+                if pattern[end:end + 1] == '^':
+                    end += 1
+                if pattern[end:end + 1] == ']':
+                    end += 1
+                while end < len(pattern) and pattern[end] != ']':
+                    if pattern[end] == '\\':
+                        if pattern[end + 1:end + 2].isalnum():
+                            cls.unsupported_regex(pattern)
+                        end += 1
+                    end += 1
+                if end >= len(pattern):
+                    cls.unsupported_regex(pattern)
+                token = pattern[i:end + 1]
+            else:
+                token = pattern[i]
+            if token == '\\':
+                # a trailing backslash
+                cls.unsupported_regex(pattern)
+            tokens.append(token)
+            i += len(token)
+        return tokens
+
+    @classmethod
+    def unsupported_regex(cls, pattern: str):
+        raise NotImplementedError('generating {} from regex {!r} is not implemented'.format(cls.title, pattern))
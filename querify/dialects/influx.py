@@ -0,0 +1,127 @@
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, MatchRegex, \
+    InverseMatchRegex, Not, And_, Or_
+
+
+class InfluxDialect(Dialect):
+    name = 'influx'
+    title = 'InfluxQL'
+    operators = {
+        Equal: '=',
+        NotEqual: '!=',
+        GreaterThan: '>',
+        GreaterThanOrEqual: '>=',
+        LessThan: '<',
+        LessThanOrEqual: '<=',
+        MatchRegex: '=~',
+        InverseMatchRegex: '!~',
+        And_: 'AND',
+        Or_: 'OR',
+    }
+
+    def emit_StringLiteral(self, expr):
+        return "'{}'".format(expr.literal)
+
+    def emit_BooleanLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_IntLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_FloatLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_DateTimeLiteral(self, expr):
+        return "'{:%Y-%m-%dT%H:%M:%SZ}'".format(expr.literal)
+
+    def emit_RegexLiteral(self, expr):
+        return '/{}/'.format(expr.literal)
+
+    def emit_SchemaLiteral(self, expr):
+        return '"{}"'.format(expr.literal)
+
+    def emit_Not(self, expr):
+        # InfluxQL has no NOT, so negations have to be pushed down to predicates with a complement.
+        negated = expr.negation()
+        if isinstance(negated, Not):
+            return self.emit_unsupported(negated)
+        return self.compile(negated)
+
+    def emit_BinaryComparisonExpr(self, expr):
+        right = expr.right
+        return '"{}" {} {}'.format(expr.left.literal, self.operator(expr), self.emitters[type(right)](self, right))
+
+    def emit_FieldCompareListExpr(self, expr):
+        return self.compile(expr.equivalent_fallback_expr())
+
+    def emit_LogicalExpr(self, expr):
+        emitters = self.emitters
+        return ' {} '.format(self.operator(expr)).join(['(' + emitters[type(e)](self, e) + ')' for e in expr.exprs])
+
+    def emit_Select(self, stmt):
+        if stmt.columns:
+            ql_select = 'SELECT ' + ','.join(self.compile(c) for c in stmt.columns)
+        else:
+            ql_select = 'SELECT *'
+
+        if stmt.db:
+            if stmt.retention_policy:
+                ql_db = self.compile(stmt.db) + '.' + self.compile(stmt.retention_policy) + '.' + \
+                        self.compile(stmt.table)
+            else:
+                ql_db = self.compile(stmt.db) + '..' + self.compile(stmt.table)
+        elif stmt.retention_policy:
+            ql_db = self.compile(stmt.retention_policy) + '.' + self.compile(stmt.table)
+        else:
+            ql_db = self.compile(stmt.table)
+        ql_from = ' FROM ' + ql_db
+
+        return ql_select + ql_from + self.where_clause(stmt.where) + self.order_by_clause(stmt) + \
+            self.limit_clause(stmt)
+
+    def emit_ShowTagKeys(self, stmt):
+        if stmt.db:
+            ql_on = ' ON ' + self.compile(stmt.db)
+        else:
+            ql_on = ''
+
+        if stmt.measurement:
+            if stmt.retention_policy:
+                ql_from = ' FROM ' + self.compile(stmt.retention_policy) + '.' + self.compile(stmt.measurement)
+            else:
+                ql_from = ' FROM ' + self.compile(stmt.measurement)
+        else:
+            ql_from = ''
+
+        return 'SHOW TAG KEYS' + ql_on + ql_from + self.where_clause(stmt.where)
+
+    def emit_ShowColumns(self, stmt):
+        if stmt.db:
+            ql_on = ' ON ' + self.compile(stmt.db)
+        else:
+            ql_on = ''
+
+        ql_from = ' FROM ' + self.compile(stmt.table)
+
+        return 'SHOW TAG KEYS' + ql_on + ql_from
+
+    def where_clause(self, where):
+        if where:
+            ql_where = self.compile(where)
+            if ql_where:
+                return ' WHERE ' + ql_where
+        return ''
+
+    def order_by_clause(self, stmt):
+        # InfluxQL can only order by time.
+        if not stmt.order_by:
+            return ''
+        if len(stmt.order_by) > 1 or stmt.order_by[0].field.literal != 'time':
+            raise NotImplementedError('generating {} ordered by {!r} is not supported, only by time'
+                                      .format(self.title, stmt.order_by))
+        return ' ORDER BY time DESC' if stmt.order_by[0].descending else ' ORDER BY time ASC'
+
+    def limit_clause(self, stmt):
+        if stmt.limit is None:
+            return ''
+        return ' LIMIT {:d}'.format(stmt.limit)
@@ -0,0 +1,23 @@
+from . import Dialect
+
+
+class JsonDialect(Dialect):
+    name = 'json'
+    title = 'json'
+
+    def emit_LiteralExpr(self, expr):
+        return expr.literal
+
+    def emit_UnaryBooleanExpr(self, expr):
+        operand = expr.operand
+        return {expr.key: self.emitters[type(operand)](self, operand)}
+
+    def emit_BinaryComparisonExpr(self, expr):
+        return {expr.left.literal: {expr.key: expr.right.literal}}
+
+    def emit_FieldCompareListExpr(self, expr):
+        return {expr.left.literal: {expr.key: [e.literal for e in expr.right]}}
+
+    def emit_LogicalExpr(self, expr):
+        emitters = self.emitters
+        return {expr.key: [emitters[type(e)](self, e) for e in expr.exprs]}
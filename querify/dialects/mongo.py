@@ -0,0 +1,128 @@
+import re
+
+from . import Dialect
+from ..querify import EqualValue, NotEqualValue, GreaterThanValue, GreaterThanOrEqualValue, LessThanValue, \
+    LessThanOrEqualValue, In, NotIn, Not, And_, Or_
+from ..rewrite import MISSING_SAFE_COMPLEMENTS
+
+
+REGEX_FORMATS = ('compiled', 'document')
+REGEX_OPTIONS = [(re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x')]
+
+
+class MongoDialect(Dialect):
+    """
+    MongoDB query documents. Regexes are rendered as compiled patterns (from the shared regex cache) by default, or with
+    the option regex="document" as {"$regex": pattern, "$options": options}, which keeps the query json serializable
+    and cheap to hash.
+    """
+
+    name = 'mongo'
+    title = 'MongoDB query'
+    operators = {
+        EqualValue: '$eq',
+        NotEqualValue: '$ne',
+        GreaterThanValue: '$gt',
+        GreaterThanOrEqualValue: '$gte',
+        LessThanValue: '$lt',
+        LessThanOrEqualValue: '$lte',
+        In: '$in',
+        NotIn: '$nin',
+        Not: '$not',
+        And_: '$and',
+        Or_: '$or',
+    }
+
+    def __init__(self, regex: str = 'compiled', **options):
+        super().__init__(**options)
+        if regex not in REGEX_FORMATS:
+            raise ValueError('regex must be one of {}, got {!r}'.format(', '.join(REGEX_FORMATS), regex))
+        self.regex_document = regex == 'document'
+
+    def emit_StringLiteral(self, expr):
+        return expr.literal
+
+    def emit_BooleanLiteral(self, expr):
+        return expr.literal
+
+    def emit_IntLiteral(self, expr):
+        return expr.literal
+
+    def emit_FloatLiteral(self, expr):
+        return expr.literal
+
+    def emit_DateTimeLiteral(self, expr):
+        return expr.literal
+
+    def emit_RegexLiteral(self, expr):
+        compiled = expr.compiled
+        if not self.regex_document:
+            return compiled
+        document = {'$regex': expr.literal}
+        options = ''.join(option for flag, option in REGEX_OPTIONS if compiled.flags & flag)
+        if options:
+            document['$options'] = options
+        return document
+
+    def emit_SchemaLiteral(self, expr):
+        return expr.literal
+
+    def emit_Not(self, expr):
+        # $not only applies to operator expressions of a single field, so negations of $and / $or are pushed down by
+        # De Morgan's laws. Order comparisons keep $not, which unlike their complements matches missing fields.
+        negated = expr.negation(MISSING_SAFE_COMPLEMENTS)
+        if isinstance(negated, Not):
+            k, v = next(iter(self.compile(negated.operand).items()))
+            return {k: {self.operator(expr): v}}
+        return self.compile(negated)
+
+    def emit_BinaryComparisonExpr(self, expr):
+        # values are rendered as they are (see the literal emitters above)
+        return {expr.left.literal: {self.operator(expr): expr.right.literal}}
+
+    def emit_MatchRegex(self, expr):
+        return {expr.left.literal: self.emit_RegexLiteral(expr.right)}
+
+    def emit_InverseMatchRegex(self, expr):
+        return {expr.left.literal: {'$not': self.emit_RegexLiteral(expr.right)}}
+
+    def emit_Null(self, expr):
+        return {expr.left.literal: {'$eq' if expr.right.literal else '$ne': None}}
+
+    def emit_Missing(self, expr):
+        return {expr.left.literal: {'$exists': not expr.right.literal}}
+
+    def emit_FieldCompareListExpr(self, expr):
+        return {expr.left.literal: {self.operator(expr): [e.literal for e in expr.right]}}
+
+    def emit_LogicalExpr(self, expr):
+        emitters = self.emitters
+        return {self.operator(expr): [emitters[type(e)](self, e) for e in expr.exprs]}
+
+    def emit_Select(self, stmt):
+        # The keyword arguments of Collection.find of pymongo, the collection itself is up to the caller.
+        where = stmt.where
+        find = {'filter': {} if not where or isinstance(where, And_) and not where.exprs else self.compile(where)}
+        if stmt.columns:
+            projection = {c.literal: 1 for c in stmt.columns}
+            # _id is returned unless excluded explicitly.
+            projection.setdefault('_id', 0)
+            find['projection'] = projection
+        if stmt.order_by:
+            find['sort'] = [(o.field.literal, -1 if o.descending else 1) for o in stmt.order_by]
+        if stmt.limit is not None:
+            find['limit'] = stmt.limit
+        return find
+
+    def emit_BatchSelect(self, stmt):
+        # An aggregation pipeline whose only output document holds the matching documents of every filter in a $facet
+        # of its own, which is subject to the maximum document size.
+        pipeline = [{'$match': self.compile(stmt.where)}] if stmt.where else []
+        facets = {}
+        for select, where, label in zip(stmt.selects, stmt.filters, stmt.labels):
+            facet = [{'$match': self.compile(where) if where else {}}]
+            if select.columns:
+                facet.append({'$project': self.emit_Select(select)['projection']})
+            facets[label] = facet
+        pipeline.append({'$facet': facets})
+        return pipeline
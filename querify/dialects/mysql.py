@@ -0,0 +1,115 @@
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, MatchRegex, \
+    InverseMatchRegex, In, NotIn, Not, And_, Or_
+
+
+class MySQLDialect(Dialect):
+    name = 'mysql'
+    title = 'MySQL'
+    operators = {
+        Equal: '=',
+        NotEqual: '<>',
+        GreaterThan: '>',
+        GreaterThanOrEqual: '>=',
+        LessThan: '<',
+        LessThanOrEqual: '<=',
+        MatchRegex: 'REGEXP',
+        InverseMatchRegex: 'NOT REGEXP',
+        In: 'IN',
+        NotIn: 'NOT IN',
+        Not: 'NOT',
+        And_: 'AND',
+        Or_: 'OR',
+    }
+
+    def emit_StringLiteral(self, expr):
+        return "'{}'".format(expr.literal)
+
+    def emit_BooleanLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_IntLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_FloatLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_DateTimeLiteral(self, expr):
+        return "'{:%Y-%m-%d %H:%M:%S}'".format(expr.literal)
+
+    def emit_RegexLiteral(self, expr):
+        return "'{}'".format(expr.literal)
+
+    def emit_SchemaLiteral(self, expr):
+        return expr.literal
+
+    def emit_Not(self, expr):
+        # NOT (...) usually prevents index use, so the negation is pushed down to the predicates and complemented.
+        negated = expr.negation()
+        if isinstance(negated, Not):
+            return '{} ({})'.format(self.operator(expr), self.compile(negated.operand))
+        return self.compile(negated)
+
+    def emit_BinaryComparisonExpr(self, expr):
+        right = expr.right
+        return '{} {} {}'.format(expr.left.literal, self.operator(expr), self.emitters[type(right)](self, right))
+
+    def emit_Null(self, expr):
+        return '{} {}'.format(expr.left.literal, 'is NULL' if expr.right.literal else 'is NOT NULL')
+
+    def emit_FieldCompareListExpr(self, expr):
+        emitters = self.emitters
+        return '{} {} ({})'.format(expr.left.literal, self.operator(expr),
+                                   ', '.join([emitters[type(e)](self, e) for e in expr.right]))
+
+    def emit_LogicalExpr(self, expr):
+        emitters = self.emitters
+        return ' {} '.format(self.operator(expr)).join(['(' + emitters[type(e)](self, e) + ')' for e in expr.exprs])
+
+    def emit_Select(self, stmt):
+        if stmt.columns:
+            ql_select = 'SELECT ' + ','.join(self.compile(c) for c in stmt.columns)
+        else:
+            ql_select = 'SELECT *'
+
+        if stmt.db:
+            ql_db = self.compile(stmt.db) + '.' + self.compile(stmt.table)
+        else:
+            ql_db = self.compile(stmt.table)
+        ql_from = ' FROM ' + ql_db
+
+        return ql_select + ql_from + self.where_clause(stmt.where) + self.order_by_clause(stmt) + \
+            self.limit_clause(stmt)
+
+    def emit_BatchSelect(self, stmt):
+        table = self.compile(stmt.db) + '.' + self.compile(stmt.table) if stmt.db else self.compile(stmt.table)
+        columns = [self.compile(c) for c in stmt.columns] if stmt.columns else [table + '.*']
+        columns += ['({}) AS {}'.format(self.compile(f) or 'TRUE', label)
+                    for f, label in zip(stmt.filters, stmt.labels)]
+        return 'SELECT ' + ','.join(columns) + ' FROM ' + table + self.where_clause(stmt.where)
+
+    def emit_ShowColumns(self, stmt):
+        if stmt.db:
+            ql_from = ' FROM ' + self.compile(stmt.db) + '.' + self.compile(stmt.table)
+        else:
+            ql_from = ' FROM ' + self.compile(stmt.table)
+
+        return 'SHOW COLUMNS' + ql_from
+
+    def where_clause(self, where):
+        if where:
+            ql_where = self.compile(where)
+            if ql_where:
+                return ' WHERE ' + ql_where
+        return ''
+
+    def order_by_clause(self, stmt):
+        if not stmt.order_by:
+            return ''
+        return ' ORDER BY ' + ', '.join(self.compile(o.field) + (' DESC' if o.descending else '')
+                                        for o in stmt.order_by)
+
+    def limit_clause(self, stmt):
+        if stmt.limit is None:
+            return ''
+        return ' LIMIT {:d}'.format(stmt.limit)
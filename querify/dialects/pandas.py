@@ -0,0 +1,102 @@
+import keyword
+
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, In, NotIn, Not, \
+    And_, Or_
+
+
+ENGINES = ('python', 'numexpr')
+
+
+class PandasDialect(Dialect):
+    """
+    Expressions for DataFrame.query.
+
+    With the option engine="numexpr", only constructs that the numexpr engine of DataFrame.query can compile are
+    generated, and rendering returns a tuple of the expression and the dict of local variables it refers to, to be
+    passed as DataFrame.query(expression, local_dict=local_dict). Null tests become "col != col" (NaN is not equal to
+    itself), In / NotIn become "col in @_v0" with the list bound as a local variable, and datetimes are bound as local
+    variables as well. Filters that cannot be compiled by numexpr (regexes) raise NotImplementedError.
+    """
+
+    name = 'pandas'
+    title = 'pandas query'
+    operators = {
+        Equal: '==',
+        NotEqual: '!=',
+        GreaterThan: '>',
+        GreaterThanOrEqual: '>=',
+        LessThan: '<',
+        LessThanOrEqual: '<=',
+        In: 'in',
+        NotIn: 'not in',
+        Not: '~',
+        And_: '&',
+        Or_: '|',
+    }
+
+    def __init__(self, engine: str = 'python', **options):
+        super().__init__(**options)
+        if engine not in ENGINES:
+            raise ValueError('engine must be one of {}, got {!r}'.format(', '.join(ENGINES), engine))
+        self.numexpr = engine == 'numexpr'
+        if self.numexpr:
+            self.title = 'numexpr compatible pandas query'
+        self.local_dict = {}
+
+    def render(self, query):
+        if not self.numexpr:
+            return self.compile(query)
+        self.local_dict = {}
+        return self.compile(query), self.local_dict
+
+    def bind(self, value) -> str:
+        name = '_v{}'.format(len(self.local_dict))
+        self.local_dict[name] = value
+        return '@' + name
+
+    def emit_StringLiteral(self, expr):
+        if self.numexpr:
+            return repr(expr.literal)
+        return "'{}'".format(expr.literal)
+
+    def emit_BooleanLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_IntLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_FloatLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_DateTimeLiteral(self, expr):
+        if self.numexpr:
+            return self.bind(expr.literal)
+        return self.emit_unsupported(expr)
+
+    def emit_SchemaLiteral(self, expr):
+        if self.numexpr and (not expr.literal.isidentifier() or keyword.iskeyword(expr.literal)):
+            return '`{}`'.format(expr.literal)
+        return expr.literal
+
+    def emit_Not(self, expr):
+        return '{}({})'.format(self.operator(expr), self.compile(expr.operand))
+
+    def emit_BinaryComparisonExpr(self, expr):
+        operator = self.operator(expr)
+        return '{} {} {}'.format(self.compile(expr.left), operator, self.compile(expr.right))
+
+    def emit_Null(self, expr):
+        if self.numexpr:
+            field = self.compile(expr.left)
+            return '{} {} {}'.format(field, '!=' if expr.right.literal else '==', field)
+        return '{}pandas.isnull({})'.format('' if expr.right.literal else '~', self.compile(expr.left))
+
+    def emit_FieldCompareListExpr(self, expr):
+        if self.numexpr:
+            return '{} {} {}'.format(self.compile(expr.left), self.operator(expr),
+                                     self.bind([e.literal for e in expr.right]))
+        return self.compile(expr.equivalent_fallback_expr())
+
+    def emit_LogicalExpr(self, expr):
+        return ' {} '.format(self.operator(expr)).join('(' + self.compile(e) + ')' for e in expr.exprs)
@@ -0,0 +1,57 @@
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, Not, And_, Or_
+
+
+class PlutoDialect(Dialect):
+    name = 'pluto'
+    title = 'pluto conditions'
+    operators = {
+        Equal: 'equals',
+        NotEqual: 'does not equal',
+        GreaterThan: 'is more than',
+        GreaterThanOrEqual: 'is at least',
+        LessThan: 'is less than',
+        LessThanOrEqual: 'is at most',
+        Not: 'it is not true that',
+        And_: 'and',
+        Or_: 'or',
+    }
+
+    def emit_StringLiteral(self, expr):
+        return "\"{}\"".format(expr.literal)
+
+    def emit_IntLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_FloatLiteral(self, expr):
+        return repr(expr.literal)
+
+    def emit_RegexLiteral(self, expr):
+        return "\"{}\"".format(expr.literal)
+
+    def emit_SchemaLiteral(self, expr):
+        return expr.literal
+
+    def emit_Not(self, expr):
+        return '{} {}'.format(self.operator(expr), self.compile(expr.operand))
+
+    def emit_BinaryComparisonExpr(self, expr):
+        operator = self.operator(expr)
+        return '{} {} {}'.format(self.compile(expr.left), operator, self.compile(expr.right))
+
+    def emit_Null(self, expr):
+        return '{} {}'.format(self.compile(expr.left), 'is null' if expr.right.literal else 'is not null')
+
+    def emit_FieldCompareListExpr(self, expr):
+        return self.compile(expr.equivalent_fallback_expr())
+
+    def emit_LogicalExpr(self, expr):
+        return ' {} '.format(self.operator(expr)).join('(' + self.compile(e) + ')' for e in expr.exprs)
+
+    def emit_All(self, expr):
+        return 'all of the following conditions are true :\n' + \
+               '\n'.join(sorted('      - (' + self.compile(e) + ')' for e in expr.exprs))
+
+    def emit_Any(self, expr):
+        return 'any of the following conditions is true :\n' + \
+               '\n'.join(sorted('      - (' + self.compile(e) + ')' for e in expr.exprs))
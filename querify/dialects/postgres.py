@@ -0,0 +1,37 @@
+from .sql import ParameterizedSQLDialect
+from ..querify import MatchRegex, InverseMatchRegex, In, NotIn
+
+
+class PostgresDialect(ParameterizedSQLDialect):
+    """
+    PostgreSQL in the "format" parameter style of psycopg2. The values of In / NotIn are bound as a single array
+    parameter, so the statement text does not depend on the length of the list and can be prepared once.
+    Regular expressions are matched by the POSIX operators ~ and !~.
+    """
+
+    name = 'postgres'
+    title = 'PostgreSQL'
+    placeholder = '%s'
+    operators = dict(ParameterizedSQLDialect.operators)
+    operators.update({
+        MatchRegex: '~',
+        InverseMatchRegex: '!~',
+        In: '= ANY',
+        NotIn: '<> ALL',
+    })
+
+    def quote(self, identifier: str) -> str:
+        # "%" has to be escaped in the statement text when parameters are passed in the "format" style.
+        return super().quote(identifier).replace('%', '%%')
+
+    def emit_FieldCompareListExpr(self, expr):
+        return '{} {}({})'.format(self.quote(expr.left.literal), self.operator(expr),
+                                  self.bind([e.literal for e in expr.right]))
+
+    def emit_ShowColumns(self, stmt):
+        if stmt.db:
+            ql_schema = 'table_schema = ' + self.bind(stmt.db.literal)
+        else:
+            ql_schema = 'table_schema = current_schema()'
+        return 'SELECT column_name, data_type FROM information_schema.columns WHERE ' + ql_schema + \
+               ' AND table_name = ' + self.bind(stmt.table.literal) + ' ORDER BY ordinal_position'
@@ -0,0 +1,121 @@
+import operator
+from typing import Optional, Sequence
+
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, Not, And_, \
+    compile_regex
+
+
+class PythonDialect(Dialect):
+    """
+    Predicates as python functions of a row, for filtering rows in memory, e.g. the residual filter of a narrower
+    query answered from cached results. Rows are mappings from field names to values, or sequences of values with the
+    option columns, the list of field names of the positions in a row.
+    None stands for NULL with the semantics of SQL: a predicate on a null or missing field other than Null / Missing
+    does not hold, and neither does its negation. Regexes are matched by re.search on the string form of a value.
+    """
+
+    name = 'python'
+    title = 'python predicate'
+    operators = {
+        Equal: operator.eq,
+        NotEqual: operator.ne,
+        GreaterThan: operator.gt,
+        GreaterThanOrEqual: operator.ge,
+        LessThan: operator.lt,
+        LessThanOrEqual: operator.le,
+    }
+
+    def __init__(self, columns: Optional[Sequence[str]] = None, **options):
+        super().__init__(**options)
+        self.columns = None if columns is None else {c: i for i, c in enumerate(columns)}
+
+    def getter(self, field: str):
+        if self.columns is None:
+            return lambda row: row.get(field)
+        try:
+            index = self.columns[field]
+        except KeyError:
+            raise KeyError('field "{}" is not one of the columns'.format(field))
+        return operator.itemgetter(index)
+
+    def emit_Not(self, expr):
+        # Negations are complemented like in SQL, so that NOT (a > 1) does not hold for a null a either.
+        negated = expr.negation()
+        if isinstance(negated, Not):
+            predicate = self.compile(negated.operand)
+            return lambda row: not predicate(row)
+        return self.compile(negated)
+
+    def emit_FieldCompareValueExpr(self, expr):
+        get = self.getter(expr.left.literal)
+        compare = self.operator(expr)
+        value = expr.right.literal
+        return lambda row: _compare(compare, get(row), value)
+
+    def emit_FieldCompareFieldExpr(self, expr):
+        get_left = self.getter(expr.left.literal)
+        get_right = self.getter(expr.right.literal)
+        compare = self.operator(expr)
+        return lambda row: _compare(compare, get_left(row), get_right(row))
+
+    def emit_MatchRegex(self, expr):
+        get = self.getter(expr.left.literal)
+        search = compile_regex(expr.right.literal).search
+
+        def predicate(row):
+            value = get(row)
+            return value is not None and search(str(value)) is not None
+        return predicate
+
+    def emit_InverseMatchRegex(self, expr):
+        get = self.getter(expr.left.literal)
+        search = compile_regex(expr.right.literal).search
+
+        def predicate(row):
+            value = get(row)
+            return value is not None and search(str(value)) is None
+        return predicate
+
+    def emit_Null(self, expr):
+        get = self.getter(expr.left.literal)
+        if expr.right.literal:
+            return lambda row: get(row) is None
+        return lambda row: get(row) is not None
+
+    def emit_Missing(self, expr):
+        field = expr.left.literal
+        missing = expr.right.literal
+        if self.columns is not None:
+            # A column is never missing from a row of values.
+            self.getter(field)
+            return lambda row: not missing
+        return lambda row: (field not in row) == missing
+
+    def emit_In(self, expr):
+        get = self.getter(expr.left.literal)
+        values = frozenset(e.literal for e in expr.right)
+
+        def predicate(row):
+            value = get(row)
+            return value is not None and value in values
+        return predicate
+
+    def emit_NotIn(self, expr):
+        get = self.getter(expr.left.literal)
+        values = frozenset(e.literal for e in expr.right)
+
+        def predicate(row):
+            value = get(row)
+            return value is not None and value not in values
+        return predicate
+
+    def emit_LogicalExpr(self, expr):
+        predicates = [self.compile(e) for e in expr.exprs]
+        if isinstance(expr, And_):
+            return lambda row: all(p(row) for p in predicates)
+        return lambda row: any(p(row) for p in predicates)
+
+
+def _compare(compare, left, right):
+    return left is not None and right is not None and compare(left, right)
@@ -0,0 +1,112 @@
+from typing import List, Tuple, Any
+
+from . import Dialect
+from ..querify import Equal, NotEqual, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual, In, NotIn, Not, \
+    And_, Or_
+
+
+class ParameterizedSQLDialect(Dialect):
+    """
+    Base of SQL dialects that bind every value as a parameter of the statement instead of inlining it. Rendering
+    returns a tuple of the statement text and the list of parameters, e.g. ('"a" = %s', [1]), ready to be passed to
+    cursor.execute of a DB-API driver. Identifiers are double-quoted.
+    """
+
+    placeholder = None
+    operators = {
+        Equal: '=',
+        NotEqual: '<>',
+        GreaterThan: '>',
+        GreaterThanOrEqual: '>=',
+        LessThan: '<',
+        LessThanOrEqual: '<=',
+        In: 'IN',
+        NotIn: 'NOT IN',
+        Not: 'NOT',
+        And_: 'AND',
+        Or_: 'OR',
+    }
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.params = []
+
+    def render(self, query) -> Tuple[str, List[Any]]:
+        self.params = []
+        return self.compile(query), self.params
+
+    def bind(self, value) -> str:
+        self.params.append(value)
+        return self.placeholder
+
+    def quote(self, identifier: str) -> str:
+        return '"{}"'.format(identifier.replace('"', '""'))
+
+    def emit_LiteralExpr(self, expr):
+        return self.bind(expr.literal)
+
+    def emit_SchemaLiteral(self, expr):
+        return self.quote(expr.literal)
+
+    def emit_Not(self, expr):
+        negated = expr.negation()
+        if isinstance(negated, Not):
+            return '{} ({})'.format(self.operator(expr), self.compile(negated.operand))
+        return self.compile(negated)
+
+    def emit_BinaryComparisonExpr(self, expr):
+        # the field is quoted before the value is bound, as it would be compiled
+        field = self.quote(expr.left.literal)
+        right = expr.right
+        return '{} {} {}'.format(field, self.operator(expr), self.emitters[type(right)](self, right))
+
+    def emit_FieldAssertionExpr(self, expr):
+        return '{} {}'.format(self.quote(expr.left.literal), 'IS NULL' if expr.right.literal else 'IS NOT NULL')
+
+    def emit_FieldCompareListExpr(self, expr):
+        emitters = self.emitters
+        return '{} {} ({})'.format(self.quote(expr.left.literal), self.operator(expr),
+                                   ', '.join([emitters[type(e)](self, e) for e in expr.right]))
+
+    def emit_LogicalExpr(self, expr):
+        if not expr.exprs:
+            # The identity element, so that eliminated sub exprs still produce valid statements.
+            return 'TRUE' if isinstance(expr, And_) else 'FALSE'
+        emitters = self.emitters
+        return ' {} '.format(self.operator(expr)).join(['(' + emitters[type(e)](self, e) + ')' for e in expr.exprs])
+
+    def emit_Select(self, stmt):
+        if stmt.columns:
+            ql_select = 'SELECT ' + ', '.join(self.compile(c) for c in stmt.columns)
+        else:
+            ql_select = 'SELECT *'
+        return ql_select + ' FROM ' + self.table_name(stmt) + self.where_clause(stmt.where) + \
+            self.order_by_clause(stmt) + self.limit_clause(stmt)
+
+    def emit_BatchSelect(self, stmt):
+        # The select list is compiled before the where clause, so that the parameters are bound in order.
+        columns = [self.compile(c) for c in stmt.columns] if stmt.columns else [self.table_name(stmt) + '.*']
+        columns += ['({}) AS {}'.format(self.compile(f) if f else 'TRUE', self.quote(label))
+                    for f, label in zip(stmt.filters, stmt.labels)]
+        return 'SELECT ' + ', '.join(columns) + ' FROM ' + self.table_name(stmt) + self.where_clause(stmt.where)
+
+    def table_name(self, stmt) -> str:
+        if stmt.db:
+            return self.compile(stmt.db) + '.' + self.compile(stmt.table)
+        return self.compile(stmt.table)
+
+    def where_clause(self, where):
+        if where and not (isinstance(where, And_) and not where.exprs):
+            return ' WHERE ' + self.compile(where)
+        return ''
+
+    def order_by_clause(self, stmt):
+        if not stmt.order_by:
+            return ''
+        return ' ORDER BY ' + ', '.join(self.compile(o.field) + (' DESC' if o.descending else '')
+                                        for o in stmt.order_by)
+
+    def limit_clause(self, stmt):
+        if stmt.limit is None:
+            return ''
+        return ' LIMIT ' + self.bind(stmt.limit)
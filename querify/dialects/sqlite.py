@@ -0,0 +1,52 @@
+import sqlite3
+
+from .sql import ParameterizedSQLDialect
+from ..querify import MatchRegex, InverseMatchRegex, compile_regex
+
+
+class SQLiteDialect(ParameterizedSQLDialect):
+    """
+    SQLite in the "qmark" parameter style of the sqlite3 module. SQLite has no built-in implementation of REGEXP, so
+    register_functions has to be called on a connection before running statements that match regexes.
+    Datetimes are bound in the text format of the default sqlite3 adapter, e.g. "2015-12-31 12:05:00".
+    """
+
+    name = 'sqlite'
+    title = 'SQLite'
+    placeholder = '?'
+    operators = dict(ParameterizedSQLDialect.operators)
+    operators.update({
+        MatchRegex: 'REGEXP',
+        InverseMatchRegex: 'NOT REGEXP',
+    })
+
+    def emit_DateTimeLiteral(self, expr):
+        return self.bind(expr.literal.isoformat(' '))
+
+    def emit_ShowColumns(self, stmt):
+        if stmt.db:
+            return 'SELECT name, type FROM pragma_table_info({}, {})'.format(
+                self.bind(stmt.table.literal), self.bind(stmt.db.literal))
+        return 'SELECT name, type FROM pragma_table_info({})'.format(self.bind(stmt.table.literal))
+
+
+def regexp(pattern, value):
+    """
+    Implementation of "value REGEXP pattern", which SQLite evaluates as regexp(pattern, value). Patterns are compiled
+    through the shared regex cache, since the function is called for every row. Like other SQL operators, it is NULL
+    for NULL values.
+    """
+    if value is None:
+        return None
+    return compile_regex(pattern).search(str(value)) is not None
+
+
+def register_functions(connection: sqlite3.Connection):
+    """
+    Register the functions that statements of the sqlite dialect rely on, i.e. REGEXP, on a connection.
+    """
+    try:
+        connection.create_function('regexp', 2, regexp, deterministic=True)
+    except (TypeError, sqlite3.NotSupportedError):
+        # deterministic requires python 3.8 and SQLite 3.8.3.
+        connection.create_function('regexp', 2, regexp)
@@ -11,4 +11,8 @@ class UnrecognizedExprType(InvalidQuery):
 
 
 class UnrecognizedJsonableClass(QuerifyError):
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidEncoding(QuerifyError):
+    pass
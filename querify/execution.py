@@ -0,0 +1,28 @@
+"""
+Execution of independent queries in parallel, e.g. the statements returned by Select.split_by_time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from .querify import Query
+
+T = TypeVar('T')
+
+# The number of threads when max_workers is not given: enough to overlap the round trips of I/O bound queries, without
+# starting a thread per query for a statement split into many chunks.
+DEFAULT_MAX_WORKERS = 32
+
+
+def execute_concurrently(queries: Iterable[Query], execute: Callable[[Query], T],
+                         max_workers: Optional[int] = None) -> List[T]:
+    """
+    Run execute on every query in a pool of threads and return the results in the order of queries. execute is
+    responsible for rendering the query and for getting a connection that can be used from its thread. The first
+    exception raised by execute is raised again once all queries are done. At most max_workers threads are started,
+    DEFAULT_MAX_WORKERS by default.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or min(DEFAULT_MAX_WORKERS, len(queries))) as executor:
+        return list(executor.map(execute, queries))
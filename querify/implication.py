@@ -0,0 +1,191 @@
+"""
+Implication between filters: whether every row matching one filter matches another as well, e.g. to answer a narrower
+query from the cached result of a wider one (see Expr.implies).
+
+Filters are summarized into a disjunction of conjunctions, where each conjunction keeps per field the interval, the
+finite set of allowed values, the excluded values, the null test and the regexes its predicates require. Other
+predicates, including Or nested in a conjunction and Not that cannot be complemented, are kept as opaque atoms that
+only imply identical atoms. Negations are only complemented where the complement holds for null and missing fields as
+well (rewrite.MISSING_SAFE_COMPLEMENTS), so that implication holds in SQL as well as in MongoDB for fields holding
+scalar values. It does not hold for array fields in MongoDB, where a predicate matches if any element matches it, e.g.
+a document with a: [1, 9] matches both {a: {$gt: 5}} and {a: {$lt: 3}}, whose conjunction is considered unsatisfiable.
+"""
+from typing import List, Optional
+
+from .bounds import Interval, UNBOUNDED, COMPARISON_BOUNDS
+from .querify import Expr, Not, And_, Or_, LiteralExpr, FieldCompareValueExpr, NotEqualValue, MatchRegex, \
+    InverseMatchRegex, Null, In, NotIn, compile_regex
+
+
+class FieldConstraint:
+    """
+    What a conjunction requires of the values of one field.
+    """
+
+    def __init__(self):
+        self.interval = UNBOUNDED
+        self.values = None  # type: Optional[frozenset]
+        self.excluded = set()
+        self.null = None  # type: Optional[bool]
+        self.not_null = False
+        self.regexes = set()
+
+    @property
+    def finite_values(self) -> Optional[list]:
+        """
+        The values the field can take if they are finitely many, or None.
+        """
+        interval = self.interval
+        if self.values is not None:
+            return [v for v in self.values if v in interval and v not in self.excluded]
+        if interval.bounded and interval.lower == interval.upper and interval.lower_closed and interval.upper_closed:
+            return [] if interval.lower in self.excluded else [interval.lower]
+        return None
+
+    @property
+    def satisfiable(self) -> bool:
+        if self.null is True and self.not_null:
+            return False
+        if self.interval.empty:
+            return False
+        values = self.finite_values
+        return values is None or bool(values)
+
+
+class Conjunction:
+    def __init__(self, atoms: List[Expr]):
+        self.fields = {}  # field name -> FieldConstraint
+        self.opaque = set()
+        for atom in atoms:
+            try:
+                self.add(atom)
+            except TypeError:
+                # a bound of a type incomparable with the other bounds on the field
+                self.opaque.add(atom_key(atom))
+        try:
+            self.satisfiable = all(c.satisfiable for c in self.fields.values())
+        except TypeError:
+            self.satisfiable = True
+
+    def constraint(self, field: str) -> FieldConstraint:
+        constraint = self.fields.get(field)
+        if constraint is None:
+            constraint = self.fields[field] = FieldConstraint()
+        return constraint
+
+    def add(self, atom: Expr):
+        if isinstance(atom, FieldCompareValueExpr) and type(atom) in COMPARISON_BOUNDS:
+            value = atom.right.literal
+            constraint = self.constraint(atom.left.literal)
+            constraint.interval = constraint.interval.intersection(COMPARISON_BOUNDS[type(atom)](value))
+            constraint.not_null = True
+        elif isinstance(atom, NotEqualValue):
+            self.constraint(atom.left.literal).excluded.add(atom.right.literal)
+        elif isinstance(atom, In):
+            constraint = self.constraint(atom.left.literal)
+            values = frozenset(e.literal for e in atom.right)
+            constraint.values = values if constraint.values is None else constraint.values & values
+            constraint.not_null = True
+        elif isinstance(atom, NotIn):
+            self.constraint(atom.left.literal).excluded.update(e.literal for e in atom.right)
+        elif isinstance(atom, (MatchRegex, InverseMatchRegex)):
+            constraint = self.constraint(atom.left.literal)
+            constraint.regexes.add((type(atom), atom.right.literal))
+            constraint.not_null = True
+        elif isinstance(atom, Null):
+            constraint = self.constraint(atom.left.literal)
+            if atom.right.literal:
+                constraint.null = True
+            else:
+                constraint.not_null = True
+        else:
+            self.opaque.add(atom_key(atom))
+
+    def implies(self, other: 'Conjunction') -> bool:
+        if not self.satisfiable:
+            return True
+        if not other.opaque <= self.opaque:
+            return False
+        for field, required in other.fields.items():
+            constraint = self.fields.get(field)
+            if constraint is None or not _field_implies(constraint, required):
+                return False
+        return True
+
+
+def _field_implies(constraint: FieldConstraint, required: FieldConstraint) -> bool:
+    if required.null is True and constraint.null is not True:
+        return False
+    if required.not_null and not constraint.not_null:
+        return False
+    values = constraint.finite_values
+    if values is not None:
+        return all(_value_implies(v, required) for v in values)
+    if required.values is not None or not _includes(required.interval, constraint.interval):
+        return False
+    for value in required.excluded:
+        if value in constraint.interval and value not in constraint.excluded:
+            return False
+    return required.regexes <= constraint.regexes
+
+
+def _value_implies(value, required: FieldConstraint) -> bool:
+    if value not in required.interval or value in required.excluded:
+        return False
+    if required.values is not None and value not in required.values:
+        return False
+    for cls, pattern in required.regexes:
+        if not isinstance(value, str) or (compile_regex(pattern).search(value) is None) != (cls is InverseMatchRegex):
+            return False
+    return True
+
+
+def _includes(outer: Interval, inner: Interval) -> bool:
+    if outer.lower is not None:
+        if inner.lower is None or inner.lower < outer.lower or \
+                inner.lower == outer.lower and inner.lower_closed and not outer.lower_closed:
+            return False
+    if outer.upper is not None:
+        if inner.upper is None or inner.upper > outer.upper or \
+                inner.upper == outer.upper and inner.upper_closed and not outer.upper_closed:
+            return False
+    return True
+
+
+def atom_key(expr: Expr):
+    """
+    A hashable key of the structure of expr, equal for structurally identical exprs.
+    """
+    if isinstance(expr, LiteralExpr):
+        return type(expr), expr.literal
+    return (type(expr),) + tuple(atom_key(e) for e in expr.iter_sub_expr())
+
+
+class Summary:
+    """
+    A filter summarized as a disjunction of conjunctions.
+    """
+
+    def __init__(self, expr: Expr):
+        if any(isinstance(e, Not) for e in expr.iter_expr()):
+            from .rewrite import push_negations, MISSING_SAFE_COMPLEMENTS
+            expr = push_negations(expr, MISSING_SAFE_COMPLEMENTS)
+        self.key = atom_key(expr)
+        if isinstance(expr, Or_) and expr.exprs:
+            self.conjunctions = [Conjunction(_conjuncts(e)) for e in expr.exprs]
+        else:
+            self.conjunctions = [Conjunction(_conjuncts(expr))]
+
+    def implies(self, other: 'Summary') -> bool:
+        try:
+            return all(other.key in a.opaque or any(a.implies(b) for b in other.conjunctions)
+                       for a in self.conjunctions)
+        except TypeError:
+            # values of incomparable types
+            return False
+
+
+def _conjuncts(expr):
+    if isinstance(expr, And_):
+        return [atom for e in expr.exprs for atom in _conjuncts(e)]
+    return [expr]
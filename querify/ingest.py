@@ -0,0 +1,168 @@
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Union, BinaryIO, Iterable, Tuple, Any
+
+from . import instrumentation
+from .errors import InvalidQuery
+from .querify import JsonType, OperatorExpr, LogicalExpr, Not, FieldCompareValueExpr, FieldCompareListExpr, \
+    MatchRegex, InverseMatchRegex
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+ISO_DATETIME_PATTERN = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?(Z|[+-]\d{2}:?\d{2})?$'
+)
+
+
+def parse_iso_datetime(value: str):
+    """
+    Parse value as an ISO 8601 datetime and return it, or return None if value is not in ISO form. Datetimes with a
+    UTC offset are converted to naive UTC datetimes, which is how DateTimeLiteral is rendered in every dialect.
+    """
+    match = ISO_DATETIME_PATTERN.match(value)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    try:
+        value = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0),
+                         int((fraction or '0').ljust(6, '0')))
+    except ValueError:
+        return None
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].replace(':', '')
+        value -= sign * timedelta(hours=int(offset[:2]), minutes=int(offset[2:]))
+    return value
+
+
+def loads(data: Union[bytes, str], parse_datetimes: bool = False) -> JsonType:
+    """
+    Decode a json filter with the fastest json backend available (orjson if installed, otherwise the standard json
+    module), to the same filter as json.loads. If parse_datetimes is true, string operands of value comparisons and
+    lists that are in ISO datetime form are converted to datetime, which also turns strings that only look like
+    datetimes (e.g. {"name": "2020-01-01T00:00"}) into DateTimeLiteral.
+    """
+    if instrumentation.enabled:
+        with instrumentation.timer('ingest.decode'):
+            json_obj = _loads(data)
+    else:
+        json_obj = _loads(data)
+    if parse_datetimes:
+        json_obj = convert_datetimes(json_obj)
+    return json_obj
+
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load(fp: BinaryIO, parse_datetimes: bool = False) -> JsonType:
+    """
+    Decode a json filter from a binary file-like object. If ijson is installed, the filter is built incrementally
+    from the parsing events of the stream, otherwise the whole stream is read and decoded by loads.
+    """
+    if ijson is None:
+        return loads(fp.read(), parse_datetimes=parse_datetimes)
+    json_obj = build_from_events(ijson.basic_parse(fp, use_float=True))
+    if parse_datetimes:
+        json_obj = convert_datetimes(json_obj)
+    return json_obj
+
+
+def build_from_events(events: Iterable[Tuple[str, Any]]) -> JsonType:
+    """
+    Build a json object from ijson-style basic parsing events, i.e. (event, value) pairs where event is one of
+    "start_map", "map_key", "end_map", "start_array", "end_array", "string", "number", "boolean" and "null".
+    """
+    stack = []
+    keys = []
+    for event, value in events:
+        if event == 'map_key':
+            keys.append(value)
+            continue
+        is_start = event == 'start_map' or event == 'start_array'
+        if is_start:
+            value = {} if event == 'start_map' else []
+        elif event == 'end_map' or event == 'end_array':
+            value = stack.pop()
+            if not stack:
+                return value
+            continue
+        if stack:
+            container = stack[-1]
+            if isinstance(container, dict):
+                container[keys.pop()] = value
+            else:
+                container.append(value)
+        elif not is_start:
+            return value
+        if is_start:
+            stack.append(value)
+    raise InvalidQuery('Incomplete json stream.')
+
+
+def _datetime_operators():
+    operators = set()
+    for key, cls in OperatorExpr.subclasses.items():
+        if issubclass(cls, (FieldCompareValueExpr, FieldCompareListExpr)) and \
+                not issubclass(cls, (MatchRegex, InverseMatchRegex)):
+            operators.add(key)
+    return operators
+
+
+DATETIME_OPERATORS = None
+
+
+def convert_datetimes(filter: JsonType) -> JsonType:
+    """
+    Convert the string operands in ISO datetime form of value comparison operators (and of the abbreviated forms of
+    equality and "in") into datetime, in place. Field names, regexes and operands of field comparisons are left as is.
+    """
+    global DATETIME_OPERATORS
+    if DATETIME_OPERATORS is None:
+        DATETIME_OPERATORS = _datetime_operators()
+    if not isinstance(filter, dict):
+        return filter
+    stack = [filter]
+    while stack:
+        sub_filter = stack.pop()
+        for tag, tag_filter in sub_filter.items():
+            if isinstance(tag_filter, str):
+                sub_filter[tag] = _convert_datetime(tag_filter)
+            elif isinstance(tag_filter, list):
+                tag_cls = OperatorExpr.subclasses.get(tag)
+                if tag_cls is not None and issubclass(tag_cls, LogicalExpr):
+                    stack.extend(f for f in tag_filter if isinstance(f, dict))
+                else:
+                    tag_filter[:] = [_convert_datetime(v) for v in tag_filter]
+            elif isinstance(tag_filter, dict):
+                if tag == Not.key:
+                    stack.append(tag_filter)
+                    continue
+                for op, condition in tag_filter.items():
+                    if op in DATETIME_OPERATORS:
+                        if isinstance(condition, str):
+                            tag_filter[op] = _convert_datetime(condition)
+                        elif isinstance(condition, list):
+                            condition[:] = [_convert_datetime(v) for v in condition]
+    return filter
+
+
+def _convert_datetime(value):
+    if isinstance(value, str) and len(value) >= 16 and value[4:5] == '-':
+        converted = parse_iso_datetime(value)
+        if converted is not None:
+            return converted
+    return value
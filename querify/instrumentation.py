@@ -0,0 +1,119 @@
+"""
+Opt-in instrumentation of querify internals.
+
+When disabled (the default), instrumented code paths only check the module level `enabled` flag. When enabled, the
+following are recorded:
+
+- timers: count and cumulative time per phase, e.g. "from_json", "from_json.construct", "from_json.link_parents",
+  "normalize" and "to_query.<dialect>"
+- counters: e.g. class dispatch lookups and misses while parsing, and nodes created per class ("nodes.<ClassName>")
+- caches: hits and misses per cache, e.g. "visitor.dispatch", "regex" (compiled regexes) and "result" (lookups in
+  querify.cache.ResultCache)
+- maxima: e.g. the largest tree parsed ("tree_size")
+
+Every record is also forwarded to the registered hooks as hook(kind, name, value), where kind is one of "time",
+"count", "cache" and "max", so that they can be relayed to a metrics system.
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any
+
+
+enabled = False
+
+_timers = {}
+_counters = {}
+_caches = {}
+_maxima = {}
+_hooks = []
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def add_hook(hook: Callable[[str, str, Any], None]):
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[str, str, Any], None]):
+    _hooks.remove(hook)
+
+
+def record_time(name: str, seconds: float):
+    timer = _timers.get(name)
+    if timer is None:
+        timer = _timers[name] = [0, 0., 0.]
+    timer[0] += 1
+    timer[1] += seconds
+    if seconds > timer[2]:
+        timer[2] = seconds
+    for hook in _hooks:
+        hook('time', name, seconds)
+
+
+def incr(name: str, value: int = 1):
+    _counters[name] = _counters.get(name, 0) + value
+    for hook in _hooks:
+        hook('count', name, value)
+
+
+def record_cache(name: str, hit: bool):
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = [0, 0]
+    cache[0 if hit else 1] += 1
+    for hook in _hooks:
+        hook('cache', name, hit)
+
+
+def record_max(name: str, value):
+    if name not in _maxima or value > _maxima[name]:
+        _maxima[name] = value
+    for hook in _hooks:
+        hook('max', name, value)
+
+
+@contextmanager
+def timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+
+def record_tree(expr):
+    size = 0
+    for e in expr.iter_expr():
+        incr('nodes.' + type(e).__name__)
+        size += 1
+    record_max('tree_size', size)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return a snapshot of everything recorded since the last reset_stats.
+    """
+    return {
+        'enabled': enabled,
+        'timers': {name: {'count': count, 'total': total, 'mean': total / count, 'max': max_}
+                   for name, (count, total, max_) in _timers.items()},
+        'counters': dict(_counters),
+        'caches': {name: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+                   for name, (hits, misses) in _caches.items()},
+        'maxima': dict(_maxima),
+    }
+
+
+def reset_stats():
+    _timers.clear()
+    _counters.clear()
+    _caches.clear()
+    _maxima.clear()
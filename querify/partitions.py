@@ -0,0 +1,89 @@
+"""
+Pruning of the partitions or shards of a table that cannot contain rows matching a filter, so that a query is only sent
+to the ones that can.
+"""
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from .bounds import Interval, field_intervals
+from .querify import Expr, Not, Or_
+
+
+class RangePartition:
+    """
+    Local description of a partition that holds the rows whose partition key is within [lower, upper) by default, e.g.
+    the rows of one day. A lower or upper bound of None means unbounded on that side.
+    """
+
+    def __init__(self, name: str, lower=None, upper=None, lower_closed: bool = True, upper_closed: bool = False):
+        self.name = name
+        self.interval = Interval(lower, upper, lower_closed, upper_closed)
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(type(self).__name__, self.name, self.interval)
+
+
+class RangePartitioning:
+    """
+    A table partitioned by ranges of the values of field.
+    """
+
+    def __init__(self, field: str, partitions: Iterable[RangePartition]):
+        self.field = field
+        self.partitions = list(partitions)
+
+    def prune(self, expr: Optional[Expr]) -> List[RangePartition]:
+        """
+        Return the partitions, in their original order, that may contain rows for which expr holds.
+        """
+        intervals = field_intervals(expr, self.field)
+        return [p for p in self.partitions if any(not p.interval.intersection(i).empty for i in intervals)]
+
+
+class HashPartitioning:
+    """
+    A table sharded by the hash of the values of field, where the rows with value v are in
+    shards[hash(v) % len(shards)]. hash has to be the function used to place the rows, not the builtin hash of python,
+    which is salted per process for strings.
+    """
+
+    def __init__(self, field: str, shards: Sequence, hash: Callable[[Any], int]):
+        self.field = field
+        self.shards = list(shards)
+        self.hash = hash
+
+    def prune(self, expr: Optional[Expr]) -> List:
+        """
+        Return the shards, in their original order, that may contain rows for which expr holds. Since hashing does not
+        preserve order, only filters that restrict field to a finite set of values, i.e. EqualValue and In, prune any
+        shard.
+        """
+        intervals = field_intervals(expr, self.field)
+        if any(i.lower is None or i.lower != i.upper for i in intervals):
+            return list(self.shards)
+        indexes = {self.hash(i.lower) % len(self.shards) for i in intervals}
+        return [s for index, s in enumerate(self.shards) if index in indexes]
+
+
+def prune_partitions(expr: Optional[Expr], *partitionings) -> List[tuple]:
+    """
+    Prune a table partitioned in several ways at once, e.g. by date and then by the hash of a tenant id, and return
+    the combinations of partitions, one of each partitioning, that may contain rows for which expr holds. The branches
+    of a top level Or are pruned separately, so that e.g. (date = d1 AND tenant = 1) OR (date = d2 AND tenant = 2) does
+    not select (d1, 2) and (d2, 1).
+    """
+    if expr is not None and any(isinstance(e, Not) for e in expr.iter_expr()):
+        from .rewrite import push_negations
+        expr = push_negations(expr)
+    if isinstance(expr, Or_) and expr.exprs:
+        selected = set()
+        for e in expr.exprs:
+            selected.update(prune_partitions(e, *partitionings))
+    else:
+        selected = None
+    combinations = [()]
+    for partitioning in partitionings:
+        combinations = [c + (p,) for c in combinations for p in partitioning.prune(expr)]
+    if selected is not None:
+        combinations = [c for c in combinations if c in selected]
+    return combinations
+
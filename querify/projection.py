@@ -0,0 +1,34 @@
+"""
+Projection pushdown: the columns a Select has to return, so that it does not fetch every column of a wide table.
+"""
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from .querify import Expr, Select
+
+
+def residual_columns(expr: Optional[Expr]) -> List[str]:
+    """
+    The columns that evaluating expr in memory (e.g. with the "python" dialect) reads, including the fields on the right
+    hand side of field comparisons, in order of first reference.
+    """
+    if expr is None:
+        return []
+    return expr.referenced_fields()
+
+
+def required_columns(select: Select, consumers: Iterable[str] = (), residual: Optional[Expr] = None,
+                     include_where: bool = False) -> List[str]:
+    """
+    The columns that select has to return: those read by the consumers of the rows, the order_by fields (which are
+    needed to seek the next page, see Select.seek_after), the columns of a residual filter applied to the rows in
+    memory, and with include_where, the columns of the where clause, e.g. for the rows to be cached and filtered again
+    (see querify.cache). The columns are returned in that order, without duplicates.
+    """
+    columns = list(consumers)
+    if select.order_by:
+        columns.extend(o.field.literal for o in select.order_by)
+    columns.extend(residual_columns(residual))
+    if include_where:
+        columns.extend(residual_columns(select.where))
+    return list(OrderedDict.fromkeys(columns))
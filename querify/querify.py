@@ -1,18 +1,80 @@
 import re
+import sys
+import types
+import weakref
 from copy import copy
-from datetime import datetime
-from typing import Union, Dict, Optional, Any, List
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Union, Dict, Optional, Any, List, Iterable, TYPE_CHECKING
 
-from qutils.models import AttrRef, ItemRef
 
+from . import instrumentation
 from .errors import InvalidQuery, UnrecognizedExprType, UnrecognizedJsonableClass
 
+if TYPE_CHECKING:
+    from .bounds import Interval
+    from .retention import RetentionPolicy
+
 
 JsonObjectType = Dict[str, Any]
 JsonValueType = Union[int, float, str]
 JsonType = Union[JsonValueType, JsonObjectType]
 
 
+# qutils.models pulls in heavy dependencies, so it is only imported once sub expr references are first needed (see
+# also _LazyReferencesModule).
+_AttrRef = None
+_ItemRef = None
+
+
+def _import_refs():
+    global _AttrRef, _ItemRef
+    from qutils.models import AttrRef as _AttrRef, ItemRef as _ItemRef
+
+
+def _attr_ref(container, key):
+    if _AttrRef is None:
+        _import_refs()
+    return _AttrRef(container, key)
+
+
+def _item_ref(container, key):
+    if _ItemRef is None:
+        _import_refs()
+    return _ItemRef(container, key)
+
+
+# querify.dialects depends on this module, so it is imported on the first rendering.
+_get_dialect = None
+
+
+def _import_get_dialect():
+    global _get_dialect
+    from .dialects import get_dialect as _get_dialect
+    return _get_dialect
+
+
+REGEX_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile_regex(pattern, flags):
+    return re.compile(pattern, flags)
+
+
+def compile_regex(pattern: str, flags: int = 0):
+    """
+    Compile a regex through a cache shared by all of querify, bounded to REGEX_CACHE_SIZE patterns. Unlike the cache of
+    the re module, it is not cleared entirely once full, but evicts the least recently used patterns.
+    """
+    if instrumentation.enabled:
+        hits = _compile_regex.cache_info().hits
+        compiled = _compile_regex(pattern, flags)
+        instrumentation.record_cache('regex', _compile_regex.cache_info().hits > hits)
+        return compiled
+    return _compile_regex(pattern, flags)
+
+
 class ClassWithSubclassDictMeta(type):
     def __init__(cls, what, bases=None, dict=None):
         super().__init__(what, bases, dict)
@@ -61,6 +123,8 @@ class ClassFromJsonWithSubclassDictMeta(ClassWithSubclassDictMeta):
 
     def new_from_json(cls, json: JsonType):
         for key in cls.cls_keys_from_json(json):
+            if instrumentation.enabled:
+                instrumentation.incr('dispatch.lookups')
             try:
                 subcls = cls[key]
                 if subcls.final:
@@ -78,7 +142,8 @@ class ClassFromJsonWithSubclassDictMeta(ClassWithSubclassDictMeta):
                 else:
                     return subcls.new_from_json(json)
             except (KeyError, UnrecognizedExprType):
-                pass
+                if instrumentation.enabled:
+                    instrumentation.incr('dispatch.misses')
         raise UnrecognizedJsonableClass('cannot recognize class from "{}"'.format(json))
 
     def cls_keys_from_json(cls, json: JsonType):
@@ -89,49 +154,147 @@ class ClassFromJsonWithSubclassDictMeta(ClassWithSubclassDictMeta):
 
 
 class Query:
-    def to_query(self, type: str):
-        method = getattr(self, 'to_query_' + type, None)
-        if method is None:
+    def to_query(self, type: str, **options):
+        """
+        Render this query in the dialect registered under type (see querify.dialects). Options are passed to the
+        dialect.
+        """
+        dialect = (_get_dialect or _import_get_dialect())(type)
+        if dialect is None:
             raise NotImplementedError('generating {} from {!r} is not supported'.format(type, self))
-        return method()
+        if instrumentation.enabled:
+            with instrumentation.timer('to_query.' + type):
+                return dialect(**options).render(self)
+        return dialect(**options).render(self)
 
-    def to_query_json(self) -> str:
-        raise NotImplementedError('generating json from {!r} is not implemented'.format(self))
+    def to_query_json(self) -> JsonType:
+        return self.to_query('json')
 
     def to_query_influx(self) -> str:
-        raise NotImplementedError('generating InfluxQL from {!r} is not implemented'.format(self))
+        return self.to_query('influx')
 
     def to_query_mysql(self) -> str:
-        raise NotImplementedError('generating MySQL from {!r} is not implemented'.format(self))
+        return self.to_query('mysql')
 
     def to_query_mongo(self) -> JsonType:
-        raise NotImplementedError('generating MongoDB query from {!r} is not implemented'.format(self))
+        return self.to_query('mongo')
 
     def to_query_pandas(self) -> str:
-        raise NotImplementedError('generating pandas query from {!r} is not implemented.'.format(self))
+        return self.to_query('pandas')
 
     def to_query_pluto(self) -> str:
-        raise NotImplementedError('generating pluto conditions from {!r} is not implemented.'.format(self))
+        return self.to_query('pluto')
 
 
 class Expr(Query, metaclass=ClassFromJsonWithSubclassDictMeta):
     base = True
 
-    def __init__(self):
-        self.parent = None
+    _field_index = None
+    _implication_summary = None
+    _negations = None
+    _parent_ref = None
+
+    @property
+    def parent(self) -> Optional['Expr']:
+        """
+        The parent of an expr is held by a weak reference, so that expr trees contain no reference cycles and are freed
+        by reference counting alone. The parent becomes None once the tree above this node is garbage.
+        """
+        parent_ref = self._parent_ref
+        return None if parent_ref is None else parent_ref()
+
+    @parent.setter
+    def parent(self, parent: Optional['Expr']):
+        self._parent_ref = None if parent is None else weakref.ref(parent)
 
     @classmethod
     def from_json(cls, json: Union['Expr', JsonType]) -> 'Expr':
+        if instrumentation.enabled:
+            return cls._from_json_instrumented(json)
         expr = cls._from_json(json)
+        expr.link_parents()
+        return expr
+
+    @classmethod
+    def _from_json_instrumented(cls, json: Union['Expr', JsonType]) -> 'Expr':
+        with instrumentation.timer('from_json'):
+            with instrumentation.timer('from_json.construct'):
+                expr = cls._from_json(json)
+            with instrumentation.timer('from_json.link_parents'):
+                expr.link_parents()
+        instrumentation.record_tree(expr)
+        return expr
+
+    @classmethod
+    def from_json_bytes(cls, data: Union[bytes, str], parse_datetimes: bool = False) -> 'Expr':
+        """
+        Expr.from_json_bytes builds an expr from json encoded bytes, using orjson for decoding if it is installed.
+        The expr is the same as that of Expr.from_json(json.loads(data)), unless parse_datetimes is true, in which case
+        value operands in ISO datetime form become DateTimeLiteral.
+        The json is decoded in full before the expr is built, since a decoder in C is faster than building the expr
+        from parsing events in Python.
+        """
+        from .ingest import loads
+        return cls.from_json(loads(data, parse_datetimes=parse_datetimes))
 
-        def add_parent(expr):
-            for sub_expr_ref in expr.iter_sub_expr_ref():
-                sub_expr_ref.v.parent = expr
-                add_parent(sub_expr_ref.v)
+    @classmethod
+    def from_json_stream(cls, fp, parse_datetimes: bool = False) -> 'Expr':
+        """
+        Expr.from_json_stream builds an expr from a binary file-like object containing json. If ijson is installed, the
+        stream is consumed incrementally as parsing events instead of being read into memory first, but the json
+        object is still built in full before the expr.
+        """
+        from .ingest import load
+        return cls.from_json(load(fp, parse_datetimes=parse_datetimes))
 
-        add_parent(expr)
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Expr':
+        """
+        Expr.from_bytes builds an expr from the binary encoding produced by Expr.to_bytes.
+        """
+        from .binary import loads
+        if instrumentation.enabled:
+            with instrumentation.timer('from_bytes'):
+                expr = loads(data)
+            instrumentation.record_tree(expr)
+        else:
+            expr = loads(data)
+        if not isinstance(expr, cls):
+            raise InvalidQuery('Unexpected expression type. Expected "{}", but got "{}".'
+                               .format(cls.__name__, type(expr).__name__))
+        expr.link_parents()
         return expr
 
+    def to_bytes(self) -> bytes:
+        """
+        Expr.to_bytes encodes the tree in a compact, versioned binary format (see querify.binary).
+        """
+        from .binary import dumps
+        if instrumentation.enabled:
+            with instrumentation.timer('to_bytes'):
+                return dumps(self)
+        return dumps(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_parent_ref', None)
+        state.pop('_negations', None)
+        return state
+
+    def link_parents(self):
+        """
+        Expr.link_parents sets the parent of every node in the tree rooted at this node.
+        """
+        stack = [self]
+        while stack:
+            expr = stack.pop()
+            sub_exprs = expr.iter_sub_expr()
+            if sub_exprs:
+                parent_ref = weakref.ref(expr)
+                for sub_expr in sub_exprs:
+                    sub_expr._parent_ref = parent_ref
+                stack.extend(sub_exprs)
+
     @classmethod
     def _from_json(cls, json: Union['Expr', JsonType]) -> 'Expr':
         if isinstance(json, cls):
@@ -172,8 +335,111 @@ class Expr(Query, metaclass=ClassFromJsonWithSubclassDictMeta):
                     if not isinstance(sub_expr, And):
                         return And([])
                 sub_expr_ref.v = transformed_sub_expr
+        return self._carry_field_index(transformed_self)
+
+    def _carry_field_index(self, transformed_self):
+        if self._field_index is not None:
+            transformed_self.field_index()
         return transformed_self
 
+    def field_index(self) -> Dict[str, List['BinaryBooleanExpr']]:
+        """
+        Expr.field_index returns a dict mapping each field name referenced in the tree to the predicate nodes
+        (BinaryBooleanExpr) referring to it, in the order of Expr.iter_expr. Fields on the right hand side of field
+        comparisons like EqualField are indexed as well.
+        The index is built on first use and cached on this node. Expr.transform builds the index of the transformed tree
+        as well if the original tree has one. Mutating the tree in place through Expr.iter_sub_expr_ref invalidates the
+        index, in which case Expr.clear_field_index must be called.
+        """
+        index = self._field_index
+        if index is None:
+            index = {}
+            stack = [self]
+            while stack:
+                expr = stack.pop()
+                if isinstance(expr, BinaryBooleanExpr):
+                    index.setdefault(expr.left.literal, []).append(expr)
+                    if isinstance(expr.right, SchemaLiteral) and expr.right.literal != expr.left.literal:
+                        index.setdefault(expr.right.literal, []).append(expr)
+                elif not isinstance(expr, LiteralExpr):
+                    stack.extend(reversed(expr.iter_sub_expr()))
+            # a lone predicate is cheap to index and caching would make it refer to itself
+            if not isinstance(self, BinaryBooleanExpr):
+                self._field_index = index
+        return index
+
+    def clear_field_index(self):
+        self._field_index = None
+        self._implication_summary = None
+        self._negations = None
+
+    def referenced_fields(self) -> List[str]:
+        return list(self.field_index())
+
+    def references_field(self, field: str) -> bool:
+        return field in self.field_index()
+
+    def predicates_on(self, field: str) -> List['BinaryBooleanExpr']:
+        return list(self.field_index().get(field, ()))
+
+    def rename_field(self, field: str, new_field: str):
+        """
+        Expr.rename_field renames field to new_field in place in all predicates referring to it, touching only the
+        indexed predicates.
+        """
+        if field == new_field:
+            return
+        index = self.field_index()
+        predicates = index.pop(field, None)
+        if not predicates:
+            return
+        for predicate in predicates:
+            if predicate.left.literal == field:
+                predicate.left = SchemaLiteral(new_field)
+                predicate.left.parent = predicate
+            if isinstance(predicate.right, SchemaLiteral) and predicate.right.literal == field:
+                predicate.right = SchemaLiteral(new_field)
+                predicate.right.parent = predicate
+            # the caches of the nodes between the predicate and this node refer to the old field
+            ancestor = predicate
+            while ancestor is not None and ancestor is not self:
+                ancestor.clear_field_index()
+                ancestor = ancestor.parent
+        new_predicates = index.setdefault(new_field, [])
+        indexed = set(map(id, new_predicates))
+        new_predicates.extend(p for p in predicates if id(p) not in indexed)
+        self._implication_summary = None
+        self._negations = None
+
+    def without_field(self, field: str) -> 'Expr':
+        """
+        Expr.without_field returns a copy of the tree with all predicates referring to field eliminated, following the
+        same elimination rules as Expr.transform.
+        """
+        predicates = set(map(id, self.field_index().get(field, ())))
+        if not predicates:
+            return self.transform()
+        return self.transform(lambda e: None if id(e) in predicates else e)
+
+    def implies(self, other: 'Expr') -> bool:
+        """
+        Expr.implies returns whether every row matching this filter matches other as well, so that e.g. the result of a
+        query filtered by this filter can be computed from the cached result of other by filtering it in memory (see the
+        "python" dialect). The check is sound for fields holding scalar values but conservative: it is exact for
+        conjunctions of comparison, In, Null and regex predicates, and False means that the implication could not be
+        proven (see querify.implication).
+        The summary that the check works on is built on first use and cached on this node, and is cleared along with the
+        field index by Expr.clear_field_index.
+        """
+        return self.implication_summary().implies(other.implication_summary())
+
+    def implication_summary(self):
+        summary = self._implication_summary
+        if summary is None:
+            from .implication import Summary
+            summary = self._implication_summary = Summary(self)
+        return summary
+
     @classmethod
     def cls_keys_from_json(cls, json: JsonType):
         if isinstance(json, dict):
@@ -183,8 +449,8 @@ class Expr(Query, metaclass=ClassFromJsonWithSubclassDictMeta):
 
     def iter_expr(self):
         yield self
-        for sub_expr_ref in self.iter_sub_expr_ref():
-            yield from sub_expr_ref.v.iter_expr()
+        for sub_expr in self.iter_sub_expr():
+            yield from sub_expr.iter_expr()
 
     def ancestors(self):
         expr = self
@@ -195,6 +461,13 @@ class Expr(Query, metaclass=ClassFromJsonWithSubclassDictMeta):
     def iter_sub_expr_ref(self):
         return; yield
 
+    def iter_sub_expr(self):
+        """
+        Expr.iter_sub_expr returns the direct sub exprs of this node. Unlike Expr.iter_sub_expr_ref, no reference
+        objects are created, so it is the preferred way of walking a tree read-only.
+        """
+        return [sub_expr_ref.v for sub_expr_ref in self.iter_sub_expr_ref()]
+
 
 class LiteralExpr(Expr):
     base = True
@@ -221,6 +494,9 @@ class LiteralExpr(Expr):
     def init_args_from_json(cls, json):
         return {'literal': json}
 
+    def iter_sub_expr(self):
+        return ()
+
     def __repr__(self, *args, **kwargs):
         return '{}({!r})'.format(type(self).__name__, self.literal)
 
@@ -229,107 +505,26 @@ class StringLiteral(LiteralExpr):
     final = True
     key = str
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return "'{}'".format(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return "'{}'".format(self.literal)
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
-    def to_query_pandas(self) -> str:
-        return "'{}'".format(self.literal)
-
-    def to_query_pluto(self) -> str:
-        return "\"{}\"".format(self.literal)
-
 
 class BooleanLiteral(LiteralExpr):
     final = True
     key = bool
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
-    def to_query_pandas(self) -> str:
-        return repr(self.literal)
-
 
 class IntLiteral(LiteralExpr):
     final = True
     key = int
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
-    def to_query_pandas(self) -> str:
-        return repr(self.literal)
-
-    def to_query_pluto(self) -> str:
-        return repr(self.literal)
-
 
 class FloatLiteral(LiteralExpr):
     final = True
     key = float
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return repr(self.literal)
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
-    def to_query_pandas(self) -> str:
-        return repr(self.literal)
-
-    def to_query_pluto(self) -> str:
-        return repr(self.literal)
-
 
 class DateTimeLiteral(LiteralExpr):
     final = True
     key = datetime
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return "'{:%Y-%m-%dT%H:%M:%SZ}'".format(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return "'{:%Y-%m-%d %H:%M:%S}'".format(self.literal)
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
 
 class RegexLiteral(LiteralExpr):
     final = True
@@ -342,20 +537,9 @@ class RegexLiteral(LiteralExpr):
     def cls_keys_from_json(cls, json):
         yield 'regex'
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return '/{}/'.format(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return "'{}'".format(self.literal)
-
-    def to_query_mongo(self):
-        return re.compile(self.literal)
-
-    def to_query_pluto(self) -> str:
-        return "\"{}\"".format(self.literal)
+    @property
+    def compiled(self):
+        return compile_regex(self.literal)
 
 
 class SchemaLiteral(LiteralExpr):
@@ -369,36 +553,12 @@ class SchemaLiteral(LiteralExpr):
     def cls_keys_from_json(cls, json):
         yield 'schema'
 
-    def to_query_json(self) -> JsonType:
-        return self.literal
-
-    def to_query_influx(self) -> str:
-        return '"{}"'.format(self.literal)
-
-    def to_query_mysql(self) -> str:
-        return self.literal
-
-    def to_query_mongo(self) -> JsonType:
-        return self.literal
-
-    def to_query_pandas(self) -> str:
-        return self.literal
-
-    def to_query_pluto(self) -> str:
-        return self.literal
-
 
 # Operator Expr
 class OperatorExpr(Expr):
     base = True
     key = 'operator_expr'
 
-    operator_influx = None
-    operator_mysql = None
-    operator_mongo = None
-    operator_pandas = None
-    operator_pluto = None
-
     @classmethod
     def normalize_eval_expr_dict(cls, filter: dict) -> dict:
         exprs = []
@@ -408,7 +568,7 @@ class OperatorExpr(Expr):
                     exprs.append({tag: {MatchRegex.key: tag_filter[1:-1]}})
                 else:
                     exprs.append({tag: {EqualValue.key: tag_filter}})
-            elif isinstance(tag_filter, (int, float)):
+            elif isinstance(tag_filter, (int, float, datetime)):
                 exprs.append({tag: {EqualValue.key: tag_filter}})
             elif isinstance(tag_filter, list):
                 if tag == And.key:
@@ -454,7 +614,11 @@ class OperatorExpr(Expr):
         :return:
         :raise: UnrecognizedExprType
         """
-        json = cls.normalize_eval_expr_dict(json)
+        if instrumentation.enabled:
+            with instrumentation.timer('normalize'):
+                json = cls.normalize_eval_expr_dict(json)
+        else:
+            json = cls.normalize_eval_expr_dict(json)
         return type(cls).new_from_json(cls, json)
 
     @classmethod
@@ -487,7 +651,10 @@ class UnaryBooleanExpr(BooleanExpr):
             pass
 
     def iter_sub_expr_ref(self):
-        yield AttrRef(self, 'operand')
+        yield _attr_ref(self, 'operand')
+
+    def iter_sub_expr(self):
+        return self.operand,
 
     def __repr__(self):
         return '{}(operand={})'.format(type(self).__name__, self.operand)
@@ -496,31 +663,24 @@ class UnaryBooleanExpr(BooleanExpr):
 class Not(UnaryBooleanExpr):
     final = True
     key = '__not__'
-    # operator_influx = '<not>'
-    operator_mysql = 'NOT'
-    operator_mongo = '$not'
-    operator_pandas = '~'
-    operator_pluto = 'it is not true that'
-
-    def to_query_json(self) -> JsonType:
-        return {self.key: self.operand.to_query_json()}
 
-    # def to_query_influx(self):
-    #     return '{} {}'.format(self.operator_influx, self.operand.to_query_influx())
-
-    def to_query_mysql(self) -> str:
-        return '{} ({})'.format(self.operator_mysql, self.operand.to_query_mysql())
-
-    def to_query_mongo(self) -> JsonType:
-        tmp_mongo_query = self.operand.to_query_mongo()
-        k, v = next(iter(tmp_mongo_query.items()))
-        return {k: {self.operator_mongo: v}}
-
-    def to_query_pandas(self) -> str:
-        return '{}({})'.format(self.operator_pandas, self.operand.to_query_pandas())
-
-    def to_query_pluto(self) -> str:
-        return '{} {}'.format(self.operator_pluto, self.operand.to_query_pluto())
+    def negation(self, complements: Optional[Dict[type, type]] = None) -> Expr:
+        """
+        Not.negation returns the negation of the operand in negation normal form, see querify.rewrite.negate, so that
+        dialects can render it with complemented predicates. The result shares nodes with this tree and must not be
+        modified. It is built on first use for each table of complements and cached on this node, and is cleared along
+        with the field index by Expr.clear_field_index.
+        """
+        negations = self._negations
+        if negations is None:
+            negations = self._negations = []
+        for table, negation in negations:
+            if table is complements:
+                return negation
+        from .rewrite import negate
+        negation = negate(self.operand, complements)
+        negations.append((complements, negation))
+        return negation
 
 
 class BinaryBooleanExpr(BooleanExpr):
@@ -547,38 +707,11 @@ class BinaryBooleanExpr(BooleanExpr):
 
 class BinaryComparisonExpr(BinaryBooleanExpr):
     def iter_sub_expr_ref(self):
-        yield AttrRef(self, 'left')
-        yield AttrRef(self, 'right')
-
-    def to_query_json(self) -> JsonType:
-        if self.key is None:
-            raise NotImplementedError('generating json from operator "{}" is not implemented'.format(self.key))
-        return {self.left.to_query_json(): {self.key: self.right.to_query_json()}}
-
-    def to_query_influx(self):
-        if self.operator_influx is None:
-            raise NotImplementedError('generating InfluxQL from operator "{}" is not implemented'.format(self.key))
-        return '{} {} {}'.format(self.left.to_query_influx(), self.operator_influx, self.right.to_query_influx())
-
-    def to_query_mysql(self) -> str:
-        if self.operator_mysql is None:
-            raise NotImplementedError('generating MySQL from operator "{}" is not implemented'.format(self.key))
-        return '{} {} {}'.format(self.left.to_query_mysql(), self.operator_mysql, self.right.to_query_mysql())
-
-    def to_query_mongo(self) -> JsonType:
-        if self.operator_mongo is None:
-            raise NotImplementedError('generating MongoDB query from operator "{}" is not implemented'.format(self.key))
-        return {self.left.to_query_mongo(): {self.operator_mongo: self.right.to_query_mongo()}}
-
-    def to_query_pandas(self) -> str:
-        if self.operator_pandas is None:
-            raise NotImplementedError('generating pandas query from operator "{}" is not implemented'.format(self.key))
-        return '{} {} {}'.format(self.left.to_query_pandas(), self.operator_pandas, self.right.to_query_pandas())
+        yield _attr_ref(self, 'left')
+        yield _attr_ref(self, 'right')
 
-    def to_query_pluto(self) -> str:
-        if self.operator_pluto is None:
-            raise NotImplementedError('generating pluto conditions from operator "{}" is not implemented'.format(self.key))
-        return '{} {} {}'.format(self.left.to_query_pluto(), self.operator_pluto, self.right.to_query_pluto())
+    def iter_sub_expr(self):
+        return self.left, self.right
 
 
 class FieldCompareValueExpr(BinaryComparisonExpr):
@@ -604,19 +737,13 @@ class FieldAssertionExpr(BinaryComparisonExpr):
 
 
 class Equal:
-    operator_influx = '='
-    operator_mysql = '='
-    operator_pandas = '=='
-    operator_pluto = 'equals'
+    pass
 
 
-# Inheritance order matters! WHY??
 class EqualValue(Equal, FieldCompareValueExpr):
     final = True
     key = '__eq__'
 
-    operator_mongo = '$eq'
-
 
 class EqualField(Equal, FieldCompareFieldExpr):
     final = True
@@ -624,18 +751,13 @@ class EqualField(Equal, FieldCompareFieldExpr):
 
 
 class NotEqual:
-    operator_influx = '!='
-    operator_mysql = '<>'
-    operator_pandas = '!='
-    operator_pluto = 'does not equal'
+    pass
 
 
 class NotEqualValue(NotEqual, FieldCompareValueExpr):
     final = True
     key = '__neq__'
 
-    operator_mongo = '$ne'
-
 
 class NotEqualField(NotEqual, FieldCompareFieldExpr):
     final = True
@@ -643,18 +765,13 @@ class NotEqualField(NotEqual, FieldCompareFieldExpr):
 
 
 class GreaterThan:
-    operator_influx = '>'
-    operator_mysql = '>'
-    operator_pandas = '>'
-    operator_pluto = 'is more than'
+    pass
 
 
 class GreaterThanValue(GreaterThan, FieldCompareValueExpr):
     final = True
     key = '__gt__'
 
-    operator_mongo = '$gt'
-
 
 class GreaterThanField(GreaterThan, FieldCompareFieldExpr):
     final = True
@@ -662,18 +779,13 @@ class GreaterThanField(GreaterThan, FieldCompareFieldExpr):
 
 
 class GreaterThanOrEqual:
-    operator_influx = '>='
-    operator_mysql = '>='
-    operator_pandas = '>='
-    operator_pluto = 'is at least'
+    pass
 
 
 class GreaterThanOrEqualValue(GreaterThanOrEqual, FieldCompareValueExpr):
     final = True
     key = '__gte__'
 
-    operator_mongo = '$gte'
-
 
 class GreaterThanOrEqualField(GreaterThanOrEqual, FieldCompareFieldExpr):
     final = True
@@ -681,18 +793,13 @@ class GreaterThanOrEqualField(GreaterThanOrEqual, FieldCompareFieldExpr):
 
 
 class LessThan:
-    operator_influx = '<'
-    operator_mysql = '<'
-    operator_pandas = '<'
-    operator_pluto = 'is less than'
+    pass
 
 
 class LessThanValue(LessThan, FieldCompareValueExpr):
     final = True
     key = '__lt__'
 
-    operator_mongo = '$lt'
-
 
 class LessThanField(LessThan, FieldCompareFieldExpr):
     final = True
@@ -700,18 +807,13 @@ class LessThanField(LessThan, FieldCompareFieldExpr):
 
 
 class LessThanOrEqual:
-    operator_influx = '<='
-    operator_mysql = '<='
-    operator_pandas = '<='
-    operator_pluto = 'is at most'
+    pass
 
 
 class LessThanOrEqualValue(LessThanOrEqual, FieldCompareValueExpr):
     final = True
     key = '__lte__'
 
-    operator_mongo = '$lte'
-
 
 class LessThanOrEqualField(LessThanOrEqual, FieldCompareFieldExpr):
     final = True
@@ -721,55 +823,30 @@ class LessThanOrEqualField(LessThanOrEqual, FieldCompareFieldExpr):
 class MatchRegex(FieldCompareValueExpr):
     final = True
     key = '__regex__'
-    operator_influx = '=~'
-    operator_mysql = 'REGEXP'
 
     def __init__(self, left, right):
         super().__init__(left, right)
         self.right = RegexLiteral._from_json(right)
 
-    def to_query_mongo(self) -> JsonType:
-        return {self.left.to_query_mongo(): self.right.to_query_mongo()}
-
 
 class InverseMatchRegex(FieldCompareValueExpr):
     final = True
     key = '__iregex__'
-    operator_influx = '!~'
-    operator_mysql = 'NOT REGEXP'
 
     def __init__(self, left, right):
         super().__init__(left, right)
         self.right = RegexLiteral._from_json(right)
 
-    def to_query_mongo(self) -> JsonType:
-        return {self.left.to_query_mongo(): {'$not': self.right.to_query_mongo()}}
-
 
 class Null(FieldAssertionExpr):
     final = True
     key = '__null__'
 
-    def to_query_mysql(self) -> str:
-        return '{} {}'.format(self.left.to_query_mysql(), 'is NULL' if self.right.literal else 'is NOT NULL')
-
-    def to_query_mongo(self) -> JsonType:
-        return {self.left.to_query_mongo(): {'$eq' if self.right.literal else '$ne': None}}
-
-    def to_query_pandas(self) -> str:
-        return '{}pandas.isnull({})'.format('' if self.right.literal else '~', self.left.to_query_pandas())
-
-    def to_query_pluto(self) -> str:
-        return '{} {}'.format(self.left.to_query_pluto(), 'is null' if self.right.literal else 'is not null')
-
 
 class Missing(FieldAssertionExpr):
     final = True
     key = '__missing__'
 
-    def to_query_mongo(self) -> JsonType:
-        return {self.left.to_query_mongo(): {'$exists': not self.right.literal}}
-
 
 class FieldCompareListExpr(BinaryBooleanExpr):
     def __init__(self, left: Union[SchemaLiteral, str], right: List[Union[LiteralExpr, JsonValueType]]):
@@ -782,28 +859,12 @@ class FieldCompareListExpr(BinaryBooleanExpr):
         return type(self)(self.left, list(self.right))
 
     def iter_sub_expr_ref(self):
-        yield AttrRef(self, 'left')
+        yield _attr_ref(self, 'left')
         for i, expr in enumerate(self.right):
-            yield ItemRef(self.right, i)
+            yield _item_ref(self.right, i)
 
-    def to_query_json(self) -> JsonType:
-        return {self.left.to_query_json(): {self.key: [e.to_query_json() for e in self.right]}}
-
-    def to_query_influx(self) -> str:
-        return self.equivalent_fallback_expr().to_query_influx()
-
-    def to_query_mysql(self) -> str:
-        return '{} {} ({})'.format(self.left.to_query_mysql(), self.operator_mysql,
-                                   ', '.join(e.to_query_mysql() for e in self.right))
-
-    def to_query_mongo(self) -> JsonType:
-        return {self.left.to_query_mongo(): {self.operator_mongo: [e.to_query_mongo() for e in self.right]}}
-
-    def to_query_pandas(self):
-        return self.equivalent_fallback_expr().to_query_pandas()
-
-    def to_query_pluto(self) -> str:
-        return self.equivalent_fallback_expr().to_query_pluto()
+    def iter_sub_expr(self):
+        return [self.left] + self.right
 
     def equivalent_fallback_expr(self):
         raise NotImplementedError('No fallback equivalent exprs for {}'.format(self))
@@ -813,9 +874,6 @@ class In(FieldCompareListExpr):
     final = True
     key = '__in__'
 
-    operator_mysql = 'IN'
-    operator_mongo = '$in'
-
     def equivalent_fallback_expr(self):
         return Or([EqualValue(self.left, e) for e in self.right])
 
@@ -824,9 +882,6 @@ class NotIn(FieldCompareListExpr):
     final = True
     key = '__nin__'
 
-    operator_mysql = 'NOT IN'
-    operator_mongo = '$nin'
-
     def equivalent_fallback_expr(self):
         return And([NotEqualValue(self.left, e) for e in self.right])
 
@@ -842,36 +897,6 @@ class LogicalExpr(BooleanExpr):
     def __copy__(self):
         return type(self)(list(self.exprs))
 
-    def to_query_json(self) -> JsonType:
-        if self.key is None:
-            raise NotImplementedError('generating json from operator "{}" is not implemented'.format(self.key))
-        return {self.key: [e.to_query_json() for e in self.exprs]}
-
-    def to_query_influx(self):
-        if self.operator_influx is None:
-            raise NotImplementedError('generating InfluxQL from operator "{}" is not implemented'.format(self.key))
-        return ' {} '.format(self.operator_influx).join('(' + e.to_query_influx() + ')' for e in self.exprs)
-
-    def to_query_mysql(self):
-        if self.operator_mysql is None:
-            raise NotImplementedError('generating MySQL from operator "{}" is not implemented'.format(self.key))
-        return ' {} '.format(self.operator_mysql).join('(' + e.to_query_mysql() + ')' for e in self.exprs)
-
-    def to_query_mongo(self) -> JsonType:
-        if self.operator_mongo is None:
-            raise NotImplementedError('generating MongoDB query from operator "{}" is not implemented'.format(self.key))
-        return {self.operator_mongo: [e.to_query_mongo() for e in self.exprs]}
-
-    def to_query_pandas(self) -> str:
-        if self.operator_pandas is None:
-            raise NotImplementedError('generating pandas query from operator "{}" is not implemented'.format(self.key))
-        return ' {} '.format(self.operator_pandas).join('(' + e.to_query_pandas() + ')' for e in self.exprs)
-
-    def to_query_pluto(self) -> str:
-        if self.operator_pluto is None:
-            raise NotImplementedError('generating pluto conditions from operator "{}" is not implemented'.format(self.key))
-        return ' {} '.format(self.operator_pluto).join('(' + e.to_query_pluto() + ')' for e in self.exprs)
-
     def __repr__(self):
         return '{}({!r})'.format(type(self).__name__, self.exprs)
 
@@ -886,7 +911,7 @@ class LogicalExpr(BooleanExpr):
             transformed_sub_exprs = (e.transform(transform_fn) for e in self.exprs)
             transformed_sub_exprs = [e for e in transformed_sub_exprs if not (isinstance(e, And) and len(e) == 0)]
             transformed_self = type(self)(transformed_sub_exprs)
-        return transformed_self
+        return self._carry_field_index(transformed_self)
 
     @classmethod
     def init_args_from_json(cls, json):
@@ -898,15 +923,14 @@ class LogicalExpr(BooleanExpr):
 
     def iter_sub_expr_ref(self):
         for i, expr in enumerate(self.exprs):
-            yield ItemRef(self.exprs, i)
+            yield _item_ref(self.exprs, i)
+
+    def iter_sub_expr(self):
+        return self.exprs
 
 
 class And_(LogicalExpr):
-    operator_influx = 'AND'
-    operator_mysql = 'AND'
-    operator_mongo = '$and'
-    operator_pandas = '&'
-    operator_pluto = 'and'
+    pass
 
 
 class And(And_):
@@ -918,17 +942,9 @@ class All(And_):
     final = True
     key = '__all__'
 
-    def to_query_pluto(self):
-        return 'all of the following conditions are true :\n' + \
-               '\n'.join(sorted('      - (' + e.to_query_pluto() + ')' for e in self.exprs))
-
 
 class Or_(LogicalExpr):
-    operator_influx = 'OR'
-    operator_mysql = 'OR'
-    operator_mongo = '$or'
-    operator_pandas = '|'
-    operator_pluto = 'or'
+    pass
 
 
 class Or(Or_):
@@ -940,78 +956,162 @@ class Any(Or_):
     final = True
     key = '__any__'
 
-    def to_query_pluto(self):
-        return 'any of the following conditions is true :\n' + \
-               '\n'.join(sorted('      - (' + e.to_query_pluto() + ')' for e in self.exprs))
-
 
 # Statement
 class Stmt(Query):
     pass
 
 
+class OrderBy:
+    def __init__(self, field: Union[SchemaLiteral, str], descending: bool = False):
+        self.field = SchemaLiteral._from_json(field)
+        self.descending = descending
+
+    def __repr__(self):
+        return '{}({!r}, descending={!r})'.format(type(self).__name__, self.field.literal, self.descending)
+
+
 class Select(Stmt):
     def __init__(self, table: Union[SchemaLiteral, str],
                  retention_policy: Optional[Union[SchemaLiteral, str]] = None,
                  db: Optional[Union[SchemaLiteral, str]] = None,
                  columns: Optional[List[Union[SchemaLiteral, str]]] = None,
-                 where: Optional[Union[BooleanExpr, JsonObjectType]] = None):
+                 where: Optional[Union[BooleanExpr, JsonObjectType]] = None,
+                 order_by: Optional[List[Union[OrderBy, SchemaLiteral, str]]] = None,
+                 limit: Optional[int] = None):
         super().__init__()
         self.table = SchemaLiteral._from_json(table)
         self.retention_policy = retention_policy and SchemaLiteral._from_json(retention_policy)
         self.db = db and SchemaLiteral._from_json(db)
         self.columns = columns and [SchemaLiteral._from_json(c) for c in columns]
         self.where = where and BooleanExpr._from_json(where)
+        self.order_by = order_by and [o if isinstance(o, OrderBy) else OrderBy(o) for o in order_by]
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise InvalidQuery('The limit must be a non-negative integer, got {!r}.'.format(limit))
+        self.limit = limit
 
     def __copy__(self):
-        return type(self)(self.table, self.retention_policy, self.db, self.columns, self.where)
+        return type(self)(self.table, self.retention_policy, self.db, self.columns, self.where, self.order_by,
+                          self.limit)
 
-    def to_query_influx(self):
-        if self.columns:
-            ql_select = 'SELECT ' + ','.join(c.to_query_influx() for c in self.columns)
-        else:
-            ql_select = 'SELECT *'
-
-        if self.db:
-            if self.retention_policy:
-                ql_db = self.db.to_query_influx() + '.' + self.retention_policy.to_query_influx() + '.' + self.table.to_query_influx()
-            else:
-                ql_db = self.db.to_query_influx() + '..' + self.table.to_query_influx()
-        elif self.retention_policy:
-            ql_db = self.retention_policy.to_query_influx() + '.' + self.table.to_query_influx()
-        else:
-            ql_db = self.table.to_query_influx()
-        ql_from = ' FROM ' + ql_db
-
-        if self.where:
-            ql_where = self.where.to_query_influx()
-            if ql_where:
-                ql_where = ' WHERE ' + ql_where
-        else:
-            ql_where = ''
-
-        return ql_select + ql_from + ql_where
-
-    def to_query_mysql(self):
-        if self.columns:
-            ql_select = 'SELECT ' + ','.join(c.to_query_mysql() for c in self.columns)
+    def project(self, consumers: Iterable[str] = (), residual: Optional[Expr] = None,
+                include_where: bool = False) -> 'Select':
+        """
+        Return a copy of the statement that only selects the columns it needs (see querify.projection.required_columns)
+        instead of all columns. The statement is copied as it is if no column is needed.
+        """
+        from .projection import required_columns
+        statement = copy(self)
+        columns = required_columns(self, consumers, residual, include_where)
+        if columns:
+            statement.columns = [SchemaLiteral(c) for c in columns]
+        return statement
+
+    def seek_after(self, values: Union[List, Dict[str, Any]]) -> 'Select':
+        """
+        Return a copy of the statement that selects the rows after the row with the given values of the order_by fields
+        (a list in the order of order_by, or a dict by field name), i.e. the next page of keyset pagination. Unlike an
+        offset, the seek predicate lets the database start reading right after the previous page, given an index on the
+        order_by fields. For the pages not to skip or repeat rows, the order has to be total, e.g. end with a unique id.
+        For order_by a, b the predicate is a >= x AND (a > x OR (a = x AND b > y)), where the redundant first bound
+        allows a range scan on a, and the comparisons are reversed for descending fields.
+        """
+        if not self.order_by:
+            raise InvalidQuery('Seeking requires order_by.')
+        fields = [o.field.literal for o in self.order_by]
+        if isinstance(values, dict):
+            missing = [f for f in fields if f not in values]
+            if missing:
+                raise InvalidQuery('Seeking by {} requires values of {}, got {!r}.'.format(fields, missing, values))
+            values = [values[f] for f in fields]
+        if len(values) != len(fields):
+            raise InvalidQuery('Seeking by {} requires {} values, got {!r}.'.format(fields, len(fields), values))
+        if any(v is None for v in values):
+            raise InvalidQuery('Cannot seek after null values {!r}.'.format(values))
+        branches = []
+        for i, order in enumerate(self.order_by):
+            after = LessThanValue if order.descending else GreaterThanValue
+            exprs = [EqualValue(f, v) for f, v in zip(fields[:i], values[:i])] + [after(fields[i], values[i])]
+            branches.append(And(exprs) if len(exprs) > 1 else exprs[0])
+        exprs = [self.where.transform()] if self.where else []
+        if len(branches) > 1:
+            first = LessThanOrEqualValue if self.order_by[0].descending else GreaterThanOrEqualValue
+            exprs += [first(fields[0], values[0]), Or(branches)]
         else:
-            ql_select = 'SELECT *'
+            exprs += branches
+        statement = copy(self)
+        statement.where = And(exprs) if len(exprs) > 1 else exprs[0]
+        statement.where.link_parents()
+        return statement
 
-        if self.db:
-            ql_db = self.db.to_query_mysql() + '.' + self.table.to_query_mysql()
-        else:
-            ql_db = self.table.to_query_mysql()
-        ql_from = ' FROM ' + ql_db
+    def time_range(self, field: str = 'time') -> 'Interval':
+        """
+        Return the interval of time (see querify.bounds.Interval) that the where clause can select, from its comparisons
+        of field with datetimes.
+        """
+        from .bounds import field_bounds
+        return field_bounds(self.where, field)
 
-        if self.where:
-            ql_where = self.where.to_query_mysql()
-            if ql_where:
-                ql_where = ' WHERE ' + ql_where
-        else:
-            ql_where = ''
+    def route_retention_policy(self, policies: List['RetentionPolicy'], resolution: Optional[timedelta] = None,
+                               now: Optional[datetime] = None, field: str = 'time') -> 'Select':
+        """
+        Return a copy of the statement that reads from the cheapest of policies (see querify.retention) covering its
+        time range at the given resolution. The retention policy is left as it is if none of the policies fits.
+        """
+        from .retention import choose_retention_policy
+        policy = choose_retention_policy(policies, self.time_range(field), resolution, now)
+        routed = copy(self)
+        if policy is not None:
+            routed.retention_policy = SchemaLiteral(policy.name)
+        return routed
+
+    def split_by_time(self, field: str, step: timedelta) -> List['Select']:
+        """
+        Split the statement into statements over consecutive, non-overlapping time ranges of length step, which together
+        select exactly the rows of the original statement and can be run in parallel (see querify.execution). The time
+        range of the where clause must be bounded on both sides.
+        """
+        if not isinstance(step, timedelta):
+            raise InvalidQuery('The step of splitting by time must be a timedelta, got {!r}.'.format(step))
+        if step <= timedelta(0):
+            raise InvalidQuery('The step of splitting must be positive, got {!r}.'.format(step))
+        return self._split(field, step)
 
-        return ql_select + ql_from + ql_where
+    def split_by_range(self, field: str, step: int) -> List['Select']:
+        """
+        Like Select.split_by_time, but for a field of integers, e.g. an auto incremented id.
+        """
+        if not isinstance(step, int) or isinstance(step, bool):
+            raise InvalidQuery('The step of splitting by range must be an integer, got {!r}.'.format(step))
+        if step <= 0:
+            raise InvalidQuery('The step of splitting must be positive, got {!r}.'.format(step))
+        return self._split(field, step)
+
+    def _split(self, field, step):
+        interval = self.time_range(field)
+        if not interval.bounded:
+            raise InvalidQuery('Cannot split on "{}" whose range {!r} is unbounded.'.format(field, interval))
+        if interval.empty:
+            return []
+        # A closed upper end is kept in the last range instead of getting a range of its own.
+        boundaries = []
+        boundary = interval.lower + step
+        while boundary < interval.upper:
+            boundaries.append(boundary)
+            boundary += step
+        # The where clause itself bounds the first and last ranges, so only the boundaries in between are added.
+        statements = []
+        for lower, upper in zip([None] + boundaries, boundaries + [None]):
+            exprs = [self.where.transform()]
+            if lower is not None:
+                exprs.append(GreaterThanOrEqualValue(field, lower))
+            if upper is not None:
+                exprs.append(LessThanValue(field, upper))
+            statement = copy(self)
+            statement.where = And(exprs) if len(exprs) > 1 else exprs[0]
+            statement.where.link_parents()
+            statements.append(statement)
+        return statements
 
 
 class ShowTagKeys(Stmt):
@@ -1028,29 +1128,6 @@ class ShowTagKeys(Stmt):
     def __copy__(self):
         return type(self)(self.measurement, self.retention_policy, self.db, self.where)
 
-    def to_query_influx(self):
-        if self.db:
-            ql_on = ' ON ' + self.db.to_query_influx()
-        else:
-            ql_on = ''
-
-        if self.measurement:
-            if self.retention_policy:
-                ql_from = ' FROM ' + self.retention_policy.to_query_influx() + '.' + self.measurement.to_query_influx()
-            else:
-                ql_from = ' FROM ' + self.measurement.to_query_influx()
-        else:
-            ql_from = ''
-
-        if self.where:
-            ql_where = self.where.to_query_influx()
-            if ql_where:
-                ql_where = ' WHERE ' + ql_where
-        else:
-            ql_where = ''
-
-        return 'SHOW TAG KEYS' + ql_on + ql_from + ql_where
-
 
 class ShowColumns(Stmt):
     def __init__(self, table: Union[SchemaLiteral, str], db: Optional[Union[SchemaLiteral, str]] = None):
@@ -1061,20 +1138,19 @@ class ShowColumns(Stmt):
     def __copy__(self):
         return type(self)(self.table, self.db)
 
-    def to_query_influx(self):
-        if self.db:
-            ql_on = ' ON ' + self.db.to_query_influx()
-        else:
-            ql_on = ''
 
-        ql_from = ' FROM ' + self.table.to_query_influx()
+class _LazyReferencesModule(types.ModuleType):
+    """
+    The class of the querify and querify.querify modules, which still provide AttrRef and ItemRef of qutils.models, but
+    only import them on first access. Unlike a module level __getattr__, which requires Python 3.7, assigning the
+    class of a module works on Python 3.5.
+    """
 
-        return 'SHOW TAG KEYS' + ql_on + ql_from
+    def __getattr__(self, name):
+        if name in ('AttrRef', 'ItemRef'):
+            from qutils import models
+            return getattr(models, name)
+        raise AttributeError('module {!r} has no attribute {!r}'.format(self.__name__, name))
 
-    def to_query_mysql(self):
-        if self.db:
-            ql_from = ' FROM ' + self.db.to_query_mysql() + '.' + self.table.to_query_mysql()
-        else:
-            ql_from = ' FROM ' + self.table.to_query_mysql()
 
-        return 'SHOW COLUMNS' + ql_from
+sys.modules[__name__].__class__ = _LazyReferencesModule
@@ -0,0 +1,56 @@
+"""
+Routing of Influx queries to the cheapest retention policy that still holds the queried time range.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Iterable
+
+from .bounds import Interval
+
+
+class RetentionPolicy:
+    """
+    Local description of a retention policy: how long data is kept (duration, None for forever) and the interval of the
+    points it holds (resolution, None for raw data).
+    """
+
+    def __init__(self, name: str, duration: Optional[timedelta] = None, resolution: Optional[timedelta] = None):
+        self.name = name
+        self.duration = duration
+        self.resolution = resolution
+
+    def __repr__(self):
+        return '{}({!r}, duration={!r}, resolution={!r})'.format(
+            type(self).__name__, self.name, self.duration, self.resolution)
+
+    def covers(self, interval: Interval, now: datetime) -> bool:
+        """
+        Whether the policy still holds data for the whole interval at the time now. Naive datetimes are in UTC, as in
+        InfluxQL, so that they can be compared with aware ones.
+        """
+        if self.duration is None:
+            return True
+        return isinstance(interval.lower, datetime) and _utc(interval.lower) >= _utc(now) - self.duration
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def choose_retention_policy(policies: Iterable[RetentionPolicy], interval: Interval,
+                            resolution: Optional[timedelta] = None,
+                            now: Optional[datetime] = None) -> Optional[RetentionPolicy]:
+    """
+    Choose the cheapest policy for a query over interval, i.e. the one with the coarsest resolution among the policies
+    that cover the interval and are not coarser than resolution (the resolution the query needs, e.g. its GROUP BY time
+    interval, None for raw data). Ties are broken in favor of the shortest duration. Return None if no policy fits.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    zero = timedelta(0)
+    candidates = [p for p in policies
+                  if p.covers(interval, now) and
+                  (p.resolution is None or resolution is not None and p.resolution <= resolution)]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: (p.resolution or zero,
+                                          -(p.duration.total_seconds()) if p.duration is not None else float('-inf')))
@@ -0,0 +1,293 @@
+"""
+Rewrite passes over expr trees. Every pass returns a new tree and leaves its input untouched.
+"""
+import sys
+from copy import copy
+from typing import Dict, Optional, Tuple
+
+from .querify import Expr, LiteralExpr, Not, LogicalExpr, And, Or, All, Any, BinaryBooleanExpr, BinaryComparisonExpr, \
+    FieldAssertionExpr, FieldCompareListExpr, EqualValue, NotEqualValue, GreaterThanValue, GreaterThanOrEqualValue, \
+    LessThanValue, LessThanOrEqualValue, EqualField, NotEqualField, GreaterThanField, GreaterThanOrEqualField, \
+    LessThanField, LessThanOrEqualField, MatchRegex, InverseMatchRegex, Null, Missing, In, NotIn
+
+
+def _symmetric(pairs):
+    complements = {}
+    for a, b in pairs:
+        complements[a] = b
+        complements[b] = a
+    return complements
+
+
+# Complements of predicates that hold exactly in both directions, including for null and missing fields, e.g.
+# NOT (a = 1) and a <> 1 in SQL as well as in MongoDB. FieldAssertionExpr classes map to themselves and are complemented
+# by flipping their operand.
+MISSING_SAFE_COMPLEMENTS = _symmetric([
+    (EqualValue, NotEqualValue),
+    (EqualField, NotEqualField),
+    (MatchRegex, InverseMatchRegex),
+    (In, NotIn),
+])
+MISSING_SAFE_COMPLEMENTS.update({Null: Null, Missing: Missing})
+
+# Complements under the three-valued logic of SQL, where a comparison with NULL is unknown in both directions. Order
+# comparisons are not complements in MongoDB or pandas, since {a: {$lte: 1}} does not match documents without a,
+# while {a: {$not: {$gt: 1}}} does.
+COMPLEMENTS = _symmetric([
+    (GreaterThanValue, LessThanOrEqualValue),
+    (GreaterThanOrEqualValue, LessThanValue),
+    (GreaterThanField, LessThanOrEqualField),
+    (GreaterThanOrEqualField, LessThanField),
+])
+COMPLEMENTS.update(MISSING_SAFE_COMPLEMENTS)
+
+DUALS = {And: Or, Or: And, All: Any, Any: All}
+
+
+def push_negations(expr: Expr, complements: Optional[Dict[type, type]] = None) -> Expr:
+    """
+    Rewrite expr into negation normal form: Not is pushed down through And / Or by De Morgan's laws, double negations
+    cancel out, and negated predicates are replaced with their complements, e.g. NOT (a > 1) with a <= 1, so that the
+    result can use indexes on a. Not only remains on predicates without a complement in complements (COMPLEMENTS by
+    default).
+    """
+    result = _push(expr, False, COMPLEMENTS if complements is None else complements, _copy)
+    result.link_parents()
+    return result
+
+
+def negate(expr: Expr, complements: Optional[Dict[type, type]] = None) -> Expr:
+    """
+    Return the negation of expr in negation normal form, see push_negations. Unlike push_negations, the result shares
+    its field names, values and unchanged predicates with expr and its parents are not linked, so it is cheap enough
+    to be built on every rendering, but must not be modified.
+    """
+    return _push(expr, True, COMPLEMENTS if complements is None else complements, _share)
+
+
+def _share(expr):
+    return expr
+
+
+def _copy(expr):
+    # Copy a predicate or a literal. Unlike Expr.transform, no reference objects are involved.
+    if isinstance(expr, LiteralExpr):
+        return copy(expr)
+    if isinstance(expr, FieldCompareListExpr):
+        return type(expr)(copy(expr.left), [copy(e) for e in expr.right])
+    if isinstance(expr, BinaryComparisonExpr):
+        return type(expr)(copy(expr.left), copy(expr.right))
+    return expr.transform()
+
+
+def _push(expr, negated, complements, copy_expr):
+    if isinstance(expr, Not):
+        return _push(expr.operand, not negated, complements, copy_expr)
+    if isinstance(expr, LogicalExpr):
+        if not expr.exprs:
+            return And([])
+        cls = DUALS[type(expr)] if negated else type(expr)
+        return cls([_push(e, negated, complements, copy_expr) for e in expr.exprs])
+    if not negated:
+        return copy_expr(expr)
+    complement = complements.get(type(expr))
+    if complement is None or not isinstance(expr, BinaryBooleanExpr):
+        return Not(copy_expr(expr))
+    if isinstance(expr, FieldAssertionExpr):
+        return complement(copy_expr(expr.left), not expr.right.literal)
+    if isinstance(expr, FieldCompareListExpr):
+        return complement(copy_expr(expr.left), [copy_expr(e) for e in expr.right])
+    return complement(copy_expr(expr.left), copy_expr(expr.right))
+
+
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+# Quantifiers that allow the preceding character to be absent or repeated a bounded number of times, so that the
+# character is not part of the literal prefix.
+OPTIONAL_QUANTIFIERS = set('*?{')
+END_ANCHORS = ('$', '\\Z')
+
+
+def rewrite_prefix_regexes(expr: Expr) -> Expr:
+    """
+    Rewrite regex matches with an anchored literal prefix into predicates that can use B-tree indexes:
+    {a: "/^abc$/"} becomes {a: "abc"}, {a: "/^abc/"} becomes {a: {__gte__: "abc", __lt__: "abd"}}, and any further
+    structure of the pattern is kept as a residual regex next to the range, e.g. {a: "/^abc[0-9]+/"} becomes
+    {a: {__gte__: "abc", __lt__: "abd", __regex__: "^abc[0-9]+"}}. Likewise, {a: {__iregex__: "^abc$"}} becomes
+    {a: {__neq__: "abc"}}.
+    The rewrite assumes that the fields are strings compared by code point, as with binary collations, and that "$" is
+    not expected to match before a trailing newline.
+    """
+    def rewrite(e):
+        if isinstance(e, (MatchRegex, InverseMatchRegex)):
+            return _rewrite_regex(e) or e
+        return e
+
+    result = expr.transform(rewrite)
+    result.link_parents()
+    return result
+
+
+def _rewrite_regex(expr):
+    pattern = expr.right.literal
+    split = split_anchored_prefix(pattern)
+    if split is None:
+        return None
+    prefix, rest = split
+    if not prefix:
+        return None
+    if rest in END_ANCHORS:
+        cls = EqualValue if isinstance(expr, MatchRegex) else NotEqualValue
+        return cls(expr.left.transform(), prefix)
+    if isinstance(expr, InverseMatchRegex):
+        return None
+    exprs = [GreaterThanOrEqualValue(expr.left.transform(), prefix)]
+    upper = successor(prefix)
+    if upper is not None:
+        exprs.append(LessThanValue(expr.left.transform(), upper))
+    if rest:
+        exprs.append(MatchRegex(expr.left.transform(), pattern))
+    return And(exprs)
+
+
+def split_anchored_prefix(pattern: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a regex anchored at the start into the literal prefix that every match starts with and the rest of the
+    pattern, e.g. "^ab\\.c+d" into ("ab.c", "+d"). Return None if the pattern is not anchored or may match without
+    the prefix, i.e. has inline flags or a top level alternation.
+    """
+    if not pattern.startswith('^') or '(?' in pattern or _has_top_level_alternation(pattern):
+        return None
+    chars = []
+    i = 1
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            literal, width = pattern[i + 1], 2
+        elif c in REGEX_METACHARACTERS:
+            break
+        else:
+            literal, width = c, 1
+        if pattern[i + width:i + width + 1] in OPTIONAL_QUANTIFIERS:
+            break
+        chars.append(literal)
+        i += width
+    return ''.join(chars), pattern[i:]
+
+
+def _has_top_level_alternation(pattern):
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def successor(prefix: str) -> Optional[str]:
+    """
+    Return the smallest string greater than every string starting with prefix, or None if there is none.
+    """
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            code = 0xE000
+        if code <= sys.maxunicode:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+# The side of the range that a comparison bounds, and whether the bound is exclusive.
+BOUND_SIDES = {
+    GreaterThanValue: ('lower', True),
+    GreaterThanOrEqualValue: ('lower', False),
+    LessThanValue: ('upper', True),
+    LessThanOrEqualValue: ('upper', False),
+}
+
+
+def normalize(expr: Expr) -> Expr:
+    """
+    Rewrite expr into a canonical form, so that filters that only differ in the order of their children, in redundant
+    nesting or in redundant predicates become identical, e.g. for cache keys (see querify.cache): negations are pushed
+    down where it is safe for null and missing fields, nested And / Or of the same kind are flattened, and children of
+    And / Or as well as the values of In / NotIn are deduplicated and sorted. Within an And, several lower (or upper)
+    bounds of a field are reduced to the tightest one.
+    """
+    result = _normalize(push_negations(expr, MISSING_SAFE_COMPLEMENTS))
+    result.link_parents()
+    return result
+
+
+def _normalize(expr):
+    if isinstance(expr, LogicalExpr):
+        exprs = []
+        for e in expr.exprs:
+            e = _normalize(e)
+            if type(e) is type(expr):
+                exprs.extend(e.exprs)
+            else:
+                exprs.append(e)
+        if isinstance(expr, (And, All)):
+            exprs = _merge_bounds(exprs)
+        exprs = sorted({e.to_bytes(): e for e in exprs}.items())
+        if len(exprs) == 1:
+            return exprs[0][1]
+        return type(expr)([e for _, e in exprs])
+    if isinstance(expr, Not):
+        return Not(_normalize(expr.operand))
+    if isinstance(expr, (In, NotIn)):
+        values = list({(type(e), e.literal): e for e in expr.right}.values())
+        try:
+            values.sort(key=lambda e: e.literal)
+        except TypeError:
+            values.sort(key=lambda e: type(e).__name__)
+        return type(expr)(copy(expr.left), [copy(e) for e in values])
+    return _copy(expr)
+
+
+def _merge_bounds(exprs):
+    merged = []
+    positions = {}
+    for e in exprs:
+        side = BOUND_SIDES.get(type(e))
+        if side is None:
+            merged.append(e)
+            continue
+        key = e.left.literal, side[0]
+        position = positions.get(key)
+        if position is None:
+            positions[key] = len(merged)
+            merged.append(e)
+            continue
+        try:
+            merged[position] = _tighter_bound(merged[position], e)
+        except TypeError:
+            merged.append(e)
+    return merged
+
+
+def _tighter_bound(a, b):
+    side, a_exclusive = BOUND_SIDES[type(a)]
+    a_value, b_value = a.right.literal, b.right.literal
+    if a_value == b_value:
+        return a if a_exclusive else b
+    if side == 'lower':
+        return a if a_value > b_value else b
+    return a if a_value < b_value else b
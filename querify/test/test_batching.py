@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from ..querify import Select
+from ..batching import BatchSelect
+from ..errors import InvalidQuery
+
+
+ROWS = [(1, 'a', 10, None), (2, 'b', 20, 'x'), (3, 'a', 30, 'y'), (4, 'c', None, 'x'), (5, None, 50, None)]
+
+
+def connect():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE events (id INTEGER, kind TEXT, value INTEGER, tag TEXT)')
+    connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?)', ROWS)
+    return connection
+
+
+def selects():
+    return [
+        Select(table='events', columns=['id'], where={'kind': 'a'}),
+        Select(table='events', columns=['id', 'tag'], where={'value': {'__gte__': 20}, 'tag': {'__neq__': 'y'}}),
+        Select(table='events', columns=['id', 'value'], where={'__or__': [{'tag': {'__null__': True}}, {'kind': 'c'}]}),
+        Select(table='events', columns=['id'], where={'kind': 'z'}),
+    ]
+
+
+def test_render():
+    batch = BatchSelect([Select(table='t', columns=['a'], where={'a': 1}),
+                         Select(table='t', columns=['b'], where={'b': {'__gt__': 2}})])
+    assert batch.to_query('mysql') == 'SELECT a,b,(a = 1) AS _f0,(b > 2) AS _f1 FROM t WHERE (a = 1) OR (b > 2)'
+    assert batch.to_query('sqlite') == (
+        'SELECT "a", "b", ("a" = ?) AS "_f0", ("b" > ?) AS "_f1" FROM "t" WHERE ("a" = ?) OR ("b" > ?)', [1, 2, 1, 2])
+    assert batch.to_query('mongo') == [
+        {'$match': {'$or': [{'a': {'$eq': 1}}, {'b': {'$gt': 2}}]}},
+        {'$facet': {'_f0': [{'$match': {'a': {'$eq': 1}}}, {'$project': {'a': 1, '_id': 0}}],
+                    '_f1': [{'$match': {'b': {'$gt': 2}}}, {'$project': {'b': 1, '_id': 0}}]}},
+    ]
+    assert batch.select.to_query('influx') == 'SELECT "a","b" FROM "t" WHERE ("a" = 1) OR ("b" > 2)'
+
+    # a Select without filter matches all rows
+    batch = BatchSelect([Select(table='t', where={'a': 1}), Select(table='t')])
+    assert batch.where is None
+    assert batch.to_query('mysql') == 'SELECT t.*,(a = 1) AS _f0,(TRUE) AS _f1 FROM t'
+    assert batch.to_query('mongo') == [{'$facet': {'_f0': [{'$match': {'a': {'$eq': 1}}}], '_f1': [{'$match': {}}]}}]
+
+
+def test_demultiplex():
+    connection = connect()
+    expected = []
+    for select in selects():
+        sql, params = select.to_query('sqlite')
+        expected.append(sorted(connection.execute(sql, params).fetchall()))
+
+    batch = BatchSelect(selects())
+    sql, params = batch.to_query('sqlite')
+    results = batch.demultiplex_labeled(connection.execute(sql, params).fetchall())
+    assert [sorted(r) for r in results] == expected
+
+    sql, params = batch.select.to_query('sqlite')
+    results = batch.demultiplex(connection.execute(sql, params).fetchall())
+    assert [sorted(r) for r in results] == expected
+
+    # rows of all columns as mappings
+    batch = BatchSelect([Select(table='events', where={'kind': 'a'}), Select(table='events', where={'tag': 'x'})])
+    connection.row_factory = sqlite3.Row
+    sql, params = batch.select.to_query('sqlite')
+    rows = [dict(row) for row in connection.execute(sql, params)]
+    assert [[r['id'] for r in result] for result in batch.demultiplex(rows)] == [[1, 3], [2, 4]]
+    sql, params = batch.to_query('sqlite')
+    rows = [dict(row) for row in connection.execute(sql, params)]
+    assert [[sorted(r) for r in result] for result in batch.demultiplex_labeled(rows)] == \
+        [[['id', 'kind', 'tag', 'value']] * 2] * 2
+
+
+def test_invalid():
+    with pytest.raises(InvalidQuery):
+        BatchSelect([])
+    with pytest.raises(InvalidQuery):
+        BatchSelect([Select(table='t', where={'a': 1}), Select(table='u', where={'a': 2})])
+    with pytest.raises(InvalidQuery):
+        BatchSelect([Select(table='t', where={'a': 1}, limit=10)])
+    batch = BatchSelect([Select(table='t', where={'a': 1})])
+    with pytest.raises(InvalidQuery):
+        batch.demultiplex([(1,)])
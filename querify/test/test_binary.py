@@ -0,0 +1,102 @@
+import pickle
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from qutils.functions import deep_equal
+
+from ..querify import Expr, And, OperatorExpr, FieldCompareListExpr
+from ..errors import InvalidEncoding, InvalidQuery
+from .. import binary
+
+
+query_json = {
+    'rule_id': [6666, -7777, 2 ** 70],
+    'act_type': {'__nin__': ['logging', 'eval']},
+    'tags': ['a', 1, 2.5, datetime(2015, 1, 1)],
+    'expected_fire_volume': 10000,
+    'expected_fire_rate': 99.9,
+    'rule_owner': 'me',
+    'rule_writer': {'__neqf__': 'rule_owner', '__null__': False},
+    'deleted': {'__missing__': True},
+    'last_modifier': {'__eqf__': 'rule_writer'},
+    '__or__': [
+        {
+            'create_ts': {'__lte__': datetime(2015, 12, 31, 12, 5, 0, 123456),
+                          '__gt__': datetime(1960, 1, 1, 0, 0)},
+            'update_ts': {'__lt__': datetime(2015, 1, 1, 8, tzinfo=timezone(timedelta(hours=8)))},
+            'version': {'__lt__': 3, '__gte__': 1},
+        },
+        {'__not__': {'version': {'__eq__': 4}}},
+        {'__any__': [{'level': {'__gtf__': 'min_level'}}, {'level': {'__ltef__': 'max_level'}}]},
+        {'__all__': [{'level': {'__gtef__': 'min_level'}}, {'level': {'__ltf__': 'max_level'}}]},
+    ],
+    '__and__': [
+        {'rule_name': '/logging_.*/'},
+        {'rule_name': {'__neq__': 'logging_rddms'}},
+        {'rule_name': {'__iregex__': 'logging_r..s'}},
+    ]
+}
+
+
+def test_operator_keys_cover_registry():
+    keys = {key for key, cls in OperatorExpr.subclasses.items() if cls.final}
+    assert keys == set(binary.OPERATOR_KEYS)
+
+
+def test_round_trip():
+    expr = Expr.from_json(query_json)
+    data = expr.to_bytes()
+    assert data.startswith(b'QFY\x01')
+    decoded = Expr.from_bytes(data)
+    assert deep_equal(decoded.to_query_json(), expr.to_query_json())
+    assert [type(e) for e in decoded.iter_expr()] == [type(e) for e in expr.iter_expr()]
+    assert decoded.predicates_on('version')[0].parent is not None
+    assert Expr.from_bytes(And([]).to_bytes()).to_query_json() == {'__and__': []}
+    assert deep_equal(Expr.from_bytes(bytearray(data)).to_query_json(), expr.to_query_json())
+
+
+def test_compact_encoding():
+    expr = Expr.from_json({'a': list(range(1000)), 'b': ['x'] * 1000})
+    data = expr.to_bytes()
+    assert data.startswith(b'QFY\x01\x03\x01a\x01b\x01x')
+    assert len(data) < 1000 * 2 + 1000 + 20
+    assert len(data) < len(pickle.dumps(expr)) / 10
+
+
+def test_invalid_data():
+    data = Expr.from_json(query_json).to_bytes()
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(b'XYZ' + data[3:])
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(b'QFY')
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(data[:3] + b'\x02' + data[4:])
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(data[:-1])
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(data + b'\x00')
+    with pytest.raises(InvalidQuery):
+        FieldCompareListExpr.from_bytes(data)
+
+    # a truncated float
+    data = Expr.from_json({'a': 1.5}).to_bytes()
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(data[:-1])
+    # a truncated string table
+    data = Expr.from_json({'abc': 'def'}).to_bytes()
+    with pytest.raises(InvalidEncoding):
+        Expr.from_bytes(data[:6])
+    # every truncation or corruption of a byte is either rejected or decoded into a valid expr
+    data = Expr.from_json(query_json).to_bytes()
+    for i in range(4, len(data)):
+        for corrupted in (data[:i], data[:i] + bytes([data[i] ^ 0xff]) + data[i + 1:]):
+            try:
+                Expr.from_bytes(corrupted)
+            except InvalidEncoding:
+                pass
+
+
+def test_pickle():
+    expr = Expr.from_json(query_json)
+    unpickled = pickle.loads(pickle.dumps(expr))
+    assert deep_equal(unpickled.to_query_json(), expr.to_query_json())
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from ..querify import Expr, And
+from ..bounds import Interval, UNBOUNDED, field_bounds
+
+
+def test_interval():
+    a = Interval(1, 5)
+    b = Interval(3, 8, lower_closed=False)
+    assert a.intersection(b) == Interval(3, 5, lower_closed=False)
+    assert a.hull(b) == Interval(1, 8)
+    assert Interval(1, 3, upper_closed=False).intersection(Interval(3, 5)).empty
+    assert Interval(5, 1).empty and Interval(5, 1) == Interval(7, 2)
+    assert Interval(5, 1).hull(a) == a
+    assert a.intersection(UNBOUNDED) == a
+    assert a.hull(Interval(lower=3)) == Interval(lower=1)
+    assert 1 in a and 5 in a and 6 not in a and 3 not in b
+    assert not UNBOUNDED.bounded and not UNBOUNDED.empty and 10 in UNBOUNDED
+    assert repr(Interval(1, 5, upper_closed=False)) == '[1, 5)' and repr(UNBOUNDED) == '(-inf, +inf)'
+
+
+def test_field_bounds():
+    t0, t1, t2, t3 = datetime(2015, 1, 1), datetime(2015, 2, 1), datetime(2015, 3, 1), datetime(2015, 4, 1)
+    expr = Expr.from_json({'time': {'__gte__': t0, '__lt__': t2}, 'host': 'a'})
+    assert field_bounds(expr, 'time') == Interval(t0, t2, upper_closed=False)
+    assert field_bounds(expr, 'host') == Interval('a', 'a')
+    assert field_bounds(expr, 'value') == UNBOUNDED
+
+    expr = Expr.from_json({'__or__': [{'time': {'__gte__': t0, '__lt__': t1}}, {'time': {'__gt__': t2, '__lte__': t3}}],
+                           'time': {'__gt__': t0}})
+    assert field_bounds(expr, 'time') == Interval(t0, t3, lower_closed=False)
+    # One branch of the disjunction does not bound the field.
+    expr = Expr.from_json({'__or__': [{'time': {'__gte__': t0}}, {'host': 'a'}]})
+    assert field_bounds(expr, 'time') == UNBOUNDED
+    # Negations are pushed down first.
+    expr = Expr.from_json({'__not__': {'__or__': [{'time': {'__lt__': t0}}, {'time': {'__gte__': t1}}]}})
+    assert field_bounds(expr, 'time') == Interval(t0, t1, upper_closed=False)
+    assert field_bounds(Expr.from_json({'version': [3, 1, 2]}), 'version') == Interval(1, 3)
+    assert field_bounds(Expr.from_json({'version': {'__gt__': 'a', '__lt__': 3}}), 'version') == UNBOUNDED
+    assert field_bounds(And([]), 'time') == UNBOUNDED
+    assert field_bounds(None, 'time') == UNBOUNDED
@@ -0,0 +1,127 @@
+import sqlite3
+
+from ..querify import Select
+from ..cache import ResultCache
+from .. import instrumentation
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hits():
+    cache = ResultCache(max_entries=2)
+    cache.put(Select(table='t', where={'a': 1, 'b': {'__gt__': 2}}), [(1,), (2,)])
+    assert cache.get(Select(table='t', where={'__and__': [{'b': {'__gt__': 2}}, {'a': 1}, {'a': 1}]})) == [(1,), (2,)]
+    assert cache.get(Select(table='u', where={'a': 1, 'b': {'__gt__': 2}})) is None
+    assert cache.get(Select(table='t', columns=['a'], where={'a': 1, 'b': {'__gt__': 2}})) is None
+
+    cache.put(Select(table='t'), [])
+    assert cache.get(Select(table='t')) == []
+    cache.get(Select(table='t', where={'a': 1, 'b': {'__gt__': 2}}))
+    cache.put(Select(table='t', where={'c': 1}), [(3,)])
+    # the least recently used entry is evicted
+    assert cache.get(Select(table='t')) is None
+    assert len(cache) == 2
+    stats = cache.stats()
+    assert (stats['hits'], stats['superset_hits'], stats['misses'], stats['evictions']) == (3, 0, 3, 1)
+    assert stats['hit_rate'] == 0.5 and stats['mean_lookup_time'] > 0
+
+
+def test_ttl_and_memory_budget():
+    clock = Clock()
+    cache = ResultCache(ttl=10, max_bytes=1000, size_of=len, clock=clock)
+    cache.put(Select(table='t', where={'a': 1}), [0] * 600)
+    cache.put(Select(table='t', where={'a': 2}), [0] * 300)
+    assert cache.stats()['bytes'] == 900
+    clock.now = 5
+    cache.put(Select(table='t', where={'a': 3}), [0] * 300)
+    assert cache.get(Select(table='t', where={'a': 1})) is None
+    assert cache.stats()['evictions'] == 1
+    cache.put(Select(table='t', where={'a': 4}), [0] * 2000)
+    assert cache.get(Select(table='t', where={'a': 4})) is None
+    clock.now = 10
+    assert cache.get(Select(table='t', where={'a': 2})) is None
+    assert cache.get(Select(table='t', where={'a': 3})) == [0] * 300
+    assert cache.stats()['expirations'] == 1 and cache.stats()['bytes'] == 300
+
+
+def test_superset_hits():
+    cache = ResultCache()
+    rows = [(1, 'a', 5), (2, 'b', 15), (3, 'a', None), (4, 'a', 20)]
+    cache.put(Select(table='t', columns=['id', 'host', 'value'], where={'host': 'a'}), rows)
+    assert cache.get(Select(table='t', columns=['id', 'host', 'value'], where={'host': 'a', 'value': {'__gt__': 10}})) \
+        == [(4, 'a', 20)]
+    assert cache.get(Select(table='t', columns=['value', 'id'], where={'host': 'a', 'value': {'__neq__': 5}})) == \
+        [(20, 4)]
+    # not implied by the cached filter
+    assert cache.get(Select(table='t', columns=['id', 'host', 'value'], where={'value': {'__gt__': 10}})) is None
+    # the cached rows lack a column
+    assert cache.get(Select(table='t', columns=['id', 'host', 'value', 'x'], where={'host': 'a', 'value': 5})) is None
+    assert cache.get(Select(table='t', where={'host': 'a', 'value': 5})) is None
+    assert cache.stats()['superset_hits'] == 2
+
+    cache.put(Select(table='u', where={'value': {'__gte__': 10}}), [{'id': 2, 'value': 15}, {'id': 4, 'value': 20}])
+    assert cache.get(Select(table='u', where={'value': {'__gte__': 18}})) == [{'id': 4, 'value': 20}]
+    assert cache.get(Select(table='u', columns=['id'], where={'value': [15, 20]})) == [{'id': 2}, {'id': 4}]
+    assert ResultCache(supersets=False).get(Select(table='u', where={'value': 20})) is None
+
+    # limited results are not supersets of anything but the same statement
+    cache.put(Select(table='v', where={'value': {'__gte__': 10}}, order_by=['id'], limit=1), [{'id': 2, 'value': 15}])
+    assert cache.get(Select(table='v', where={'value': {'__gte__': 18}})) is None
+    assert cache.get(Select(table='v', where={'value': {'__gte__': 10}}, order_by=['id'])) is None
+    assert cache.get(Select(table='v', where={'value': {'__gte__': 10}}, order_by=['id'], limit=1)) == \
+        [{'id': 2, 'value': 15}]
+
+
+def test_semantics():
+    cache = ResultCache()
+    # MongoDB matches documents without the field for $ne, unlike SQL and the "python" dialect
+    documents = [{'id': 1, 'host': 'a'}, {'id': 2, 'host': 'a', 'value': 5}, {'id': 3, 'host': 'a', 'value': 6}]
+    cache.put(Select(table='t', where={'host': 'a'}), documents, semantics='mongo')
+    narrower = Select(table='t', where={'host': 'a', 'value': {'__neq__': 5}})
+    assert cache.get(narrower, semantics='mongo') is None
+    assert cache.get(narrower) is None
+    assert cache.get(Select(table='t', where={'host': 'a'})) is None
+    assert cache.get(Select(table='t', where={'host': 'a'}), semantics='mongo') == documents
+    assert cache.get_or_execute(narrower, lambda select: [documents[0], documents[2]], semantics='mongo') == \
+        [documents[0], documents[2]]
+    assert cache.get(narrower, semantics='mongo') == [documents[0], documents[2]]
+
+    cache.put(Select(table='t', where={'host': 'a'}), documents)
+    assert cache.get(narrower) == [documents[2]]
+    stats = cache.stats()
+    assert (stats['hits'], stats['superset_hits'], stats['misses']) == (2, 1, 4)
+
+
+def test_sqlite_stand_in():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE t (id INTEGER, host TEXT, value INTEGER)')
+    connection.executemany('INSERT INTO t VALUES (?, ?, ?)',
+                           [(i, 'h{}'.format(i % 3), None if i % 7 == 0 else i % 50) for i in range(300)])
+    executed = []
+
+    def execute(select):
+        executed.append(select)
+        sql, params = select.to_query('sqlite')
+        return connection.execute(sql, params).fetchall()
+
+    cache = ResultCache()
+    columns = ['id', 'host', 'value']
+    instrumentation.enable()
+    instrumentation.reset_stats()
+    try:
+        for where in [{'host': 'h1'}, {'host': 'h1', 'value': {'__lt__': 10}}, {'value': {'__lt__': 10}, 'host': 'h1'},
+                      {'host': 'h1', '__not__': {'value': [1, 2]}}, {'host': 'h2'}]:
+            select = Select(table='t', columns=columns, where=where)
+            assert cache.get_or_execute(select, execute) == execute(select)
+        result = instrumentation.stats()['caches']['result']
+        assert (result['hits'], result['misses']) == (3, 2)
+    finally:
+        instrumentation.disable()
+        instrumentation.reset_stats()
+    assert len(executed) == 5 + 2
@@ -0,0 +1,341 @@
+import json
+import random
+import sqlite3
+from datetime import datetime
+
+import pytest
+from qutils.functions import deep_equal
+
+from ..querify import Expr, LiteralExpr, Select, ShowColumns, Not, Equal, And, And_, Or_
+from ..dialects import Dialect, DIALECTS, register_dialect, get_dialect
+from ..dialects.mysql import MySQLDialect
+from ..dialects.elasticsearch import ElasticsearchDialect
+from ..dialects.sqlite import register_functions
+
+
+query_json = {
+    'rule_id': [6666, 7777],
+    'rule_name': {'__neq__': 'invalid_name'},
+    '__or__': [{'version': {'__gt__': 3}}, {'status': {'__null__': True}}],
+}
+
+
+def test_get_dialect():
+    assert get_dialect('mysql') is MySQLDialect
+    assert isinstance(DIALECTS['mysql'], type)
+    assert get_dialect('unknown') is None
+    with pytest.raises(NotImplementedError):
+        Expr.from_json(query_json).to_query('unknown')
+
+
+def test_compatibility_methods():
+    expr = Expr.from_json(query_json)
+    for name in ['json', 'influx', 'mysql', 'mongo', 'pandas', 'pluto']:
+        try:
+            expected = expr.to_query(name)
+        except NotImplementedError:
+            with pytest.raises(NotImplementedError):
+                getattr(expr, 'to_query_' + name)()
+        else:
+            assert getattr(expr, 'to_query_' + name)() == expected
+
+
+def test_inline_emitters(monkeypatch):
+    compiled = []
+    compile_node = Dialect.compile
+
+    def counting_compile(self, node):
+        compiled.append(node)
+        return compile_node(self, node)
+
+    monkeypatch.setattr(Dialect, 'compile', counting_compile)
+    expr = Expr.from_json({
+        'rule_id': [6666, 7777],
+        'tags': {'__nin__': ['a', 'b']},
+        '__or__': [{'version': {'__gt__': 3}}, {'rule_name': {'__neq__': 'invalid_name'}}],
+    })
+    for name in ['json', 'influx', 'mysql', 'postgres', 'mongo']:
+        del compiled[:]
+        expr.to_query(name)
+        assert compiled[0] is expr
+        assert not any(isinstance(node, LiteralExpr) for node in compiled), name
+
+
+def test_custom_dialect():
+    class LispDialect(Dialect):
+        name = 'lisp'
+        title = 'lisp'
+        operators = {Equal: 'eq', Not: 'not', And_: 'and', Or_: 'or'}
+
+        def emit_LiteralExpr(self, expr):
+            return repr(expr.literal)
+
+        def emit_SchemaLiteral(self, expr):
+            return expr.literal
+
+        def emit_Not(self, expr):
+            return '({} {})'.format(self.operator(expr), self.compile(expr.operand))
+
+        def emit_BinaryComparisonExpr(self, expr):
+            return '({} {} {})'.format(self.operator(expr), self.compile(expr.left), self.compile(expr.right))
+
+        def emit_LogicalExpr(self, expr):
+            return '({} {})'.format(self.operator(expr), ' '.join(self.compile(e) for e in expr.exprs))
+
+    register_dialect('lisp', LispDialect)
+    try:
+        expr = Expr.from_json({'__not__': {'a': 1}, 'b': {'__eqf__': 'c'}})
+        assert expr.to_query('lisp') == '(and (not (eq a 1)) (eq b c))'
+        with pytest.raises(NotImplementedError, match='operator "__gt__"'):
+            Expr.from_json({'a': {'__gt__': 1}}).to_query('lisp')
+        with pytest.raises(NotImplementedError, match='lisp'):
+            Select(table='t').to_query('lisp')
+    finally:
+        del DIALECTS['lisp']
+
+
+def test_options():
+    with pytest.raises(TypeError, match='mysql'):
+        Expr.from_json(query_json).to_query('mysql', paramstyle='qmark')
+
+
+def test_unsupported():
+    with pytest.raises(NotImplementedError, match='InfluxQL'):
+        Expr.from_json({'__not__': {'a': {'__null__': True}}}).to_query('influx')
+    with pytest.raises(NotImplementedError, match='pluto conditions'):
+        Expr.from_json({'a': True}).to_query('pluto')
+
+
+def test_postgres():
+    expr = Expr.from_json({
+        'rule_id': [6666, 7777, 8888],
+        'act_type': {'__nin__': ['logging', 'eval']},
+        'rule_name': {'__regex__': '^rule', '__neq__': 'invalid_name'},
+        'comment': {'__iregex__': 'test'},
+        'owner': {'__null__': True},
+        'writer': {'__missing__': False},
+        '__not__': {'version': {'__gt__': 3}},
+        'last_modifier': {'__eqf__': 'rule_writer'},
+    })
+    assert expr.to_query('postgres') == (
+        '("version" <= %s) AND ("act_type" <> ALL(%s)) AND ("comment" !~ %s) AND ("last_modifier" = "rule_writer") '
+        'AND ("owner" IS NULL) AND ("rule_id" = ANY(%s)) AND ("rule_name" <> %s) AND ("rule_name" ~ %s) '
+        'AND ("writer" IS NOT NULL)',
+        [3, ['logging', 'eval'], 'test', [6666, 7777, 8888], 'invalid_name', '^rule'],
+    )
+
+    # The statement text does not depend on the length of the list.
+    short, _ = Expr.from_json({'a': [1, 2]}).to_query('postgres')
+    long, params = Expr.from_json({'a': list(range(1000))}).to_query('postgres')
+    assert short == long == '"a" = ANY(%s)'
+    assert params == [list(range(1000))]
+
+    assert Expr.from_json({'a%"b': 1}).to_query('postgres') == ('"a%%""b" = %s', [1])
+
+
+def test_postgres_statements():
+    select = Select(table='rules', db='public', columns=['rule_id', 'rule_name'], where={'version': {'__gte__': 2}})
+    assert select.to_query('postgres') == \
+        ('SELECT "rule_id", "rule_name" FROM "public"."rules" WHERE "version" >= %s', [2])
+    assert Select(table='rules', where=And([])).to_query('postgres') == ('SELECT * FROM "rules"', [])
+    assert ShowColumns(table='rules', db='public').to_query('postgres') == (
+        'SELECT column_name, data_type FROM information_schema.columns '
+        'WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position',
+        ['public', 'rules'],
+    )
+
+
+def test_sqlite():
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+    connection.execute('CREATE TABLE rules (rule_id INTEGER, rule_name TEXT, owner TEXT, create_ts TEXT)')
+    connection.executemany('INSERT INTO rules VALUES (?, ?, ?, ?)', [
+        (1, 'logging_a', 'alice', '2015-01-01 00:00:00'),
+        (2, 'logging_b', None, '2015-06-01 12:00:00'),
+        (3, 'eval_c', 'bob', '2016-01-01 00:00:00'),
+        (4, 'eval_d', None, '2016-06-01 00:00:00'),
+    ])
+
+    def select(where):
+        sql, params = Select(table='rules', columns=['rule_id'], where=where).to_query('sqlite')
+        return [row[0] for row in connection.execute(sql, params)]
+
+    assert Expr.from_json({'rule_name': '/^logging_/', 'rule_id': [1, 2, 3]}).to_query('sqlite') == \
+        ('("rule_id" IN (?, ?, ?)) AND ("rule_name" REGEXP ?)', [1, 2, 3, '^logging_'])
+    assert select({'rule_name': '/^logging_/'}) == [1, 2]
+    assert select({'rule_name': {'__iregex__': '_[ab]$'}, 'owner': {'__null__': False}}) == [3]
+    assert select({'create_ts': {'__gte__': datetime(2015, 6, 1, 12)}, 'rule_id': {'__nin__': [4]}}) == [2, 3]
+    assert select({'__or__': [{'owner': {'__missing__': True}}, {'__not__': {'rule_id': {'__gt__': 1}}}]}) == [1, 2, 4]
+    assert select(And([])) == [1, 2, 3, 4]
+
+    sql, params = ShowColumns(table='rules').to_query('sqlite')
+    assert [row[0] for row in connection.execute(sql, params)] == ['rule_id', 'rule_name', 'owner', 'create_ts']
+
+
+def test_elasticsearch():
+    expr = Expr.from_json({
+        'rule_id': [6666, 7777],
+        'act_type': {'__nin__': ['logging', 'eval']},
+        'create_ts': {'__gte__': datetime(2015, 1, 1), '__lt__': datetime(2016, 1, 1)},
+        'rule_name': '/^logging_/',
+        'owner': {'__null__': True},
+        'writer': {'__missing__': False},
+        '__or__': [{'version': 3}, {'__not__': {'version': {'__gt__': 5}}}],
+    })
+    query = expr.to_query('elasticsearch')
+    assert json.loads(json.dumps(query)) == query
+    assert deep_equal(query, {'bool': {
+        'filter': [
+            {'bool': {'should': [{'term': {'version': 3}}, {'bool': {'must_not': [{'range': {'version': {'gt': 5}}}]}}],
+                      'minimum_should_match': 1}},
+            {'range': {'create_ts': {'gte': '2015-01-01T00:00:00', 'lt': '2016-01-01T00:00:00'}}},
+            {'terms': {'rule_id': [6666, 7777]}},
+            {'regexp': {'rule_name': 'logging_.*'}},
+            {'exists': {'field': 'writer'}},
+        ],
+        'must_not': [
+            {'terms': {'act_type': ['logging', 'eval']}},
+            {'exists': {'field': 'owner'}},
+        ],
+    }})
+
+    assert Expr.from_json({'a': 1}).to_query('elasticsearch') == {'bool': {'filter': [{'term': {'a': 1}}]}}
+    assert Expr.from_json({'a': {'__neq__': 1}}).to_query('elasticsearch') == \
+        {'bool': {'must_not': [{'term': {'a': 1}}]}}
+    # Bounds on the same side are not merged.
+    assert Expr.from_json({'a': {'__gt__': 1, '__gte__': 2}}).to_query('elasticsearch') == \
+        {'bool': {'filter': [{'range': {'a': {'gt': 1}}}, {'range': {'a': {'gte': 2}}}]}}
+    assert Expr.from_json({'a': {'__regex__': 'b[0-9]+$'}}).to_query('elasticsearch') == \
+        {'bool': {'filter': [{'regexp': {'a': '.*b[0-9]+'}}]}}
+    regexp = ElasticsearchDialect.regexp
+    assert regexp('^a|b$') == '(a.*)|(.*b)'
+    assert regexp('^(a|b)$') == '(a|b)'
+    assert regexp('x(?:y|z)+?') == '.*x(y|z)+.*'
+    # an escaped backslash before the anchor, and an escaped dollar sign
+    assert regexp('a\\\\$') == '.*a\\\\'
+    assert regexp('a\\$') == '.*a\\$.*'
+    assert regexp('[$^|]@') == '.*[$^|]\\@.*'
+    for pattern in ['\\d+', '(?i)a', '(^a|b)', 'a$b', '[\\w-]', 'a(?=b)']:
+        with pytest.raises(NotImplementedError, match='Elasticsearch'):
+            regexp(pattern)
+    assert And([]).to_query('elasticsearch') == {'bool': {'filter': [{'match_all': {}}]}}
+    with pytest.raises(NotImplementedError, match='Elasticsearch'):
+        Expr.from_json({'a': {'__gtf__': 'b'}}).to_query('elasticsearch')
+
+
+def test_mongo_regex_document():
+    expr = Expr.from_json({'a': '/(?i)^x/', 'b': {'__iregex__': 'y'}})
+    assert expr.to_query('mongo', regex='document') == \
+        {'$and': [{'a': {'$regex': '(?i)^x', '$options': 'i'}}, {'b': {'$not': {'$regex': 'y'}}}]}
+    assert json.dumps(expr.to_query('mongo', regex='document'))
+    with pytest.raises(ValueError):
+        expr.to_query('mongo', regex='bson')
+
+
+def test_pandas_numexpr():
+    expr = Expr.from_json({
+        'rule_id': [1, 2, 3],
+        'act_type': {'__nin__': ['eval']},
+        'owner': {'__null__': False},
+        'create_ts': {'__gte__': datetime(2015, 6, 1)},
+        '__not__': {'version': {'__gt__': 3}},
+    })
+    query, local_dict = expr.to_query('pandas', engine='numexpr')
+    assert query == '(~(version > 3)) & (act_type not in @_v0) & (create_ts >= @_v1) & (owner == owner) & ' \
+                    '(rule_id in @_v2)'
+    assert local_dict == {'_v0': ['eval'], '_v1': datetime(2015, 6, 1), '_v2': [1, 2, 3]}
+    assert Expr.from_json({'my col': {'__null__': True}}).to_query('pandas', engine='numexpr') == \
+        ('`my col` != `my col`', {})
+
+    with pytest.raises(NotImplementedError, match='numexpr'):
+        Expr.from_json({'rule_name': '/^logging_/'}).to_query('pandas', engine='numexpr')
+    with pytest.raises(ValueError):
+        expr.to_query('pandas', engine='cython')
+
+    pandas = pytest.importorskip('pandas')
+    df = pandas.DataFrame({
+        'rule_id': [1, 2, 3, 4],
+        'act_type': ['logging', 'eval', 'logging', 'logging'],
+        'owner': ['alice', 'bob', None, 'carol'],
+        'create_ts': pandas.to_datetime(['2015-07-01', '2015-07-01', '2015-07-01', '2015-01-01']),
+        'version': [1, 2, 3, 4],
+    })
+    engines = ['python']
+    try:
+        import numexpr  # noqa: F401
+        engines.append('numexpr')
+    except ImportError:
+        pass
+    for engine in engines:
+        assert list(df.query(query, local_dict=local_dict, engine=engine)['rule_id']) == [1]
+
+
+def test_python():
+    rows = [
+        {'rule_id': 1, 'rule_name': 'logging_a', 'owner': 'alice', 'create_ts': datetime(2015, 1, 1)},
+        {'rule_id': 2, 'rule_name': 'logging_b', 'owner': None, 'create_ts': datetime(2015, 6, 1, 12)},
+        {'rule_id': 3, 'rule_name': 'eval_c', 'owner': 'bob', 'create_ts': datetime(2016, 1, 1)},
+        {'rule_id': 4, 'rule_name': 'eval_d', 'create_ts': datetime(2016, 6, 1)},
+    ]
+
+    def select(where):
+        predicate = Expr.from_json(where).to_query('python')
+        return [row['rule_id'] for row in rows if predicate(row)]
+
+    assert select({'rule_name': '/^logging_/'}) == [1, 2]
+    assert select({'rule_name': {'__iregex__': '_[ab]$'}, 'owner': {'__null__': False}}) == [3]
+    assert select({'create_ts': {'__gte__': datetime(2015, 6, 1, 12)}, 'rule_id': {'__nin__': [4]}}) == [2, 3]
+    assert select({'__or__': [{'owner': {'__missing__': True}}, {'__not__': {'rule_id': {'__gt__': 1}}}]}) == [1, 4]
+    assert select({'__not__': {'owner': {'__neq__': 'bob'}}}) == [3]
+    assert select({'owner': {'__ltf__': 'rule_name'}}) == [1, 3]
+    assert select(And([])) == [1, 2, 3, 4]
+
+    columns = ['rule_id', 'owner']
+    predicate = Expr.from_json({'owner': {'__null__': True}, 'rule_id': {'__gt__': 2}}).to_query('python',
+                                                                                                  columns=columns)
+    assert [row[0] for row in [(1, None), (3, 'bob'), (4, None)] if predicate(row)] == [4]
+    with pytest.raises(KeyError):
+        Expr.from_json({'version': 1}).to_query('python', columns=columns)
+
+
+def test_python_sqlite_equivalence():
+    from .test_rewrite import random_filter
+    rnd = random.Random(0)
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+    connection.execute('CREATE TABLE t (id INTEGER, a INTEGER, b INTEGER, c INTEGER)')
+    rows = [(i, rnd.choice([None, 0, 1, 2, 3]), rnd.choice([None, 0, 1, 2, 3]), rnd.choice([None, 0, 1, 2, 3]))
+            for i in range(200)]
+    connection.executemany('INSERT INTO t VALUES (?, ?, ?, ?)', rows)
+    for _ in range(300):
+        expr = Expr.from_json(random_filter(rnd, 3))
+        if any(e.key == '__missing__' for e in expr.iter_expr()):
+            continue
+        sql, params = Select(table='t', columns=['id'], where=expr).to_query('sqlite')
+        predicate = expr.to_query('python', columns=['id', 'a', 'b', 'c'])
+        assert [row[0] for row in rows if predicate(row)] == [row[0] for row in connection.execute(sql, params)]
+
+
+def test_arrow():
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table({
+        'rule_id': [1, 2, 3, 4],
+        'rule_name': ['logging_a', 'logging_b', 'eval_c', None],
+        'version': [1, 2, 3, 4],
+        'min_version': [1, 1, 4, 4],
+    })
+
+    def filter_(filter_json):
+        return table.filter(Expr.from_json(filter_json).to_query('arrow'))['rule_id'].to_pylist()
+
+    assert filter_({'rule_id': [1, 3, 5]}) == [1, 3]
+    assert filter_({'rule_name': '/^logging_/'}) == [1, 2]
+    assert filter_({'rule_name': {'__null__': True}}) == [4]
+    assert filter_({'__or__': [{'version': {'__gte__': 4}}, {'__not__': {'version': {'__gtef__': 'min_version'}}}]}) \
+        == [3, 4]
+    assert filter_({'rule_id': {'__nin__': [1]}, 'rule_name': {'__iregex__': 'eval'}}) == [2]
+    # null values are neither in nor not in a list
+    assert filter_({'rule_name': {'__nin__': ['logging_a']}}) == [2, 3]
+    assert filter_({'__not__': {'rule_name': ['logging_a']}}) == [2, 3]
+    assert filter_({'__not__': {'rule_name': {'__nin__': ['logging_a']}}}) == [1]
+    assert table.filter(And([]).to_query('arrow')).num_rows == 4
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from ..querify import Select, InvalidQuery
+from ..dialects.sqlite import register_functions
+from ..execution import execute_concurrently, DEFAULT_MAX_WORKERS
+
+
+def test_split_by_time():
+    select = Select(table='t', where={'host': 'a',
+                                     'time': {'__gte__': datetime(2020, 1, 1), '__lt__': datetime(2020, 1, 3)}})
+    statements = select.split_by_time('time', timedelta(hours=20))
+    assert [s.to_query('influx') for s in statements] == [
+        'SELECT * FROM "t" WHERE (("host" = \'a\') AND ("time" >= \'2020-01-01T00:00:00Z\') AND '
+        '("time" < \'2020-01-03T00:00:00Z\')) AND ("time" < \'2020-01-01T20:00:00Z\')',
+        'SELECT * FROM "t" WHERE (("host" = \'a\') AND ("time" >= \'2020-01-01T00:00:00Z\') AND '
+        '("time" < \'2020-01-03T00:00:00Z\')) AND ("time" >= \'2020-01-01T20:00:00Z\') AND '
+        '("time" < \'2020-01-02T16:00:00Z\')',
+        'SELECT * FROM "t" WHERE (("host" = \'a\') AND ("time" >= \'2020-01-01T00:00:00Z\') AND '
+        '("time" < \'2020-01-03T00:00:00Z\')) AND ("time" >= \'2020-01-02T16:00:00Z\')',
+    ]
+    assert len(select.split_by_time('time', timedelta(days=2))) == 1
+    assert select.to_query('mysql').startswith("SELECT * FROM t WHERE (host = 'a') AND")
+
+    with pytest.raises(InvalidQuery):
+        Select(table='t', where={'time': {'__gte__': datetime(2020, 1, 1)}}).split_by_time('time', timedelta(hours=1))
+    with pytest.raises(InvalidQuery):
+        select.split_by_time('time', 3600)
+    with pytest.raises(InvalidQuery):
+        select.split_by_time('time', timedelta(0))
+
+
+def test_split_by_range():
+    select = Select(table='t', where={'id': {'__gte__': 0, '__lte__': 10}})
+    assert [s.to_query('mysql') for s in select.split_by_range('id', 5)] == [
+        'SELECT * FROM t WHERE ((id >= 0) AND (id <= 10)) AND (id < 5)',
+        'SELECT * FROM t WHERE ((id >= 0) AND (id <= 10)) AND (id >= 5)',
+    ]
+    assert len(select.split_by_range('id', 4)) == 3
+    assert len(Select(table='t', where={'id': {'__gte__': 0, '__lte__': 0}}).split_by_range('id', 5)) == 1
+    assert len(Select(table='t', where={'id': {'__gte__': 0, '__lt__': 10}}).split_by_range('id', 5)) == 2
+    assert Select(table='t', where={'id': {'__gt__': 3, '__lt__': 2}}).split_by_range('id', 5) == []
+    with pytest.raises(InvalidQuery):
+        select.split_by_range('id', -5)
+
+    # the parents of every chunk are within the chunk
+    for statement in select.split_by_range('id', 5):
+        for expr in statement.where.iter_expr():
+            parent = expr.parent
+            while parent is not None and parent is not statement.where:
+                parent = parent.parent
+            assert expr is statement.where or parent is statement.where
+
+
+def test_execute_concurrently():
+    uri = 'file:test_execute_concurrently?mode=memory&cache=shared'
+    keeper = sqlite3.connect(uri, uri=True)
+    keeper.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+    keeper.executemany('INSERT INTO t VALUES (?, ?)', [(i, 'n{}'.format(i % 7)) for i in range(1000)])
+    keeper.commit()
+
+    def execute(select):
+        connection = sqlite3.connect(uri, uri=True)
+        register_functions(connection)
+        try:
+            sql, params = select.to_query('sqlite')
+            return [row[0] for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    try:
+        select = Select(table='t', columns=['id'], where={'id': {'__gte__': 100, '__lte__': 900}, 'name': '/^n[0-3]$/'})
+        expected = execute(select)
+        results = execute_concurrently(select.split_by_range('id', 64), execute, max_workers=4)
+        assert len(results) == 13
+        ids = [i for result in results for i in result]
+        assert ids == expected and len(set(ids)) == len(ids)
+        assert execute_concurrently([], execute) == []
+
+        threads = set()
+
+        def record_thread(select):
+            threads.add(threading.get_ident())
+            time.sleep(0.001)
+            return select
+
+        chunks = Select(table='t', where={'id': {'__gte__': 0, '__lt__': 1000}}).split_by_range('id', 10)
+        assert execute_concurrently(chunks, record_thread) == chunks
+        assert len(threads) <= DEFAULT_MAX_WORKERS
+    finally:
+        keeper.close()
@@ -0,0 +1,105 @@
+import itertools
+import random
+from datetime import datetime
+
+from ..querify import Expr
+
+
+def implies(a, b):
+    return Expr.from_json(a).implies(Expr.from_json(b))
+
+
+def test_implies():
+    assert implies({'a': {'__gt__': 10}, 'b': 'x'}, {'b': 'x'})
+    assert implies({'a': {'__gt__': 10}}, {'a': {'__gte__': 10}})
+    assert not implies({'a': {'__gte__': 10}}, {'a': {'__gt__': 10}})
+    assert implies({'a': {'__gt__': 1, '__lt__': 5}}, {'a': {'__neq__': 7}})
+    assert not implies({'a': {'__gt__': 1}}, {'a': {'__neq__': 7}})
+    assert implies({'a': [1, 2]}, {'a': [1, 2, 3]})
+    assert implies({'a': [1, 5], 'b': 1}, {'a': {'__lt__': 6}, 'b': {'__nin__': [2]}})
+    assert not implies({'a': [1, 2]}, {'a': 1})
+    assert implies({'a': 1}, {'a': [1, 2]})
+    assert implies({'a': {'__gte__': 1, '__lte__': 1}}, {'a': [1, 2]})
+    assert implies({'t': {'__gte__': datetime(2020, 1, 2)}}, {'t': {'__gte__': datetime(2020, 1, 1)}})
+    assert implies({'a': {'__nin__': [1, 2]}}, {'a': {'__neq__': 2}})
+
+    assert implies({'a': 'prod-1'}, {'a': '/^prod-/'})
+    assert not implies({'a': 'test-1'}, {'a': '/^prod-/'})
+    assert implies({'a': '/^prod-/', 'b': 1}, {'a': '/^prod-/'})
+    assert not implies({'a': '/^prod-1/'}, {'a': '/^prod-/'})
+    assert implies({'a': 'x'}, {'a': {'__iregex__': '^y'}})
+
+    assert implies({'a': {'__null__': True}, 'b': 1}, {'a': {'__null__': True}})
+    assert implies({'a': 1}, {'a': {'__null__': False}})
+    assert not implies({'a': {'__neq__': 1}}, {'a': {'__null__': False}})
+    assert not implies({'a': {'__null__': True}}, {'a': {'__neq__': 1}})
+    assert implies({'a': {'__missing__': True}, 'b': 1}, {'a': {'__missing__': True}})
+    assert implies({'a': {'__eqf__': 'b'}, 'c': 1}, {'a': {'__eqf__': 'b'}})
+
+    # Or on either side
+    assert implies({'__or__': [{'a': 1}, {'a': 2}]}, {'a': {'__lt__': 3}})
+    assert implies({'a': 1}, {'__or__': [{'a': 1}, {'b': 2}]})
+    assert not implies({'__or__': [{'a': 1}, {'b': 2}]}, {'a': 1})
+    assert implies({'__or__': [{'a': 1}, {'b': 2}], 'c': 3}, {'__or__': [{'a': 1}, {'b': 2}]})
+
+    # negations are only complemented where it is safe for null and missing fields
+    assert implies({'__not__': {'a': {'__in__': [1, 2]}}}, {'a': {'__neq__': 1}})
+    assert not implies({'__not__': {'a': {'__gt__': 1}}}, {'a': {'__lte__': 1}})
+    assert implies({'__not__': {'a': {'__gt__': 1}}, 'b': 1}, {'__not__': {'a': {'__gt__': 1}}})
+
+    # contradictions imply anything
+    assert implies({'a': {'__gt__': 2, '__lt__': 1}}, {'b': 1})
+    assert implies({'a': [1, 2], 'b': {'__nin__': [1]}, '__and__': [{'a': 3}]}, {'c': 1})
+
+    assert not implies({'a': 'x'}, {'a': {'__gt__': 1}})
+
+
+def test_summary_cache():
+    expr = Expr.from_json({'a': {'__gt__': 10}, 'b': 'x'})
+    summary = expr.implication_summary()
+    assert expr.implication_summary() is summary
+    assert expr.implies(Expr.from_json({'b': 'x'}))
+    expr.rename_field('b', 'c')
+    assert expr.implication_summary() is not summary
+    assert expr.implies(Expr.from_json({'c': 'x'})) and not expr.implies(Expr.from_json({'b': 'x'}))
+    assert expr.transform()._implication_summary is None
+
+
+def random_conjunction(rnd):
+    atoms = []
+    for _ in range(rnd.randint(1, 3)):
+        field = rnd.choice('ab')
+        kind = rnd.randrange(5)
+        if kind == 0:
+            op = rnd.choice(['__eq__', '__neq__', '__gt__', '__gte__', '__lt__', '__lte__'])
+            atoms.append({field: {op: rnd.randrange(5)}})
+        elif kind == 1:
+            atoms.append({field: {rnd.choice(['__in__', '__nin__']): rnd.sample(range(5), rnd.randint(1, 3))}})
+        elif kind == 2:
+            atoms.append({field: {'__null__': rnd.random() < 0.5}})
+        elif kind == 3:
+            atoms.append({field: {rnd.choice(['__regex__', '__iregex__']): rnd.choice(['^[01]', '[34]'])}})
+        else:
+            atoms.append({'__not__': rnd.choice([{field: {'__eq__': 1}}, {field: {'__gt__': 1}}, {field: [1, 2]}])})
+    return {'__and__': atoms}
+
+
+def random_filter(rnd):
+    if rnd.random() < 0.3:
+        return {'__or__': [random_conjunction(rnd) for _ in range(rnd.randint(1, 3))]}
+    return random_conjunction(rnd)
+
+
+def test_implies_is_sound():
+    rnd = random.Random(0)
+    rows = [{'a': a, 'b': b} for a, b in itertools.product([None, 0, 1, 2, 3, 4, 5], repeat=2)]
+    filters = [Expr.from_json(random_filter(rnd)) for _ in range(300)]
+    proven = 0
+    for a in filters:
+        matched_a = [i for i, row in enumerate(rows) if a.to_query('python')(row)]
+        for b in rnd.sample(filters, 30):
+            if a.implies(b):
+                proven += 1
+                predicate = b.to_query('python')
+                assert all(predicate(rows[i]) for i in matched_a), (a.to_query('mysql'), b.to_query('mysql'))
+    assert proven > 300
@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules that must only be imported on first use.
+LAZY_MODULES = ['qutils', 'qutils.models', 'pandas', 'numpy', 'querify.binary', 'querify.ingest', 'orjson', 'ijson']
+
+
+def run(statement, *options):
+    return subprocess.run([sys.executable] + list(options) + ['-c', statement], cwd=ROOT,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+
+def test_lazy_imports():
+    check = '; print(",".join(m for m in {!r} if m in sys.modules))'.format(LAZY_MODULES)
+    assert run('import sys, querify' + check).stdout.decode().strip() == ''
+    statement = 'import sys, querify; querify.Expr.from_json({"a": 1}).to_query("mysql")'
+    assert run(statement + check).stdout.decode().strip() == ''
+    # negations are rewritten into complements for rendering
+    statement = 'import sys, querify; expr = querify.Expr.from_json({"a": 1, "__not__": {"c": {"__gt__": 2}}}); ' \
+                '[expr.to_query(d) for d in ("mysql", "postgres", "influx", "mongo", "python")]'
+    assert run(statement + check).stdout.decode().strip() == ''
+    # the references are imported once needed by Expr.transform, or on first access
+    statement = 'import sys, querify; querify.Expr.from_json({"a": 1}).transform()' + check
+    assert 'qutils.models' in run(statement).stdout.decode().strip().split(',')
+    statement = 'import sys, querify; print(querify.AttrRef.__module__)'
+    assert run(statement).stdout.decode().strip() == 'qutils.models'
+    statement = 'import sys, querify; querify.Expr.from_json({"a": 1}).to_query("mysql"); ' \
+                'print(",".join(sorted(m for m in sys.modules if m.startswith("querify.dialects."))))'
+    assert run(statement).stdout.decode().strip() == 'querify.dialects.mysql'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='-X importtime requires Python 3.7')
+def test_import_tree():
+    # the modules imported by "import querify", including those imported and removed from sys.modules again
+    output = run('import querify', '-X', 'importtime').stderr.decode()
+    imported = set(m.strip() for m in re.findall(r'^import time:[^|]+\|[^|]+\|(.+)$', output, re.MULTILINE))
+    assert 'querify' in imported
+    assert not imported & set(LAZY_MODULES)
+
+
+def test_exports():
+    import querify
+    from qutils.models import AttrRef, ItemRef
+    assert querify.Expr is querify.querify.Expr and querify.Select is querify.querify.Select
+    assert querify.AttrRef is querify.querify.AttrRef is AttrRef
+    assert querify.ItemRef is querify.querify.ItemRef is ItemRef
+    with pytest.raises(AttributeError):
+        querify.UnknownExpr
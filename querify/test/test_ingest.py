@@ -0,0 +1,93 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+from qutils.functions import deep_equal
+
+from ..querify import Expr, DateTimeLiteral, StringLiteral
+from ..errors import InvalidQuery
+from .. import ingest
+
+
+query_json = {
+    'rule_id': [6666, '7777', 8888],
+    'act_type': {'__nin__': ['logging', 'eval']},
+    'rule_name': '/logging_.*/',
+    'rule_writer': {'__neqf__': 'rule_owner'},
+    'created': '2015-01-01T00:00:00Z',
+    '__or__': [
+        {
+            'create_ts': {'__lte__': '2015-12-31T12:05:00', '__gt__': '2014-01-01T08:00:00+08:00'},
+            'version': {'__lt__': 3, '__gte__': 1},
+        },
+        {'__not__': {'update_ts': {'__in__': ['2016-02-03 04:05:06.5', 'latest']}}},
+        {'comment': {'__regex__': '2016-02-03T04:05:06'}},
+    ],
+}
+
+
+def test_parse_iso_datetime():
+    assert ingest.parse_iso_datetime('2015-12-31T12:05:00') == datetime(2015, 12, 31, 12, 5)
+    assert ingest.parse_iso_datetime('2015-12-31 12:05') == datetime(2015, 12, 31, 12, 5)
+    assert ingest.parse_iso_datetime('2015-12-31T12:05:00.25Z') == datetime(2015, 12, 31, 12, 5, 0, 250000)
+    assert ingest.parse_iso_datetime('2015-12-31T12:05:00-0130') == datetime(2015, 12, 31, 13, 35)
+    assert ingest.parse_iso_datetime('2015-12-31') is None
+    assert ingest.parse_iso_datetime('2015-13-31T12:05:00') is None
+    assert ingest.parse_iso_datetime('not a datetime') is None
+
+
+def test_from_json_bytes():
+    data = json.dumps(query_json).encode()
+    expr = Expr.from_json_bytes(data, parse_datetimes=True)
+    assert deep_equal(expr.to_query_json(), {'__and__': [
+        {'__or__': [
+            {'__and__': [
+                {'create_ts': {'__gt__': datetime(2014, 1, 1)}},
+                {'create_ts': {'__lte__': datetime(2015, 12, 31, 12, 5)}},
+                {'version': {'__gte__': 1}},
+                {'version': {'__lt__': 3}},
+            ]},
+            {'__not__': {'update_ts': {'__in__': [datetime(2016, 2, 3, 4, 5, 6, 500000), 'latest']}}},
+            {'comment': {'__regex__': '2016-02-03T04:05:06'}},
+        ]},
+        {'act_type': {'__nin__': ['logging', 'eval']}},
+        {'created': {'__eq__': datetime(2015, 1, 1)}},
+        {'rule_id': {'__in__': [6666, '7777', 8888]}},
+        {'rule_name': {'__regex__': 'logging_.*'}},
+        {'rule_writer': {'__neqf__': 'rule_owner'}},
+    ]})
+    assert expr.predicates_on('created')[0].parent is expr
+    assert isinstance(Expr.from_json_bytes(b'{"a": "2015-01-01T00:00:00"}', parse_datetimes=True).right,
+                      DateTimeLiteral)
+
+    # by default, the expr is that of json.loads and Expr.from_json
+    expr = Expr.from_json_bytes(data.decode())
+    assert isinstance(expr.predicates_on('created')[0].right, StringLiteral)
+    assert deep_equal(expr.to_query_json(), Expr.from_json(json.loads(data)).to_query_json())
+    name = Expr.from_json_bytes(b'{"name": "2020-01-01T00:00"}')
+    assert isinstance(name.right, StringLiteral) and name.right.literal == '2020-01-01T00:00'
+    assert ingest.loads(b'{"name": "2020-01-01T00:00"}') == {'name': '2020-01-01T00:00'}
+
+
+def test_from_json_stream():
+    data = json.dumps(query_json).encode()
+    assert deep_equal(Expr.from_json_stream(io.BytesIO(data)).to_query_json(),
+                      Expr.from_json_bytes(data).to_query_json())
+    assert deep_equal(Expr.from_json_stream(io.BytesIO(data), parse_datetimes=True).to_query_json(),
+                      Expr.from_json_bytes(data, parse_datetimes=True).to_query_json())
+
+
+def test_build_from_events():
+    events = [
+        ('start_map', None),
+        ('map_key', 'a'), ('start_array', None), ('number', 1), ('string', 'x'), ('start_map', None),
+        ('end_map', None), ('end_array', None),
+        ('map_key', 'b'), ('start_map', None), ('map_key', '__null__'), ('boolean', True), ('end_map', None),
+        ('map_key', 'c'), ('null', None),
+        ('end_map', None),
+    ]
+    assert ingest.build_from_events(iter(events)) == {'a': [1, 'x', {}], 'b': {'__null__': True}, 'c': None}
+    assert ingest.build_from_events([('number', 1)]) == 1
+    with pytest.raises(InvalidQuery):
+        ingest.build_from_events(events[:-1])
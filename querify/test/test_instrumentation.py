@@ -0,0 +1,84 @@
+import pytest
+
+import querify
+from .. import instrumentation
+from ..querify import Expr
+from ..visitor import Visitor
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset_stats()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset_stats()
+
+
+def test_disabled_by_default():
+    instrumentation.reset_stats()
+    Expr.from_json({'a': 1}).to_query('mysql')
+    assert querify.stats() == {'enabled': False, 'timers': {}, 'counters': {}, 'caches': {}, 'maxima': {}}
+
+
+def test_phases_and_counters(enabled):
+    expr = Expr.from_json({'a': 1, 'b': [1, 2], '__not__': {'c': {'__gt__': 1}}})
+    expr.to_query('mysql')
+    expr.to_query('mysql')
+    expr.to_query('mongo')
+    Expr.from_bytes(expr.to_bytes())
+    Expr.from_json({'a': 1})
+
+    stats = querify.stats()
+    assert stats['enabled']
+    timers = stats['timers']
+    assert timers['from_json']['count'] == 2
+    assert timers['from_json.construct']['count'] == 2
+    assert timers['from_json.link_parents']['count'] == 2
+    assert timers['normalize']['count'] >= 2
+    assert timers['to_query.mysql']['count'] == 2
+    assert timers['to_query.mongo']['count'] == 1
+    assert timers['to_bytes']['count'] == timers['from_bytes']['count'] == 1
+    assert timers['from_json']['total'] >= timers['from_json.construct']['total']
+    assert timers['to_query.mysql']['mean'] == timers['to_query.mysql']['total'] / 2
+
+    counters = stats['counters']
+    assert counters['nodes.And'] == 2
+    assert counters['nodes.In'] == 2
+    assert counters['nodes.EqualValue'] == 3
+    assert counters['nodes.IntLiteral'] == 9
+    assert counters['dispatch.lookups'] > counters['dispatch.misses'] > 0
+    assert stats['maxima']['tree_size'] == 12
+
+    querify.reset_stats()
+    assert querify.stats()['timers'] == {}
+
+
+def test_cache_stats_and_hooks(enabled):
+    events = []
+
+    def hook(kind, name, value):
+        events.append((kind, name, value))
+
+    class Noop(Visitor):
+        pass
+
+    instrumentation.add_hook(hook)
+    try:
+        Noop().visit(Expr.from_json({'a': 1, 'b': 2}))
+    finally:
+        instrumentation.remove_hook(hook)
+    cache = querify.stats()['caches']['visitor.dispatch']
+    assert cache['misses'] == 4
+    assert cache['hits'] == 3
+    assert cache['hit_rate'] == 3 / 7
+    assert ('max', 'tree_size', 7) in events
+    assert ('cache', 'visitor.dispatch', True) in events
+    assert any(kind == 'time' and name == 'from_json' for kind, name, _ in events)
+
+
+def test_regex_cache_stats(enabled):
+    expr = Expr.from_json({'a': '/^regex_cache_stats_[0-9]+$/'})
+    expr.to_query('mongo')
+    expr.to_query('mongo')
+    assert querify.stats()['caches']['regex'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
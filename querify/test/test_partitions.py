@@ -0,0 +1,103 @@
+import random
+import zlib
+from datetime import datetime, timedelta
+
+from ..querify import Expr
+from ..bounds import Interval, field_intervals
+from ..partitions import RangePartition, RangePartitioning, HashPartitioning, prune_partitions
+
+
+DAYS = RangePartitioning('day', [
+    RangePartition('d{}'.format(i), datetime(2020, 1, 1) + timedelta(days=i),
+                   datetime(2020, 1, 2) + timedelta(days=i))
+    for i in range(10)])
+TENANTS = HashPartitioning('tenant_id', ['s0', 's1', 's2', 's3'], lambda v: zlib.crc32(str(v).encode()))
+
+
+def names(partitions):
+    return [p.name for p in partitions]
+
+
+def test_field_intervals():
+    expr = Expr.from_json({'__or__': [{'a': [5, 1, 3]}, {'a': {'__gt__': 2, '__lte__': 3}}, {'b': 1, 'a': 9}]})
+    assert field_intervals(expr, 'a') == [Interval(1, 1), Interval(2, 3, False, True), Interval(5, 5), Interval(9, 9)]
+    assert field_intervals(expr, 'b') == [Interval()]
+    assert field_intervals(Expr.from_json({'a': {'__neq__': 1}}), 'a') == \
+        [Interval(upper=1, upper_closed=False), Interval(lower=1, lower_closed=False)]
+    assert field_intervals(Expr.from_json({'a': {'__gt__': 1, '__lt__': 1}}), 'a') == []
+    assert field_intervals(Expr.from_json({'__not__': {'a': {'__lt__': 1}}}), 'a') == [Interval(lower=1)]
+    assert field_intervals(Expr.from_json({'a': [1, 'x']}), 'a') == [Interval()]
+
+
+def test_range_partitioning():
+    def prune(filter_json):
+        return names(DAYS.prune(Expr.from_json(filter_json)))
+
+    assert prune({'day': {'__gte__': datetime(2020, 1, 3), '__lt__': datetime(2020, 1, 5)}}) == ['d2', 'd3']
+    assert prune({'day': {'__gt__': datetime(2020, 1, 3), '__lte__': datetime(2020, 1, 5)}}) == ['d2', 'd3', 'd4']
+    assert prune({'day': {'__in__': [datetime(2020, 1, 2), datetime(2020, 1, 9)]}}) == ['d1', 'd8']
+    assert prune({'__or__': [{'day': datetime(2020, 1, 1)}, {'day': {'__gte__': datetime(2020, 1, 10)}}]}) == \
+        ['d0', 'd9']
+    assert prune({'__not__': {'day': {'__lt__': datetime(2020, 1, 9)}}}) == ['d8', 'd9']
+    assert prune({'day': {'__lt__': datetime(2020, 1, 1)}}) == []
+    assert prune({'tenant_id': 3}) == names(DAYS.partitions)
+    assert names(DAYS.prune(None)) == names(DAYS.partitions)
+
+
+def test_hash_partitioning():
+    shard = {v: TENANTS.shards[zlib.crc32(str(v).encode()) % 4] for v in range(20)}
+    assert TENANTS.prune(Expr.from_json({'tenant_id': 3})) == [shard[3]]
+    assert TENANTS.prune(Expr.from_json({'tenant_id': {'__in__': [1, 2]}})) == sorted({shard[1], shard[2]})
+    assert TENANTS.prune(Expr.from_json({'tenant_id': {'__gte__': 1, '__lte__': 1}})) == [shard[1]]
+    assert TENANTS.prune(Expr.from_json({'tenant_id': {'__gte__': 1, '__lte__': 2}})) == TENANTS.shards
+    assert TENANTS.prune(Expr.from_json({'tenant_id': {'__neq__': 1}})) == TENANTS.shards
+
+
+def test_prune_partitions():
+    expr = Expr.from_json({'__or__': [{'day': datetime(2020, 1, 1), 'tenant_id': 3},
+                                      {'day': datetime(2020, 1, 2), 'tenant_id': 4}]})
+    shard = TENANTS.prune(Expr.from_json({'tenant_id': 3}))[0], TENANTS.prune(Expr.from_json({'tenant_id': 4}))[0]
+    assert [(p.name, s) for p, s in prune_partitions(expr, DAYS, TENANTS)] == [('d0', shard[0]), ('d1', shard[1])]
+
+
+def random_filter(rnd, depth):
+    if depth <= 0 or rnd.random() < 0.3:
+        field = rnd.choice(['day', 'other'])
+        kind = rnd.randrange(3)
+        if kind == 0:
+            op = rnd.choice(['__eq__', '__neq__', '__gt__', '__gte__', '__lt__', '__lte__'])
+            return {field: {op: rnd.randrange(12)}}
+        if kind == 1:
+            return {field: {'__in__': rnd.sample(range(12), 2)}}
+        return {'__not__': random_filter(rnd, depth - 1)}
+    op = rnd.choice(['__and__', '__or__', '__not__'])
+    if op == '__not__':
+        return {op: random_filter(rnd, depth - 1)}
+    return {op: [random_filter(rnd, depth - 1) for _ in range(rnd.randint(1, 3))]}
+
+
+def test_pruning_is_sound_and_minimal():
+    rnd = random.Random(0)
+    partitioning = RangePartitioning('day', [RangePartition(str(i), 2 * i, 2 * i + 2) for i in range(5)])
+    rows = [{'day': day, 'other': other} for day in range(-1, 12) for other in range(12)]
+    for _ in range(300):
+        expr = Expr.from_json(random_filter(rnd, 3))
+        pruned = partitioning.prune(expr)
+        for p in partitioning.partitions:
+            if any(row['day'] in p.interval and evaluate(expr, row) for row in rows):
+                assert p in pruned, expr.to_query('mysql')
+
+
+def evaluate(expr, row):
+    key = expr.key
+    if key in ('__and__', '__all__'):
+        return all(evaluate(e, row) for e in expr.exprs)
+    if key in ('__or__', '__any__'):
+        return any(evaluate(e, row) for e in expr.exprs)
+    if key == '__not__':
+        return not evaluate(expr.operand, row)
+    value = row[expr.left.literal]
+    if key == '__in__':
+        return value in [e.literal for e in expr.right]
+    return {'__eq__': value.__eq__, '__neq__': value.__ne__, '__gt__': value.__gt__, '__gte__': value.__ge__,
+            '__lt__': value.__lt__, '__lte__': value.__le__}[key](expr.right.literal)
@@ -0,0 +1,31 @@
+from ..querify import Expr, Select
+from ..projection import required_columns, residual_columns
+
+
+def test_residual_columns():
+    assert residual_columns(Expr.from_json({'b': 1, 'a': {'__gtf__': 'c'}})) == ['a', 'c', 'b']
+    assert residual_columns(None) == []
+
+
+def test_required_columns():
+    select = Select(table='t', where={'a': 1, 'b': 2}, order_by=['ts', 'id'])
+    residual = Expr.from_json({'y': {'__gt__': 1}, 'x': 2})
+    assert required_columns(select, ['x', 'id']) == ['x', 'id', 'ts']
+    assert required_columns(select, ['x'], residual) == ['x', 'ts', 'id', 'y']
+    assert required_columns(select, ['x'], include_where=True) == ['x', 'ts', 'id', 'a', 'b']
+    assert required_columns(Select(table='t', where={'a': 1})) == []
+
+
+def test_project():
+    select = Select(table='t', where={'a': 1, 'b': 2}, order_by=['id'], limit=5)
+    projected = select.project(['x'], residual=Expr.from_json({'y': 1}))
+    assert projected.to_query('mysql') == 'SELECT x,id,y FROM t WHERE (a = 1) AND (b = 2) ORDER BY id LIMIT 5'
+    assert projected.to_query('mongo') == {
+        'filter': {'$and': [{'a': {'$eq': 1}}, {'b': {'$eq': 2}}]},
+        'projection': {'x': 1, 'id': 1, 'y': 1, '_id': 0},
+        'sort': [('id', 1)],
+        'limit': 5,
+    }
+    assert select.to_query('mysql') == 'SELECT * FROM t WHERE (a = 1) AND (b = 2) ORDER BY id LIMIT 5'
+    assert Select(table='t').project().to_query('mysql') == 'SELECT * FROM t'
+    assert Select(table='t', columns=['_id', 'a']).to_query('mongo') == {'filter': {}, 'projection': {'_id': 1, 'a': 1}}
@@ -1,12 +1,17 @@
+import random
 import re
+import sqlite3
 from datetime import datetime
 
+import pytest
+
 from ..querify import Expr, And, SchemaLiteral, RegexLiteral, IntLiteral, MatchRegex, StringLiteral, \
     InverseMatchRegex, \
     Or, DateTimeLiteral, \
     FloatLiteral, ClassFromJsonWithSubclassDictMeta, Select, ShowTagKeys, ShowColumns, EqualValue, NotEqualValue, \
     GreaterThanValue, GreaterThanOrEqualValue, LessThanValue, LessThanOrEqualValue, EqualField, NotEqualField, \
-    GreaterThanField, GreaterThanOrEqualField, LessThanField, LessThanOrEqualField, Null, In, NotIn, BinaryBooleanExpr
+    GreaterThanField, GreaterThanOrEqualField, LessThanField, LessThanOrEqualField, Null, In, NotIn, BinaryBooleanExpr, \
+    compile_regex, OrderBy, InvalidQuery
 from qutils.functions import deep_equal
 
 
@@ -590,6 +595,71 @@ def test_select_stmt():
         'SELECT * FROM m'
 
 
+def test_order_by_and_limit():
+    select = Select(table='t', columns=['a', 'id'], where={'x': 1}, order_by=['a', OrderBy('id', descending=True)],
+                    limit=10)
+    assert select.to_query('mysql') == 'SELECT a,id FROM t WHERE x = 1 ORDER BY a, id DESC LIMIT 10'
+    assert select.to_query('postgres') == \
+        ('SELECT "a", "id" FROM "t" WHERE "x" = %s ORDER BY "a", "id" DESC LIMIT %s', [1, 10])
+    assert select.to_query('mongo') == {'filter': {'x': {'$eq': 1}}, 'projection': {'a': 1, 'id': 1, '_id': 0},
+                                        'sort': [('a', 1), ('id', -1)], 'limit': 10}
+    assert Select(table='t').to_query('mongo') == {'filter': {}}
+
+    page = select.seek_after([5, 100])
+    assert page.to_query('mysql') == \
+        'SELECT a,id FROM t WHERE (x = 1) AND (a >= 5) AND ((a > 5) OR ((a = 5) AND (id < 100))) ' \
+        'ORDER BY a, id DESC LIMIT 10'
+    assert page.to_query('mongo')['filter'] == {'$and': [
+        {'x': {'$eq': 1}},
+        {'a': {'$gte': 5}},
+        {'$or': [{'a': {'$gt': 5}}, {'$and': [{'a': {'$eq': 5}}, {'id': {'$lt': 100}}]}]},
+    ]}
+    assert select.seek_after({'id': 100, 'a': 5}).to_query('mysql') == page.to_query('mysql')
+    assert select.to_query('mysql') == 'SELECT a,id FROM t WHERE x = 1 ORDER BY a, id DESC LIMIT 10'
+
+    series = Select(table='cpu', where={'host': 'a'}, order_by=[OrderBy('time', descending=True)], limit=100)
+    assert series.seek_after([datetime(2020, 1, 1)]).to_query('influx') == \
+        'SELECT * FROM "cpu" WHERE ("host" = \'a\') AND ("time" < \'2020-01-01T00:00:00Z\') ' \
+        'ORDER BY time DESC LIMIT 100'
+    with pytest.raises(NotImplementedError):
+        Select(table='cpu', order_by=['host']).to_query('influx')
+
+    with pytest.raises(InvalidQuery):
+        Select(table='t').seek_after([1])
+    with pytest.raises(InvalidQuery):
+        select.seek_after([1])
+    with pytest.raises(InvalidQuery):
+        select.seek_after([None, 1])
+    with pytest.raises(InvalidQuery, match="'id'"):
+        select.seek_after({'a': 5})
+    with pytest.raises(InvalidQuery):
+        Select(table='t', limit=-1)
+
+
+def test_keyset_pagination():
+    rnd = random.Random(0)
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, a INTEGER, b TEXT)')
+    connection.executemany('INSERT INTO t VALUES (?, ?, ?)',
+                           [(i, rnd.randint(0, 9), rnd.choice('xyz')) for i in range(500)])
+    for order_by in [['id'], ['a', 'id'], [OrderBy('a', descending=True), 'b', OrderBy('id', descending=True)]]:
+        select = Select(table='t', columns=['a', 'b', 'id'], where={'b': {'__neq__': 'z'}}, order_by=order_by, limit=37)
+        sql, params = Select(table='t', columns=['a', 'b', 'id'], where=select.where,
+                             order_by=order_by).to_query('sqlite')
+        expected = connection.execute(sql, params).fetchall()
+        rows = []
+        page = select
+        while True:
+            sql, params = page.to_query('sqlite')
+            page_rows = connection.execute(sql, params).fetchall()
+            rows.extend(page_rows)
+            if len(page_rows) < select.limit:
+                break
+            last = dict(zip(['a', 'b', 'id'], page_rows[-1]))
+            page = select.seek_after(last)
+        assert rows == expected
+
+
 def test_show_tag_keys():
     query_json = {
         'rule_id': [6666, '7777', 8888],
@@ -642,13 +712,13 @@ def test_not_and_null():
 
     expr = Expr.from_json(query_json)
     assert expr.to_query('mysql') == \
-           "(rule_name <> 'logging_rddms') AND (NOT (rule_name = 'invalid_name')) AND (rule_body is NOT NULL) AND ((version = 4))"
+           "(rule_name <> 'logging_rddms') AND (rule_name <> 'invalid_name') AND (rule_body is NOT NULL) AND ((version = 4))"
     assert expr.to_query('pandas') == \
            "(rule_name != 'logging_rddms') & (~(rule_name == 'invalid_name')) & (~pandas.isnull(rule_body)) & ((version == 4))"
     assert deep_equal(expr.to_query('mongo'), {
         '$and': [
             {'rule_name': {'$ne': 'logging_rddms'}},
-            {'rule_name': {'$not': {'$eq': 'invalid_name'}}},
+            {'rule_name': {'$ne': 'invalid_name'}},
             {'rule_body': {'$ne': None}},
             {'$or': [
                 {'version': {'$eq': 4}}
@@ -758,3 +828,98 @@ def test_pluto():
       - ((inconsistency does not equal "low") and (latency is at least 3.2))
       - ((inconsistency does not equal "low") and (latency is less than 3.2))
       - ((inconsistency equals "low") and ((latency is at most -1) or (latency is more than 100)))"""
+
+
+def test_field_index():
+    query_json = {
+        'tenant_id': 42,
+        'ts': {'__gte__': datetime(2015, 1, 1), '__lt__': datetime(2015, 2, 1)},
+        'rule_writer': {'__eqf__': 'rule_owner'},
+        '__or__': [
+            {'tenant_id': [1, 2]},
+            {'__not__': {'version': {'__gt__': 3}}},
+        ]
+    }
+    expr = Expr.from_json(query_json)
+    assert expr._field_index is None
+    assert sorted(expr.referenced_fields()) == ['rule_owner', 'rule_writer', 'tenant_id', 'ts', 'version']
+    assert expr._field_index is not None
+    assert [type(e) for e in expr.predicates_on('tenant_id')] == [In, EqualValue]
+    assert [type(e) for e in expr.predicates_on('ts')] == [GreaterThanOrEqualValue, LessThanValue]
+    assert [type(e) for e in expr.predicates_on('rule_owner')] == [EqualField]
+    assert expr.predicates_on('rule_owner') == expr.predicates_on('rule_writer')
+    assert expr.predicates_on('nothing') == []
+    assert expr.references_field('version')
+    assert not expr.references_field('nothing')
+
+    transformed = expr.transform()
+    assert transformed._field_index is not None
+    assert not set(map(id, transformed.predicates_on('ts'))) & set(map(id, expr.predicates_on('ts')))
+    assert expr.transform()._field_index is not None
+    assert Expr.from_json(query_json).transform()._field_index is None
+
+    without_tenant = expr.without_field('tenant_id')
+    assert not without_tenant.references_field('tenant_id')
+    assert deep_equal(without_tenant.to_query_json(), {'__and__': [
+        {'__or__': [{'__not__': {'version': {'__gt__': 3}}}]},
+        {'rule_writer': {'__eqf__': 'rule_owner'}},
+        {'ts': {'__gte__': datetime(2015, 1, 1)}},
+        {'ts': {'__lt__': datetime(2015, 2, 1)}},
+    ]})
+    assert without_tenant.predicates_on('version')[0] is not expr.predicates_on('version')[0]
+
+    expr.rename_field('ts', 'time')
+    assert not expr.references_field('ts')
+    assert [e.left.literal for e in expr.predicates_on('time')] == ['time', 'time']
+    assert expr.to_query_mysql() == \
+        "((tenant_id IN (1, 2)) OR (version <= 3)) AND (rule_writer = rule_owner) AND " \
+        "(tenant_id = 42) AND (time >= '2015-01-01 00:00:00') AND (time < '2015-02-01 00:00:00')"
+    expr.rename_field('rule_owner', 'rule_writer')
+    assert expr.predicates_on('rule_writer') == expr.predicates_on('rule_writer')[:1]
+    assert expr.predicates_on('rule_writer')[0].right.literal == 'rule_writer'
+    renamed = expr.predicates_on('rule_writer')[0]
+    assert renamed.left is not renamed.right and renamed.left.parent is renamed and renamed.right.parent is renamed
+    first, second = expr.predicates_on('time')
+    assert first.left is not second.left and first.left.parent is first
+
+    nested = Expr.from_json({'__and__': [{'__or__': [{'a': 1}, {'b': 2}]}, {'c': 3}]})
+    branch = nested.predicates_on('a')[0].parent
+    assert branch.implies(Expr.from_json({'__or__': [{'a': 1}, {'b': 2}]}))
+    assert branch.references_field('a')
+    nested.rename_field('a', 'd')
+    assert not branch.references_field('a') and branch.references_field('d')
+    assert not branch.implies(Expr.from_json({'__or__': [{'a': 1}, {'b': 2}]}))
+
+    predicate = Expr.from_json({'a': 1})
+    assert predicate.referenced_fields() == ['a']
+    assert predicate._field_index is None
+
+
+def test_parent_links_are_cycle_free():
+    import gc
+    import weakref
+
+    expr = Expr.from_json({'a': [1, 2], '__or__': [{'b': {'__gt__': 1}}, {'__not__': {'c': '/x/'}}]})
+    regex = next(e for e in expr.iter_expr() if isinstance(e, RegexLiteral))
+    assert [type(e).__name__ for e in regex.ancestors()] == ['RegexLiteral', 'MatchRegex', 'Not', 'Or', 'And']
+    assert expr.parent is None
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        expr_ref = weakref.ref(expr)
+        del expr
+        assert expr_ref() is None
+        assert regex.parent is None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def test_compile_regex():
+    assert compile_regex('^logging_.*') is compile_regex('^logging_.*')
+    assert compile_regex('^logging_.*', re.IGNORECASE) is not compile_regex('^logging_.*')
+    assert compile_regex('^logging_.*', re.IGNORECASE).flags & re.IGNORECASE
+    expr = Expr.from_json({'rule_name': '/^logging_.*/'})
+    assert expr.right.compiled is compile_regex('^logging_.*')
+    assert expr.to_query('mongo')['rule_name'] is compile_regex('^logging_.*')
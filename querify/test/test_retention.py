@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from ..querify import Select
+from ..bounds import Interval
+from ..retention import RetentionPolicy, choose_retention_policy
+
+
+now = datetime(2020, 6, 1)
+policies = [
+    RetentionPolicy('raw', timedelta(days=7)),
+    RetentionPolicy('1m', timedelta(days=90), timedelta(minutes=1)),
+    RetentionPolicy('10m', timedelta(days=365), timedelta(minutes=10)),
+    RetentionPolicy('1h', None, timedelta(hours=1)),
+]
+
+
+def choose(lower, resolution=None):
+    policy = choose_retention_policy(policies, Interval(lower=lower), resolution, now)
+    return policy and policy.name
+
+
+def test_choose_retention_policy():
+    assert choose(now - timedelta(days=1)) == 'raw'
+    assert choose(now - timedelta(days=30)) is None
+    assert choose(now - timedelta(days=1), timedelta(minutes=5)) == '1m'
+    assert choose(now - timedelta(days=30), timedelta(minutes=30)) == '10m'
+    assert choose(now - timedelta(days=30), timedelta(hours=2)) == '1h'
+    assert choose(now - timedelta(days=400), timedelta(hours=1)) == '1h'
+    assert choose(now - timedelta(days=400), timedelta(minutes=30)) is None
+    assert choose(None, timedelta(days=1)) == '1h'
+
+    # aware bounds, compared with a naive and an aware now
+    plus_eight = timezone(timedelta(hours=8))
+    assert choose(datetime(2020, 5, 25, 7, tzinfo=plus_eight)) is None
+    assert choose(datetime(2020, 5, 25, 9, tzinfo=plus_eight)) == 'raw'
+    interval = Interval(lower=datetime(2020, 5, 25, 9, tzinfo=plus_eight))
+    assert choose_retention_policy(policies, interval, now=now.replace(tzinfo=timezone.utc)).name == 'raw'
+    assert choose_retention_policy(policies, Interval(lower=datetime.now(timezone.utc))).name == 'raw'
+    naive_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert choose_retention_policy(policies, Interval(lower=naive_now - timedelta(days=30))) is None
+
+
+def test_route_retention_policy():
+    select = Select(table='cpu', db='telegraf', retention_policy='autogen',
+                    where={'time': {'__gte__': datetime(2020, 5, 1), '__lt__': datetime(2020, 5, 2)}, 'host': 'a'})
+    assert select.time_range() == Interval(datetime(2020, 5, 1), datetime(2020, 5, 2), upper_closed=False)
+    routed = select.route_retention_policy(policies, timedelta(minutes=5), now)
+    assert routed.to_query('influx') == \
+        'SELECT * FROM "telegraf"."1m"."cpu" WHERE ("host" = \'a\') AND ("time" >= \'2020-05-01T00:00:00Z\') AND ' \
+        '("time" < \'2020-05-02T00:00:00Z\')'
+    assert select.retention_policy.literal == 'autogen'
+    assert select.route_retention_policy(policies, now=now).retention_policy.literal == 'autogen'
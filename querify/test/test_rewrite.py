@@ -0,0 +1,179 @@
+import random
+import sqlite3
+
+from ..querify import Expr, Not, Select
+from ..dialects.sqlite import SQLiteDialect, register_functions
+from ..rewrite import push_negations, negate, MISSING_SAFE_COMPLEMENTS, rewrite_prefix_regexes, split_anchored_prefix, \
+    successor, normalize
+from qutils.functions import deep_equal
+
+
+def test_push_negations():
+    expr = Expr.from_json({'__not__': {'__or__': [
+        {'a': {'__gt__': 1}},
+        {'b': [1, 2]},
+        {'__not__': {'c': '/^x/'}},
+        {'d': {'__null__': True}},
+        {'__and__': [{'e': {'__eqf__': 'f'}}, {'g': {'__gte__': 3}}]},
+    ]}})
+    assert deep_equal(push_negations(expr).to_query('json'), {'__and__': [
+        {'a': {'__lte__': 1}},
+        {'b': {'__nin__': [1, 2]}},
+        {'c': {'__regex__': '^x'}},
+        {'d': {'__null__': False}},
+        {'__or__': [{'e': {'__neqf__': 'f'}}, {'g': {'__lt__': 3}}]},
+    ]})
+    assert deep_equal(push_negations(expr, MISSING_SAFE_COMPLEMENTS).to_query('json'), {'__and__': [
+        {'__not__': {'a': {'__gt__': 1}}},
+        {'b': {'__nin__': [1, 2]}},
+        {'c': {'__regex__': '^x'}},
+        {'d': {'__null__': False}},
+        {'__or__': [{'e': {'__neqf__': 'f'}}, {'__not__': {'g': {'__gte__': 3}}}]},
+    ]})
+    # The input is left untouched.
+    assert isinstance(expr, Not) and expr.to_query('json')['__not__']['__or__'][0] == {'a': {'__gt__': 1}}
+
+    assert push_negations(Expr.from_json({'__not__': {'__all__': [{'a': 1}]}})).to_query('json') == \
+        {'__any__': [{'a': {'__neq__': 1}}]}
+    assert push_negations(Expr.from_json({'__not__': {'__not__': {'a': 1}}})).to_query('json') == {'a': {'__eq__': 1}}
+
+    # push_negations copies the tree, while negate shares the literals and the predicates that are kept.
+    expr = Expr.from_json({'__or__': [{'a': {'__gt__': 1}}, {'__not__': {'b': 2}}]})
+    pushed, negated = push_negations(expr), negate(expr)
+    assert pushed.exprs[0] is not expr.exprs[0] and pushed.exprs[0].left is not expr.exprs[0].left
+    assert negated.to_query('json') == {'__and__': [{'a': {'__lte__': 1}}, {'b': {'__eq__': 2}}]}
+    assert negated.exprs[0].left is expr.exprs[0].left and negated.exprs[1] is expr.exprs[1].operand
+
+
+def test_rendering():
+    expr = Expr.from_json({'__not__': {'__or__': [{'a': {'__gt__': 1}}, {'b': 2}]}})
+    assert expr.to_query('mysql') == '(a <= 1) AND (b <> 2)'
+    assert expr.to_query('influx') == '("a" <= 1) AND ("b" != 2)'
+    assert deep_equal(expr.to_query('mongo'), {'$and': [{'a': {'$not': {'$gt': 1}}}, {'b': {'$ne': 2}}]})
+    assert expr.to_query('pandas') == '~((a > 1) | (b == 2))'
+
+    # The negation is cached on the Not node until the tree is changed.
+    assert expr.negation() is expr.negation() is not expr.negation(MISSING_SAFE_COMPLEMENTS)
+    expr.link_parents()
+    expr.rename_field('a', 'c')
+    assert expr.to_query('mysql') == '(c <= 1) AND (b <> 2)'
+
+
+class NotSQLiteDialect(SQLiteDialect):
+    def emit_Not(self, expr):
+        return 'NOT ({})'.format(self.compile(expr.operand))
+
+
+def random_filter(rnd, depth):
+    if depth <= 0 or rnd.random() < 0.3:
+        field = rnd.choice('abc')
+        kind = rnd.randrange(6)
+        if kind == 0:
+            return {field: {rnd.choice(['__eq__', '__neq__', '__gt__', '__gte__', '__lt__', '__lte__']): rnd.randrange(4)}}
+        if kind == 1:
+            return {field: {rnd.choice(['__in__', '__nin__']): rnd.sample(range(4), 2)}}
+        if kind == 2:
+            return {field: {rnd.choice(['__null__', '__missing__']): rnd.random() < 0.5}}
+        if kind == 3:
+            return {field: {rnd.choice(['__regex__', '__iregex__']): '^[01]'}}
+        if kind == 4:
+            return {field: {rnd.choice(['__eqf__', '__neqf__', '__gtf__', '__ltef__']): rnd.choice('abc')}}
+        return {'__not__': random_filter(rnd, depth - 1)}
+    op = rnd.choice(['__and__', '__or__', '__not__'])
+    if op == '__not__':
+        return {op: random_filter(rnd, depth - 1)}
+    return {op: [random_filter(rnd, depth - 1) for _ in range(rnd.randint(1, 3))]}
+
+
+def test_equivalence_under_nulls():
+    rnd = random.Random(0)
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+    connection.execute('CREATE TABLE t (id INTEGER, a INTEGER, b INTEGER, c INTEGER)')
+    rows = [(i, a, b, c) for i, (a, b, c) in enumerate(
+        (rnd.choice([None, 0, 1, 2, 3]), rnd.choice([None, 0, 1, 2, 3]), rnd.choice([None, 0, 1, 2, 3]))
+        for _ in range(200))]
+    connection.executemany('INSERT INTO t VALUES (?, ?, ?, ?)', rows)
+
+    def ids(dialect, expr):
+        sql, params = dialect.render(Select(table='t', columns=['id'], where=expr))
+        return [row[0] for row in connection.execute(sql, params)]
+
+    for _ in range(300):
+        expr = Expr.from_json({'__not__': random_filter(rnd, 3)})
+        pushed = push_negations(expr)
+        assert not any(isinstance(e, Not) for e in pushed.iter_expr())
+        assert ids(SQLiteDialect(), pushed) == ids(NotSQLiteDialect(), expr)
+
+
+def test_split_anchored_prefix():
+    assert split_anchored_prefix('^prod-') == ('prod-', '')
+    assert split_anchored_prefix('^prod-$') == ('prod-', '$')
+    assert split_anchored_prefix('^a\\.b\\d+') == ('a.b', '\\d+')
+    assert split_anchored_prefix('^abc*') == ('ab', 'c*')
+    assert split_anchored_prefix('^abc+') == ('abc', '+')
+    assert split_anchored_prefix('^(a|b)c') == ('', '(a|b)c')
+    assert split_anchored_prefix('^ab|cd') is None
+    assert split_anchored_prefix('^ab(?i)') is None
+    assert split_anchored_prefix('prod-') is None
+    assert successor('prod-') == 'prod.'
+    assert successor('a\U0010ffff') == 'b'
+    assert successor('\U0010ffff') is None
+
+
+def test_rewrite_prefix_regexes():
+    expr = Expr.from_json({
+        'a': '/^prod-/',
+        'b': '/^prod$/',
+        'c': {'__iregex__': '^prod$'},
+        'd': '/^log_[0-9]+$/',
+        'e': '/prod/',
+        'f': {'__iregex__': '^prod-'},
+    })
+    assert rewrite_prefix_regexes(expr).to_query('mysql') == \
+        "((a >= 'prod-') AND (a < 'prod.')) AND (b = 'prod') AND (c <> 'prod') AND " \
+        "((d >= 'log_') AND (d < 'log`') AND (d REGEXP '^log_[0-9]+$')) AND (e REGEXP 'prod') AND " \
+        "(f NOT REGEXP '^prod-')"
+    assert expr.to_query('mysql').startswith("(a REGEXP '^prod-')")
+
+
+def test_prefix_regex_equivalence():
+    rnd = random.Random(0)
+    alphabet = ['a', 'b', 'z', '-', '.', '_', '0', '9', '\U0010ffff']
+    connection = sqlite3.connect(':memory:')
+    register_functions(connection)
+    connection.execute('CREATE TABLE t (id INTEGER, s TEXT)')
+    values = [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 6))) for _ in range(500)] + [None]
+    connection.executemany('INSERT INTO t VALUES (?, ?)', enumerate(values))
+
+    fragments = ['a', 'b', 'z', '-', '\\.', '_', '\U0010ffff', '.', '[0-9]', 'a*', 'b+', 'z?', '(a|b)', '\\d']
+
+    def ids(expr):
+        sql, params = Select(table='t', columns=['id'], where=expr).to_query('sqlite')
+        return [row[0] for row in connection.execute(sql, params)]
+
+    for _ in range(200):
+        pattern = '^' + ''.join(rnd.choice(fragments) for _ in range(rnd.randint(1, 4))) + rnd.choice(['', '$'])
+        for op in ['__regex__', '__iregex__']:
+            expr = Expr.from_json({'s': {op: pattern}})
+            assert ids(rewrite_prefix_regexes(expr)) == ids(expr), pattern
+
+
+def test_normalize():
+    a = Expr.from_json({
+        'b': [3, 1, 3],
+        'a': {'__gt__': 1, '__gte__': 3, '__lt__': 9, '__lte__': 9},
+        '__and__': [{'c': 1}, {'__and__': [{'c': 1}, {'d': 2}]}],
+    })
+    b = Expr.from_json({'__and__': [
+        {'d': 2}, {'a': {'__lt__': 9}}, {'c': 1}, {'b': [1, 3]}, {'a': {'__gte__': 3}},
+    ]})
+    assert normalize(a).to_query('mysql') == '(a >= 3) AND (a < 9) AND (b IN (1, 3)) AND (c = 1) AND (d = 2)'
+    assert normalize(a).to_bytes() == normalize(b).to_bytes()
+    assert normalize(Expr.from_json({'__or__': [{'x': 2}, {'__or__': [{'x': 1}, {'x': 2}]}]})).to_query('mysql') == \
+        '(x = 1) OR (x = 2)'
+    assert normalize(Expr.from_json({'__not__': {'__or__': [{'a': 1}, {'b': {'__gt__': 1}}]}})).to_query('json') == \
+        {'__and__': [{'a': {'__neq__': 1}}, {'__not__': {'b': {'__gt__': 1}}}]}
+    # bounds are only merged within an And
+    assert normalize(Expr.from_json({'__or__': [{'a': {'__gt__': 1}}, {'a': {'__gt__': 3}}]})).to_query('mysql') == \
+        '(a > 1) OR (a > 3)'
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from ..querify import Expr, EqualValue, EqualField, And
+from ..visitor import Visitor, SKIP, STOP
+
+
+query_json = {
+    'rule_id': [6666, '7777', 8888],
+    'act_type': {'__nin__': ['logging', 'eval']},
+    'rule_writer': {'__neqf__': 'rule_owner'},
+    'last_modifier': {'__eqf__': 'rule_writer'},
+    '__or__': [
+        {
+            'create_ts': {'__lte__': datetime(2015, 12, 31, 12, 5),
+                          '__gt__': datetime(2014, 1, 1, 0, 0)},
+            'version': {'__lt__': 3, '__gte__': 1},
+        },
+        {'version': 4}
+    ],
+}
+
+
+def test_visit_order_matches_iter_expr():
+    class Collector(Visitor):
+        def __init__(self):
+            self.visited = []
+
+        def generic_visit(self, expr):
+            self.visited.append(expr)
+
+    expr = Expr.from_json(query_json)
+    collector = Collector()
+    assert collector.visit(expr)
+    assert collector.visited == list(expr.iter_expr())
+
+
+def test_dispatch_through_mro():
+    class Counter(Visitor):
+        def __init__(self):
+            self.counts = {}
+
+        def count(self, name):
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+        def visit_EqualValue(self, expr):
+            self.count('EqualValue')
+
+        def visit_Equal(self, expr):
+            self.count('Equal')
+
+        def visit_LogicalExpr(self, expr):
+            self.count('LogicalExpr')
+
+        def visit_LiteralExpr(self, expr):
+            self.count('LiteralExpr')
+
+    expr = Expr.from_json(query_json)
+    counter = Counter()
+    counter.visit(expr)
+    assert counter.counts == {'EqualValue': 1, 'Equal': 1, 'LogicalExpr': 3, 'LiteralExpr': 21}
+    assert Counter.dispatch(EqualValue) is Counter.visit_EqualValue
+    assert Counter.dispatch(EqualField) is Counter.visit_Equal
+    assert Counter.dispatch(And) is Counter.visit_LogicalExpr
+    assert EqualValue in Counter.dispatch_table
+    assert EqualValue not in Visitor.dispatch_table
+
+
+def test_skip_and_stop():
+    class FieldFinder(Visitor):
+        def __init__(self, field):
+            self.field = field
+            self.found = False
+            self.visited = 0
+
+        def generic_visit(self, expr):
+            self.visited += 1
+
+        def visit_BinaryBooleanExpr(self, expr):
+            self.visited += 1
+            if expr.left.literal == self.field:
+                self.found = True
+                return STOP
+            return SKIP
+
+        def visit_LiteralExpr(self, expr):
+            raise AssertionError('literals should have been skipped')
+
+    expr = Expr.from_json({'a': [1, 2, 3], 'b': {'__in__': list(range(1000))}, 'c': 5})
+    finder = FieldFinder('b')
+    assert not finder.visit(expr)
+    assert finder.found
+    assert finder.visited == 3
+
+    finder = FieldFinder('d')
+    assert finder.visit(expr)
+    assert not finder.found
+    assert finder.visited == 4
+
+
+def test_skip_list_operands():
+    class InCounter(Visitor):
+        def __init__(self):
+            self.ins = 0
+            self.literals = 0
+
+        def visit_In(self, expr):
+            self.ins += 1
+            return SKIP
+
+        def visit_LiteralExpr(self, expr):
+            self.literals += 1
+
+    expr = Expr.from_json({'a': list(range(100)), 'b': 1})
+    counter = InCounter()
+    counter.visit(expr)
+    assert counter.ins == 1
+    assert counter.literals == 2
@@ -0,0 +1,97 @@
+from . import instrumentation
+from .querify import Expr
+
+
+class VisitorAction:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+# Returned by a visit method to skip the sub exprs of the visited node.
+SKIP = VisitorAction('SKIP')
+# Returned by a visit method to stop the traversal entirely.
+STOP = VisitorAction('STOP')
+
+
+class DispatchTable(dict):
+    """
+    The methods of a dispatching class per expr class, resolved on the first lookup of each expr class, so that hot
+    loops dispatch with a single subscription: table[type(node)](self, node).
+    """
+
+    def __init__(self, cls):
+        super().__init__()
+        self.cls = cls
+
+    def __missing__(self, expr_cls):
+        cls = self.cls
+        prefix = cls.dispatch_prefix
+        for klass in expr_cls.__mro__:
+            method = getattr(cls, prefix + klass.__name__, None)
+            if method is not None:
+                break
+        else:
+            method = getattr(cls, cls.dispatch_fallback)
+        self[expr_cls] = method
+        return method
+
+
+class DispatchMeta(type):
+    """
+    Metaclass of classes dispatching on expr classes by method name: for a node, the method "<prefix><ClassName>" is
+    looked up along the MRO of the node class, where prefix is the "dispatch_prefix" attribute of the class, falling
+    back to the method named by "dispatch_fallback".
+    """
+
+    def __init__(cls, what, bases=None, dict=None):
+        super().__init__(what, bases, dict)
+        cls.dispatch_table = DispatchTable(cls)
+
+    def dispatch(cls, expr_cls):
+        """
+        Resolve the method of expr_cls, recording the lookup in the dispatch cache stats if instrumentation is enabled.
+        The result is cached per class, so the MRO is walked once per expr class. Hot loops subscribe dispatch_table
+        directly unless instrumentation is enabled.
+        """
+        table = cls.dispatch_table
+        if instrumentation.enabled:
+            instrumentation.record_cache(cls.dispatch_stats_name, expr_cls in table)
+        return table[expr_cls]
+
+
+class Visitor(metaclass=DispatchMeta):
+    """
+    Visitor walks an expr tree depth-first in pre-order and calls "visit_<ClassName>" for each node, where ClassName is
+    the name of the nearest class in the MRO of the node that has a visit method defined, e.g. "visit_EqualValue",
+    "visit_LogicalExpr" or "visit_Expr". Nodes without any matching visit method go to Visitor.generic_visit.
+    A visit method may return SKIP to leave out the sub exprs of the node, or STOP to end the traversal immediately.
+    Any other return value (including None) lets the traversal continue into the sub exprs.
+    """
+
+    dispatch_prefix = 'visit_'
+    dispatch_fallback = 'generic_visit'
+    dispatch_stats_name = 'visitor.dispatch'
+
+    def visit(self, expr: Expr) -> bool:
+        """
+        Traverse the tree rooted at expr. Return False if the traversal was stopped early by STOP, otherwise True.
+        """
+        cls = type(self)
+        dispatch = cls.dispatch if instrumentation.enabled else cls.dispatch_table.__getitem__
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            action = dispatch(type(node))(self, node)
+            if action is STOP:
+                return False
+            if action is not SKIP:
+                sub_exprs = node.iter_sub_expr()
+                if sub_exprs:
+                    stack.extend(reversed(sub_exprs))
+        return True
+
+    def generic_visit(self, expr: Expr):
+        pass